@@ -23,12 +23,18 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
     'imdb-query': 'imdb.duckdb',
   }
 
-  const filename = fileMap[action]
+  // Batch actions: several named queries in one round trip
+  const batchFileMap: Record<string, string> = {
+    'cricket-batch': 'cricket.duckdb',
+  }
+
+  const filename = fileMap[action] || batchFileMap[action]
   if (!filename) return res.status(400).json({ error: `Unknown action: ${action}` })
   if (req.method !== 'POST') return res.status(405).json({ error: 'POST required' })
+  const endpoint = batchFileMap[action] ? 'batch' : 'query'
 
   try {
-    const response = await fetch(`${BACKEND_URL}/api/query/${filename}`, {
+    const response = await fetch(`${BACKEND_URL}/api/${endpoint}/${filename}`, {
       method: 'POST',
       headers: {
         'Authorization': `Bearer ${API_KEY}`,
@@ -7,7 +7,7 @@ import {
   Info,
   X
 } from 'lucide-react'
-import { executeCricketQuery } from '../../../services/api'
+import { executeCricketBatch, batchResult } from '../../../services/api'
 
 // Types
 interface DashboardStats {
@@ -63,176 +63,193 @@ export function CricketDashboard() {
   const [winRatesLoading, setWinRatesLoading] = useState(false)
   const [showInfo, setShowInfo] = useState(false)
 
-  // Fetch dashboard stats from match_info table
+  // Fetch dashboard stats and yearly match counts in one batch; both read
+  // the same match_info columns, scanned once as the shared `matches` relation
   useEffect(() => {
-    async function fetchStats() {
+    async function fetchOverview() {
+      setLoading(true)
+      setError(null)
       try {
-        const result = await executeCricketQuery(`
-          SELECT
-            COUNT(*) as total_matches,
-            COUNT(CASE WHEN match_type = 'ODI' THEN 1 END) as odi_matches,
-            COUNT(CASE WHEN match_type = 'T20' THEN 1 END) as t20_matches,
-            COUNT(CASE WHEN match_type = 'TEST' THEN 1 END) as test_matches,
-            COUNT(DISTINCT team1) + COUNT(DISTINCT team2) as unique_teams_estimate,
-            COUNT(DISTINCT venue) as unique_venues,
-            MIN(start_date) as min_date,
-            MAX(start_date) as max_date
-          FROM match_info
-        `)
-
-        // Get actual unique teams count
-        const teamsResult = await executeCricketQuery(`
-          SELECT COUNT(DISTINCT team) as teams FROM (
-            SELECT team1 as team FROM match_info
-            UNION
-            SELECT team2 as team FROM match_info
-          )
-        `)
-
-        if (result.rows.length > 0) {
-          const row = result.rows[0]
-          setStats({
-            totalMatches: row[0] as number,
-            odiMatches: row[1] as number,
-            t20Matches: row[2] as number,
-            testMatches: row[3] as number,
-            uniqueTeams: teamsResult.rows[0][0] as number,
-            uniqueVenues: row[5] as number,
-            dateRange: {
-              from: row[6] as string,
-              to: row[7] as string
-            }
-          })
+        const batch = await executeCricketBatch([
+          {
+            name: 'stats',
+            sql: `
+              SELECT
+                COUNT(*) as total_matches,
+                COUNT(CASE WHEN match_type = 'ODI' THEN 1 END) as odi_matches,
+                COUNT(CASE WHEN match_type = 'T20' THEN 1 END) as t20_matches,
+                COUNT(CASE WHEN match_type = 'TEST' THEN 1 END) as test_matches,
+                COUNT(DISTINCT team1) + COUNT(DISTINCT team2) as unique_teams_estimate,
+                COUNT(DISTINCT venue) as unique_venues,
+                MIN(start_date) as min_date,
+                MAX(start_date) as max_date
+              FROM matches
+            `,
+          },
+          {
+            // Actual unique teams count
+            name: 'teams',
+            sql: `
+              SELECT COUNT(DISTINCT team) as teams FROM (
+                SELECT team1 as team FROM matches
+                UNION
+                SELECT team2 as team FROM matches
+              )
+            `,
+          },
+          {
+            name: 'yearly',
+            sql: `
+              SELECT
+                EXTRACT(YEAR FROM start_date)::INT as year,
+                COUNT(CASE WHEN match_type = 'ODI' THEN 1 END) as odi,
+                COUNT(CASE WHEN match_type = 'T20' THEN 1 END) as t20,
+                COUNT(CASE WHEN match_type = 'TEST' THEN 1 END) as test,
+                COUNT(*) as total
+              FROM matches
+              GROUP BY EXTRACT(YEAR FROM start_date)
+              ORDER BY year
+            `,
+          },
+        ], {
+          matches: 'SELECT match_type, team1, team2, venue, start_date FROM match_info',
+        })
+
+        try {
+          const result = batchResult(batch, 'stats')
+          const teamsResult = batchResult(batch, 'teams')
+          if (result.rows.length > 0) {
+            const row = result.rows[0]
+            setStats({
+              totalMatches: row[0] as number,
+              odiMatches: row[1] as number,
+              t20Matches: row[2] as number,
+              testMatches: row[3] as number,
+              uniqueTeams: teamsResult.rows[0][0] as number,
+              uniqueVenues: row[5] as number,
+              dateRange: {
+                from: row[6] as string,
+                to: row[7] as string
+              }
+            })
+          }
+        } catch (err) {
+          console.error('Failed to fetch stats:', err)
         }
-      } catch (err) {
-        console.error('Failed to fetch stats:', err)
-      }
-    }
-    fetchStats()
-  }, [])
-
-  // Fetch team win rates from match_info table
-  useEffect(() => {
-    async function fetchWinRates() {
-      setWinRatesLoading(true)
-      try {
-        const typeFilter = matchType !== 'All' ? `WHERE match_type = '${matchType}'` : ''
 
-        const result = await executeCricketQuery(`
-          WITH team_matches AS (
-            SELECT team1 as team, winner FROM match_info ${typeFilter}
-            UNION ALL
-            SELECT team2 as team, winner FROM match_info ${typeFilter}
-          ),
-          team_stats AS (
-            SELECT
-              team,
-              COUNT(*) as matches,
-              SUM(CASE WHEN winner = team THEN 1 ELSE 0 END) as wins
-            FROM team_matches
-            WHERE team IS NOT NULL
-            GROUP BY team
-            HAVING COUNT(*) >= 50
-          )
-          SELECT
-            team,
-            matches,
-            wins,
-            ROUND(wins * 100.0 / matches, 1) as win_rate
-          FROM team_stats
-          ORDER BY win_rate DESC
-          LIMIT 10
-        `)
-
-        setTeamWinRates(result.rows.map(row => ({
-          team: row[0] as string,
-          matches: row[1] as number,
-          wins: row[2] as number,
-          winRate: row[3] as number
+        setYearlyMatches(batchResult(batch, 'yearly').rows.map(row => ({
+          year: row[0] as number,
+          odi: row[1] as number,
+          t20: row[2] as number,
+          test: row[3] as number,
+          total: row[4] as number
         })))
       } catch (err) {
-        console.error('Failed to fetch win rates:', err)
+        setError(err instanceof Error ? err.message : 'Failed to fetch data')
       } finally {
-        setWinRatesLoading(false)
+        setLoading(false)
       }
     }
-    fetchWinRates()
-  }, [matchType])
+    fetchOverview()
+  }, [])
 
-  // Fetch recent matches from match_info table
+  // Fetch team win rates and recent matches in one batch over the
+  // match-type-filtered match_info rows
   useEffect(() => {
-    async function fetchRecentMatches() {
+    async function fetchMatchTypeData() {
+      setWinRatesLoading(true)
       try {
         const typeFilter = matchType !== 'All' ? `WHERE match_type = '${matchType}'` : ''
 
-        const result = await executeCricketQuery(`
-          SELECT
-            match_id,
-            match_type,
-            start_date,
-            venue,
-            team1,
-            team2,
-            winner,
-            winner_runs,
-            winner_wickets
-          FROM match_info
-          ${typeFilter}
-          ORDER BY start_date DESC
-          LIMIT 50
-        `)
-
-        setRecentMatches(result.rows.map(row => ({
-          matchId: row[0] as number,
-          matchType: row[1] as string,
-          date: row[2] as string,
-          venue: row[3] as string,
-          team1: row[4] as string,
-          team2: row[5] as string,
-          winner: row[6] as string || 'No Result',
-          winnerRuns: row[7] as number | null,
-          winnerWickets: row[8] as number | null
-        })))
-      } catch (err) {
-        console.error('Failed to fetch recent matches:', err)
-      }
-    }
-    fetchRecentMatches()
-  }, [matchType])
+        const batch = await executeCricketBatch([
+          {
+            name: 'winRates',
+            sql: `
+              WITH team_matches AS (
+                SELECT team1 as team, winner FROM matches
+                UNION ALL
+                SELECT team2 as team, winner FROM matches
+              ),
+              team_stats AS (
+                SELECT
+                  team,
+                  COUNT(*) as matches,
+                  SUM(CASE WHEN winner = team THEN 1 ELSE 0 END) as wins
+                FROM team_matches
+                WHERE team IS NOT NULL
+                GROUP BY team
+                HAVING COUNT(*) >= 50
+              )
+              SELECT
+                team,
+                matches,
+                wins,
+                ROUND(wins * 100.0 / matches, 1) as win_rate
+              FROM team_stats
+              ORDER BY win_rate DESC
+              LIMIT 10
+            `,
+          },
+          {
+            name: 'recent',
+            sql: `
+              SELECT
+                match_id,
+                match_type,
+                start_date,
+                venue,
+                team1,
+                team2,
+                winner,
+                winner_runs,
+                winner_wickets
+              FROM matches
+              ORDER BY start_date DESC
+              LIMIT 50
+            `,
+          },
+        ], {
+          matches: `
+            SELECT match_id, match_type, start_date, venue, team1, team2, winner, winner_runs, winner_wickets
+            FROM match_info
+            ${typeFilter}
+          `,
+        })
+
+        try {
+          setTeamWinRates(batchResult(batch, 'winRates').rows.map(row => ({
+            team: row[0] as string,
+            matches: row[1] as number,
+            wins: row[2] as number,
+            winRate: row[3] as number
+          })))
+        } catch (err) {
+          console.error('Failed to fetch win rates:', err)
+        }
 
-  // Fetch yearly match counts from match_info table
-  useEffect(() => {
-    async function fetchYearlyMatches() {
-      setLoading(true)
-      setError(null)
-      try {
-        const result = await executeCricketQuery(`
-          SELECT
-            EXTRACT(YEAR FROM start_date)::INT as year,
-            COUNT(CASE WHEN match_type = 'ODI' THEN 1 END) as odi,
-            COUNT(CASE WHEN match_type = 'T20' THEN 1 END) as t20,
-            COUNT(CASE WHEN match_type = 'TEST' THEN 1 END) as test,
-            COUNT(*) as total
-          FROM match_info
-          GROUP BY EXTRACT(YEAR FROM start_date)
-          ORDER BY year
-        `)
-
-        setYearlyMatches(result.rows.map(row => ({
-          year: row[0] as number,
-          odi: row[1] as number,
-          t20: row[2] as number,
-          test: row[3] as number,
-          total: row[4] as number
-        })))
+        try {
+          setRecentMatches(batchResult(batch, 'recent').rows.map(row => ({
+            matchId: row[0] as number,
+            matchType: row[1] as string,
+            date: row[2] as string,
+            venue: row[3] as string,
+            team1: row[4] as string,
+            team2: row[5] as string,
+            winner: row[6] as string || 'No Result',
+            winnerRuns: row[7] as number | null,
+            winnerWickets: row[8] as number | null
+          })))
+        } catch (err) {
+          console.error('Failed to fetch recent matches:', err)
+        }
       } catch (err) {
-        setError(err instanceof Error ? err.message : 'Failed to fetch data')
+        console.error('Failed to fetch match type data:', err)
       } finally {
-        setLoading(false)
+        setWinRatesLoading(false)
       }
     }
-    fetchYearlyMatches()
-  }, [])
+    fetchMatchTypeData()
+  }, [matchType])
 
   const displayedMatches = showAllMatches ? recentMatches : recentMatches.slice(0, 10)
   const maxWinRate = Math.max(...teamWinRates.map(t => t.winRate), 100)
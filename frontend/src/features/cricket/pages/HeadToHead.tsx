@@ -3,6 +3,7 @@ import { executeCricketQuery } from '../../../services/api'
 import { Loader2, ChevronUp, ChevronDown, Search, Users, Target, Info, X } from 'lucide-react'
 
 interface MatchupRow {
+  opponentId: string
   opponent: string
   balls: number
   runs: number
@@ -24,7 +25,25 @@ interface PlayerSummary {
   matchups: number
 }
 
+interface PlayerSuggestion {
+  id: string  // players.player_id: matchup rows are keyed by it, so namesakes stay apart
+  name: string
+  teams: string[]
+  firstYear: number | null
+  lastYear: number | null
+}
+
 type ViewMode = 'batter' | 'bowler'
+
+// Same normalization as players.search_key (process_cricsheet.py)
+function searchKey(text: string): string {
+  return text
+    .toLowerCase()
+    .normalize('NFD')
+    .replace(/[\u0300-\u036f]/g, '')
+    .replace(/[^a-z0-9]+/g, ' ')
+    .trim()
+}
 type SortField = keyof MatchupRow
 type SortDirection = 'asc' | 'desc'
 
@@ -33,7 +52,8 @@ export function HeadToHead() {
   const [mode, setMode] = useState<ViewMode>('batter')
   const [searchQuery, setSearchQuery] = useState('')
   const [selectedPlayer, setSelectedPlayer] = useState<string | null>(null)
-  const [playerSuggestions, setPlayerSuggestions] = useState<string[]>([])
+  const [selectedId, setSelectedId] = useState<string | null>(null)
+  const [playerSuggestions, setPlayerSuggestions] = useState<PlayerSuggestion[]>([])
   const [showSuggestions, setShowSuggestions] = useState(false)
 
   // Filters
@@ -56,7 +76,8 @@ export function HeadToHead() {
 
   // Debounced search for player suggestions
   useEffect(() => {
-    if (searchQuery.length < 2) {
+    const key = searchKey(searchQuery)
+    if (key.length < 2) {
       setPlayerSuggestions([])
       return
     }
@@ -64,15 +85,22 @@ export function HeadToHead() {
     const timer = setTimeout(async () => {
       setSearchLoading(true)
       try {
-        const column = mode === 'batter' ? 'striker' : 'bowler'
+        // Canonical players table: one row per player, search_key covers every spelling
+        const ballsCol = mode === 'batter' ? 'balls_faced' : 'balls_bowled'
         const result = await executeCricketQuery(`
-          SELECT DISTINCT ${column} as player
-          FROM ball_by_ball
-          WHERE LOWER(${column}) LIKE LOWER('%${searchQuery.replace(/'/g, "''")}%')
-          ORDER BY ${column}
+          SELECT player_id, name, teams, first_year, last_year
+          FROM players
+          WHERE search_key LIKE '%${key}%' AND ${ballsCol} > 0
+          ORDER BY ${ballsCol} DESC, name
           LIMIT 20
         `)
-        setPlayerSuggestions(result.rows.map(row => row[0] as string))
+        setPlayerSuggestions(result.rows.map(row => ({
+          id: row[0] as string,
+          name: row[1] as string,
+          teams: row[2] as unknown as string[],
+          firstYear: row[3] as number | null,
+          lastYear: row[4] as number | null,
+        })))
       } catch (err) {
         console.error('Search error:', err)
       } finally {
@@ -85,7 +113,7 @@ export function HeadToHead() {
 
   // Fetch matchups when player is selected
   useEffect(() => {
-    if (!selectedPlayer) {
+    if (!selectedId) {
       setMatchups([])
       setSummary(null)
       return
@@ -96,84 +124,57 @@ export function HeadToHead() {
       setError(null)
 
       try {
-        const typeFilter = matchType !== 'All' ? `AND match_type = '${matchType}'` : ''
-        const escapedPlayer = selectedPlayer!.replace(/'/g, "''")
-
-        let sql: string
-        if (mode === 'batter') {
-          // Batter vs all bowlers
-          sql = `
-            SELECT
-              bowler as opponent,
-              COUNT(*) as balls,
-              CAST(SUM(runs_off_bat) AS INTEGER) as runs,
-              SUM(CASE
-                WHEN wicket_type IS NOT NULL
-                  AND player_dismissed = striker
-                  AND wicket_type NOT IN ('run out', 'retired hurt', 'retired not out', 'obstructing the field')
-                THEN 1 ELSE 0
-              END) as dismissals,
-              CASE
-                WHEN SUM(CASE WHEN wicket_type IS NOT NULL AND player_dismissed = striker AND wicket_type NOT IN ('run out', 'retired hurt', 'retired not out', 'obstructing the field') THEN 1 ELSE 0 END) > 0
-                THEN ROUND(CAST(SUM(runs_off_bat) AS DOUBLE) / SUM(CASE WHEN wicket_type IS NOT NULL AND player_dismissed = striker AND wicket_type NOT IN ('run out', 'retired hurt', 'retired not out', 'obstructing the field') THEN 1 ELSE 0 END), 2)
-                ELSE CAST(SUM(runs_off_bat) AS DOUBLE)
-              END as average,
-              ROUND(CAST(SUM(runs_off_bat) AS DOUBLE) / COUNT(*) * 100, 1) as strike_rate,
-              SUM(CASE WHEN runs_off_bat = 0 AND wides = 0 AND noballs = 0 THEN 1 ELSE 0 END) as dots,
-              ROUND(SUM(CASE WHEN runs_off_bat = 0 AND wides = 0 AND noballs = 0 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 1) as dot_pct,
-              SUM(CASE WHEN runs_off_bat = 4 THEN 1 ELSE 0 END) as fours,
-              SUM(CASE WHEN runs_off_bat = 6 THEN 1 ELSE 0 END) as sixes
-            FROM ball_by_ball
-            WHERE striker = '${escapedPlayer}' ${typeFilter}
-            GROUP BY bowler
-            HAVING COUNT(*) >= ${minBalls}
-            ORDER BY balls DESC
-            LIMIT 200
-          `
-        } else {
-          // Bowler vs all batters
-          sql = `
-            SELECT
-              striker as opponent,
-              COUNT(*) as balls,
-              CAST(SUM(runs_off_bat) AS INTEGER) as runs,
-              SUM(CASE
-                WHEN wicket_type IS NOT NULL
-                  AND wicket_type NOT IN ('run out', 'retired hurt', 'retired not out', 'obstructing the field')
-                THEN 1 ELSE 0
-              END) as wickets,
-              CASE
-                WHEN SUM(CASE WHEN wicket_type IS NOT NULL AND wicket_type NOT IN ('run out', 'retired hurt', 'retired not out', 'obstructing the field') THEN 1 ELSE 0 END) > 0
-                THEN ROUND(CAST(SUM(runs_off_bat) AS DOUBLE) / SUM(CASE WHEN wicket_type IS NOT NULL AND wicket_type NOT IN ('run out', 'retired hurt', 'retired not out', 'obstructing the field') THEN 1 ELSE 0 END), 2)
-                ELSE CAST(SUM(runs_off_bat) AS DOUBLE)
-              END as average,
-              ROUND(CAST(SUM(runs_off_bat) AS DOUBLE) / COUNT(*) * 6, 2) as economy,
-              SUM(CASE WHEN runs_off_bat = 0 AND wides = 0 AND noballs = 0 THEN 1 ELSE 0 END) as dots,
-              ROUND(SUM(CASE WHEN runs_off_bat = 0 AND wides = 0 AND noballs = 0 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 1) as dot_pct,
-              SUM(CASE WHEN runs_off_bat = 4 THEN 1 ELSE 0 END) as fours,
-              SUM(CASE WHEN runs_off_bat = 6 THEN 1 ELSE 0 END) as sixes
-            FROM ball_by_ball
-            WHERE bowler = '${escapedPlayer}' ${typeFilter}
-            GROUP BY striker
-            HAVING COUNT(*) >= ${minBalls}
-            ORDER BY balls DESC
-            LIMIT 200
-          `
-        }
+        const typeFilter = matchType !== 'All' ? `AND m.match_type = '${matchType}'` : ''
+        const playerId = selectedId!.replace(/'/g, "''")
+
+        // Reads the pre-aggregated matchup table (one row per striker_id/bowler_id/format/year);
+        // opponents are grouped by player_id and named from the players table
+        const playerCol = mode === 'batter' ? 'striker_id' : 'bowler_id'
+        const opponentCol = mode === 'batter' ? 'bowler_id' : 'striker_id'
+        const rateExpr = mode === 'batter'
+          ? 'ROUND(CAST(SUM(runs) AS DOUBLE) / SUM(balls) * 100, 1)'
+          : 'ROUND(CAST(SUM(runs) AS DOUBLE) / SUM(balls) * 6, 2)'
+
+        const sql = `
+          SELECT
+            m.${opponentCol} as opponent_id,
+            ANY_VALUE(p.name) as opponent,
+            CAST(SUM(balls) AS INTEGER) as balls,
+            CAST(SUM(runs) AS INTEGER) as runs,
+            CAST(SUM(dismissals) AS INTEGER) as dismissals,
+            CASE
+              WHEN SUM(dismissals) > 0
+              THEN ROUND(CAST(SUM(runs) AS DOUBLE) / SUM(dismissals), 2)
+              ELSE CAST(SUM(runs) AS DOUBLE)
+            END as average,
+            ${rateExpr} as rate,
+            CAST(SUM(dots) AS INTEGER) as dots,
+            ROUND(SUM(dots) * 100.0 / SUM(balls), 1) as dot_pct,
+            CAST(SUM(fours) AS INTEGER) as fours,
+            CAST(SUM(sixes) AS INTEGER) as sixes
+          FROM matchup m
+          JOIN players p ON p.player_id = m.${opponentCol}
+          WHERE m.${playerCol} = '${playerId}' ${typeFilter}
+          GROUP BY m.${opponentCol}
+          HAVING SUM(balls) >= ${minBalls}
+          ORDER BY balls DESC
+          LIMIT 200
+        `
 
         const result = await executeCricketQuery(sql)
 
         const rows: MatchupRow[] = result.rows.map(row => ({
-          opponent: row[0] as string,
-          balls: row[1] as number,
-          runs: row[2] as number,
-          dismissals: row[3] as number,
-          average: row[4] as number,
-          strikeRate: row[5] as number,
-          dots: row[6] as number,
-          dotPct: row[7] as number,
-          fours: row[8] as number,
-          sixes: row[9] as number,
+          opponentId: row[0] as string,
+          opponent: row[1] as string,
+          balls: row[2] as number,
+          runs: row[3] as number,
+          dismissals: row[4] as number,
+          average: row[5] as number,
+          strikeRate: row[6] as number,
+          dots: row[7] as number,
+          dotPct: row[8] as number,
+          fours: row[9] as number,
+          sixes: row[10] as number,
         }))
 
         setMatchups(rows)
@@ -202,7 +203,7 @@ export function HeadToHead() {
     }
 
     fetchMatchups()
-  }, [selectedPlayer, mode, matchType, minBalls])
+  }, [selectedId, mode, matchType, minBalls])
 
   // Sort matchups
   const sortedMatchups = useMemo(() => {
@@ -233,14 +234,16 @@ export function HeadToHead() {
       : <ChevronDown className="h-4 w-4 inline" />
   }
 
-  function selectPlayer(player: string) {
-    setSelectedPlayer(player)
-    setSearchQuery(player)
+  function selectPlayer(player: PlayerSuggestion) {
+    setSelectedPlayer(player.name)
+    setSelectedId(player.id)
+    setSearchQuery(player.name)
     setShowSuggestions(false)
   }
 
   function clearPlayer() {
     setSelectedPlayer(null)
+    setSelectedId(null)
     setSearchQuery('')
     setMatchups([])
     setSummary(null)
@@ -313,6 +316,7 @@ export function HeadToHead() {
                     setShowSuggestions(true)
                     if (e.target.value !== selectedPlayer) {
                       setSelectedPlayer(null)
+                      setSelectedId(null)
                     }
                   }}
                   onFocus={() => setShowSuggestions(true)}
@@ -336,11 +340,20 @@ export function HeadToHead() {
                 <div className="absolute z-10 w-full mt-1 bg-white border border-slate-200 rounded-md shadow-lg max-h-60 overflow-auto">
                   {playerSuggestions.map((player) => (
                     <button
-                      key={player}
+                      key={player.id}
                       onClick={() => selectPlayer(player)}
                       className="w-full px-4 py-2 text-left text-sm hover:bg-indigo-50 hover:text-indigo-700"
                     >
-                      {player}
+                      {player.name}
+                      {player.teams.length > 0 && (
+                        <span className="ml-2 text-xs text-slate-500">{player.teams.join(', ')}</span>
+                      )}
+                      {/* Years tell namesakes apart (same name, different registry id) */}
+                      {player.firstYear !== null && (
+                        <span className="ml-2 text-xs text-slate-400">
+                          {player.firstYear === player.lastYear ? player.firstYear : `${player.firstYear}–${player.lastYear}`}
+                        </span>
+                      )}
                     </button>
                   ))}
                 </div>
@@ -509,7 +522,7 @@ export function HeadToHead() {
                 <tbody>
                   {sortedMatchups.map((row, index) => (
                     <tr
-                      key={row.opponent}
+                      key={row.opponentId}
                       className={`border-b border-slate-100 hover:bg-slate-50 ${
                         index % 2 === 0 ? 'bg-white' : 'bg-slate-25'
                       }`}
@@ -94,24 +94,23 @@ export function GenreAnalytics() {
       setGenreLoading(true)
       try {
         const searchFilter = searchTerm.trim()
-          ? `AND LOWER(tb.primaryTitle) LIKE '%${searchTerm.toLowerCase().trim()}%'`
+          ? `AND LOWER(primaryTitle) LIKE '%${searchTerm.toLowerCase().trim()}%'`
           : ''
 
         const [moviesResult, decadesResult] = await Promise.all([
           executeImdbQuery(`
             SELECT
-              tb.primaryTitle,
-              tb.startYear,
-              tr.averageRating,
-              tr.numVotes,
-              tb.genres
-            FROM title_basics tb
-            JOIN title_ratings tr ON tb.tconst = tr.tconst
-            WHERE tb.titleType = 'movie'
-              AND tb.genres LIKE '%${selectedGenre}%'
-              AND tr.numVotes >= 10000
+              primaryTitle,
+              startYear,
+              averageRating,
+              numVotes,
+              genres
+            FROM titles_rated
+            WHERE titleType = 'movie'
+              AND genre = '${selectedGenre}'
+              AND numVotes >= 10000
               ${searchFilter}
-            ORDER BY tr.averageRating DESC, tr.numVotes DESC
+            ORDER BY averageRating DESC, numVotes DESC
             LIMIT 50
           `),
           executeImdbQuery(`
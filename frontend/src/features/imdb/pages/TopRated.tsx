@@ -73,23 +73,25 @@ export function TopRated() {
       setLoading(true)
       setError(null)
       try {
-        // Build WHERE clause
+        // Build WHERE clause (titles_rated: pre-joined, one row per title + genre)
         const conditions = [
-          `tb.titleType = 'movie'`,
-          `tr.numVotes >= ${minVotes}`,
+          `titleType = 'movie'`,
+          `numVotes >= ${minVotes}`,
         ]
 
         if (yearRange.label !== 'All Time') {
-          conditions.push(`tb.startYear >= ${yearRange.from}`)
-          conditions.push(`tb.startYear <= ${yearRange.to}`)
+          conditions.push(`startYear >= ${yearRange.from}`)
+          conditions.push(`startYear <= ${yearRange.to}`)
         }
 
         if (genre !== 'All Genres') {
-          conditions.push(`tb.genres LIKE '%${genre}%'`)
+          conditions.push(`genre = '${genre}'`)
+        } else {
+          conditions.push(`genre_index = 1`)
         }
 
         if (searchTerm.trim()) {
-          conditions.push(`LOWER(tb.primaryTitle) LIKE '%${searchTerm.toLowerCase().trim()}%'`)
+          conditions.push(`LOWER(primaryTitle) LIKE '%${searchTerm.toLowerCase().trim()}%'`)
         }
 
         const whereClause = conditions.join(' AND ')
@@ -97,25 +99,36 @@ export function TopRated() {
         // Get count first
         const countResult = await executeImdbQuery(`
           SELECT COUNT(*) as total
-          FROM title_basics tb
-          JOIN title_ratings tr ON tb.tconst = tr.tconst
+          FROM titles_rated
           WHERE ${whereClause}
         `)
         setTotalCount(countResult.rows[0][0] as number)
 
-        // Get movies
+        // Get movies: without a title search, merge the precomputed per-decade
+        // top-100 lists in rating_leaderboard instead of sorting titles_rated
+        const leaderboardConditions = [
+          `titleType = 'movie'`,
+          `min_votes = ${minVotes}`,
+          `genre = '${genre === 'All Genres' ? 'All' : genre}'`,
+        ]
+        if (yearRange.label !== 'All Time') {
+          leaderboardConditions.push(`decade BETWEEN ${yearRange.from} AND ${yearRange.to}`)
+        }
+
+        const source = searchTerm.trim()
+          ? `titles_rated WHERE ${whereClause}`
+          : `rating_leaderboard WHERE ${leaderboardConditions.join(' AND ')}`
+
         const result = await executeImdbQuery(`
           SELECT
-            tb.primaryTitle as title,
-            tb.startYear as year,
-            tr.averageRating as rating,
-            tr.numVotes as votes,
-            tb.genres,
-            tb.runtimeMinutes as runtime
-          FROM title_basics tb
-          JOIN title_ratings tr ON tb.tconst = tr.tconst
-          WHERE ${whereClause}
-          ORDER BY tr.averageRating DESC, tr.numVotes DESC
+            primaryTitle as title,
+            startYear as year,
+            averageRating as rating,
+            numVotes as votes,
+            genres,
+            runtimeMinutes as runtime
+          FROM ${source}
+          ORDER BY averageRating DESC, numVotes DESC
           LIMIT 100
         `)
 
@@ -74,6 +74,76 @@ export async function executeImdbQuery(sql: string, limit?: number): Promise<Que
   });
 }
 
+// ============== Batch queries ==============
+
+export interface BatchQuery {
+  name: string;
+  sql: string;
+  limit?: number;
+}
+
+export type BatchResult = QueryResponse | { error: string };
+
+export interface BatchResponse {
+  results: Record<string, BatchResult>;
+}
+
+// Only query_gateway.py serves /api/batch: enable it with VITE_BATCH_API=true where the
+// gateway runs. A 404 turns it off for the rest of the session, so pages don't pay a
+// failing round trip on every load.
+let batchAvailable = import.meta.env.VITE_BATCH_API === 'true';
+
+/**
+ * Run several named queries in one round trip. `shared` maps relation names to
+ * SQL the backend scans once for the whole batch; queries select from them by name.
+ * Falls back to one request per query (shared relations inlined as CTEs) when the
+ * backend has no batch endpoint (VITE_BATCH_API unset, or it answered 404).
+ */
+async function executeBatch(
+  action: string,
+  runOne: (sql: string, limit?: number) => Promise<QueryResponse>,
+  queries: BatchQuery[],
+  shared: Record<string, string> = {}
+): Promise<BatchResponse> {
+  if (batchAvailable) {
+    try {
+      return await fetchApi(`action=${action}`, {
+        method: 'POST',
+        body: JSON.stringify({ queries, shared }),
+      });
+    } catch (err) {
+      if (!(err instanceof Error && /HTTP 404|Not found/i.test(err.message))) throw err;
+      batchAvailable = false;
+    }
+  }
+
+  const ctes = Object.entries(shared).map(([name, sql]) => `${name} AS (${sql})`).join(', ');
+  const entries = await Promise.all(queries.map(async (q): Promise<[string, BatchResult]> => {
+    try {
+      const sql = ctes ? `WITH ${ctes} SELECT * FROM (${q.sql}) AS q` : q.sql;
+      return [q.name, await runOne(sql, q.limit)];
+    } catch (err) {
+      return [q.name, { error: err instanceof Error ? err.message : 'Query failed' }];
+    }
+  }));
+  return { results: Object.fromEntries(entries) };
+}
+
+export async function executeCricketBatch(
+  queries: BatchQuery[],
+  shared?: Record<string, string>
+): Promise<BatchResponse> {
+  return executeBatch('cricket-batch', executeCricketQuery, queries, shared);
+}
+
+/** The QueryResponse for one batch entry; throws that query's error */
+export function batchResult(response: BatchResponse, name: string): QueryResponse {
+  const result = response.results[name];
+  if (!result) throw new Error(`Missing batch result: ${name}`);
+  if ('error' in result) throw new Error(result.error);
+  return result;
+}
+
 export async function getTableSample(tableName: string, limit: number = 5): Promise<QueryResponse> {
   return executeQuery(`SELECT * FROM ${tableName} LIMIT ${limit}`);
 }
@@ -3,14 +3,44 @@ IMDb Data Download and Import Script
 Downloads official IMDb TSV files and imports into DuckDB
 
 Source: https://datasets.imdbws.com/
+
+Usage:
+    python download_and_import.py            # build; stages with unchanged inputs are skipped
+    python download_and_import.py --force    # rebuild every stage
+    python download_and_import.py --refresh  # re-download and apply only changed rows
+    python download_and_import.py --lazy     # also register akas/principals as Parquet views
+    python download_and_import.py --materialize-lazy --usage-log queries.ndjson
+
+Lazy tables: title.akas and title.principals are only used by a few pages,
+so with --lazy they are converted to zstd Parquet next to imdb.duckdb and
+exposed as views (imdb.duckdb itself stays small). Each run of
+--materialize-lazy counts the queries in a usage log (NDJSON lines with a
+"sql" field) that reference each view; once a view's total reaches
+LAZY_MATERIALIZE_THRESHOLD it is loaded into a native table. The log is
+append-only (query_log.py), so the byte offset read so far is kept per log
+path in lazy_usage_logs and only lines after it are counted: re-running on
+the same log adds nothing, and a log that shrank (rotated) is read from the
+start. Hit counts are kept in the lazy_tables table. The Parquet files must
+be deployed with the database at the same path until the views are
+materialized.
+
+Resource budget comes from projects/scripts/build_profiles.py:
+    BUILD_PROFILE=small-vps python download_and_import.py
 """
 
-import os
-import gzip
-import urllib.request
+import re
+import sys
+import json
+import time
+import argparse
+import functools
 import duckdb
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from ingest import HttpSource, Pipeline, Stage, StageSkipped, TableSchema
+from catalog import load_manifest, write_manifest
+
 # Configuration
 BASE_URL = "https://datasets.imdbws.com/"
 DATA_DIR = Path(__file__).parent.parent / "data"
@@ -22,6 +52,86 @@ MVP_FILES = [
     "name.basics.tsv.gz",
 ]
 
+# Typed table declarations (shared with size_comparison.py)
+TABLE_SCHEMAS = {
+    "title_basics": TableSchema("title_basics", {
+        "tconst": "VARCHAR",
+        "titleType": "VARCHAR",
+        "primaryTitle": "VARCHAR",
+        "originalTitle": "VARCHAR",
+        "isAdult": "BOOLEAN",
+        "startYear": "INTEGER",
+        "endYear": "INTEGER",
+        "runtimeMinutes": "INTEGER",
+        "genres": "VARCHAR",
+    }, primary_key="tconst"),
+    "title_ratings": TableSchema("title_ratings", {
+        "tconst": "VARCHAR",
+        "averageRating": "DECIMAL(3,1)",
+        "numVotes": "INTEGER",
+    }, primary_key="tconst"),
+    "name_basics": TableSchema("name_basics", {
+        "nconst": "VARCHAR",
+        "primaryName": "VARCHAR",
+        "birthYear": "INTEGER",
+        "deathYear": "INTEGER",
+        "primaryProfession": "VARCHAR",
+        "knownForTitles": "VARCHAR",
+    }, primary_key="nconst"),
+}
+
+# Rarely used tables, registered as views over Parquet with --lazy
+LAZY_SCHEMAS = {
+    "title_akas": TableSchema("title_akas", {
+        "titleId": "VARCHAR",
+        "ordering": "INTEGER",
+        "title": "VARCHAR",
+        "region": "VARCHAR",
+        "language": "VARCHAR",
+        "types": "VARCHAR",
+        "attributes": "VARCHAR",
+        "isOriginalTitle": "BOOLEAN",
+    }),
+    "title_principals": TableSchema("title_principals", {
+        "tconst": "VARCHAR",
+        "ordering": "INTEGER",
+        "nconst": "VARCHAR",
+        "category": "VARCHAR",
+        "job": "VARCHAR",
+        "characters": "VARCHAR",
+    }),
+}
+
+# Source file -> table
+FILE_TO_TABLE = {
+    "title.basics.tsv.gz": "title_basics",
+    "title.ratings.tsv.gz": "title_ratings",
+    "name.basics.tsv.gz": "name_basics",
+}
+
+LAZY_FILE_TO_TABLE = {
+    "title.akas.tsv.gz": "title_akas",
+    "title.principals.tsv.gz": "title_principals",
+}
+
+# Top-K rating leaderboards: vote thresholds match the TopRated page filters
+LEADERBOARD_VOTE_BUCKETS = [1000, 10000, 50000, 100000, 500000]
+LEADERBOARD_K = 100
+
+# Columns the IMDb pages filter and sort on, pre-loaded after open
+HOT_COLUMNS = {
+    "title_basics": ["tconst", "titleType", "startYear", "genres"],
+    "title_ratings": ["tconst", "averageRating", "numVotes"],
+    "titles_rated": ["titleType", "numVotes", "genre", "genre_index", "averageRating"],
+    "rating_leaderboard": ["titleType", "genre", "min_votes", "decade"],
+}
+
+# Queries (from the usage log) a lazy view must see before it becomes a table
+LAZY_MATERIALIZE_THRESHOLD = 50
+
+# Refresh refuses to delete more than this share of a table (truncated download guard)
+MAX_REFRESH_DELETE_FRACTION = 0.05
+
 # All files (for future use)
 ALL_FILES = [
     "title.basics.tsv.gz",
@@ -33,96 +143,269 @@ ALL_FILES = [
     "title.akas.tsv.gz",
 ]
 
-def download_file(filename: str, force: bool = False) -> Path:
-    """Download a file from IMDb datasets if not already present"""
-    filepath = DATA_DIR / filename
-
-    if filepath.exists() and not force:
-        print(f"  [SKIP] {filename} already exists ({filepath.stat().st_size / 1024 / 1024:.1f} MB)")
-        return filepath
-
-    url = BASE_URL + filename
-    print(f"  [DOWNLOAD] {filename}...")
+def import_table(conn: duckdb.DuckDBPyConnection, gz_file: Path, schema: TableSchema, refresh: bool = False):
+    """Pipeline stage: full import of one file, or a delta refresh if the table already exists"""
+    create_rejects_table(conn)
 
-    # Download with progress
-    def report_progress(block_num, block_size, total_size):
-        downloaded = block_num * block_size
-        percent = min(100, downloaded * 100 / total_size) if total_size > 0 else 0
-        mb_downloaded = downloaded / 1024 / 1024
-        mb_total = total_size / 1024 / 1024
-        print(f"\r    {mb_downloaded:.1f} / {mb_total:.1f} MB ({percent:.1f}%)", end="", flush=True)
+    exists = conn.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [schema.name]
+    ).fetchone()[0]
+    if refresh and exists:
+        return refresh_table(conn, gz_file, schema.name, schema.primary_key)
 
-    urllib.request.urlretrieve(url, filepath, reporthook=report_progress)
-    print()  # newline after progress
+    conn.execute(schema.create_sql())
+    count, rejected = import_tsv_to_duckdb(conn, gz_file, schema.name)
+    return {"inserted": count, "rejected": rejected}
 
-    return filepath
 
-
-def create_duckdb_tables(db_path: Path) -> duckdb.DuckDBPyConnection:
-    """Create DuckDB database and tables"""
-    conn = duckdb.connect(str(db_path))
-
-    # title_basics
+def create_rejects_table(conn: duckdb.DuckDBPyConnection):
+    """Quarantine table for TSV lines that failed to parse during import"""
     conn.execute("""
-        CREATE TABLE IF NOT EXISTS title_basics (
-            tconst VARCHAR PRIMARY KEY,
-            titleType VARCHAR,
-            primaryTitle VARCHAR,
-            originalTitle VARCHAR,
-            isAdult BOOLEAN,
-            startYear INTEGER,
-            endYear INTEGER,
-            runtimeMinutes INTEGER,
-            genres VARCHAR
+        CREATE TABLE IF NOT EXISTS import_rejects (
+            source_file VARCHAR,
+            line BIGINT,
+            error_type VARCHAR,
+            column_name VARCHAR,
+            csv_line VARCHAR,
+            error_message VARCHAR
         )
     """)
 
-    # title_ratings
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS title_ratings (
-            tconst VARCHAR PRIMARY KEY,
-            averageRating DECIMAL(3,1),
-            numVotes INTEGER
-        )
-    """)
 
-    # name_basics
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS name_basics (
-            nconst VARCHAR PRIMARY KEY,
-            primaryName VARCHAR,
-            birthYear INTEGER,
-            deathYear INTEGER,
-            primaryProfession VARCHAR,
-            knownForTitles VARCHAR
+def read_tsv_sql(gz_file: Path, column_types: str) -> str:
+    """read_csv(...) expression for an IMDb TSV, typed, with bad lines sent to the reject tables"""
+    # DuckDB can read gzipped files directly
+    return f"""read_csv('{gz_file.as_posix()}',
+            delim = '\t',
+            header = true,
+            nullstr = '\\N',
+            quote = '',
+            escape = '',
+            columns = {column_types},
+            store_rejects = true,
+            rejects_table = 'reject_errors',
+            rejects_scan = 'reject_scans'
+        )"""
+
+
+def record_rejects(conn: duckdb.DuckDBPyConnection, gz_file: Path) -> int:
+    """
+    Copy the rejects of the latest scan of gz_file into import_rejects (one
+    row per error) and return the number of rejected lines. A line can log
+    several errors (a bad cast and a wrong column count), so the two differ.
+    """
+    # Rejects accumulate per scan; keep only this file's latest scan
+    conn.execute(f"DELETE FROM import_rejects WHERE source_file = '{gz_file.name}'")
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE latest_rejects AS
+        SELECT e.* FROM reject_errors e
+        WHERE e.scan_id = (
+            SELECT MAX(scan_id) FROM reject_scans WHERE file_path = '{gz_file.as_posix()}'
         )
     """)
+    errors = conn.execute(f"""
+        INSERT INTO import_rejects
+        SELECT '{gz_file.name}', line, CAST(error_type AS VARCHAR), column_name, csv_line, error_message
+        FROM latest_rejects
+    """).fetchone()[0]
+    rejected = conn.execute("SELECT COUNT(DISTINCT (file_id, line)) FROM latest_rejects").fetchone()[0]
+    conn.execute("DROP TABLE latest_rejects")
 
-    return conn
+    if rejected:
+        print(f"    {rejected:,} lines rejected ({errors:,} errors). "
+              f"See: SELECT * FROM import_rejects WHERE source_file = '{gz_file.name}'")
+    return rejected
 
 
 def import_tsv_to_duckdb(conn: duckdb.DuckDBPyConnection, gz_file: Path, table_name: str):
-    """Import a gzipped TSV file directly into DuckDB"""
+    """
+    Import a gzipped TSV file directly into DuckDB.
+    Malformed lines (bad casts, wrong column count) are skipped and copied to
+    import_rejects instead of failing the whole load. Single pass over the gzip.
+    """
     print(f"  [IMPORT] {gz_file.name} -> {table_name}...")
 
-    # DuckDB can read gzipped files directly
-    # Use COPY with proper null handling
+    # Read with the target table's types so cast failures are rejected per line
+    columns = conn.execute(f"DESCRIBE {table_name}").fetchall()
+    column_types = "{" + ", ".join(f"'{row[0]}': '{row[1]}'" for row in columns) + "}"
+
+    count = conn.execute(f"""
+        INSERT INTO {table_name}
+        SELECT * FROM {read_tsv_sql(gz_file, column_types)}
+    """).fetchone()[0]
+    rejected = record_rejects(conn, gz_file)
+
+    print(f"    Imported {count:,} rows, rejected {rejected:,}")
+
+    return count, rejected
+
+
+def refresh_table(conn: duckdb.DuckDBPyConnection, gz_file: Path, table_name: str, key: str):
+    """
+    Apply a new TSV snapshot to an existing table as a delta.
+    The file is loaded into a staging table, rows are compared to the current
+    table by key and a hash of the non-key columns, and only inserts, updates
+    and deletes are written.
+    """
+    print(f"  [REFRESH] {gz_file.name} -> {table_name}...")
+    start = time.perf_counter()
+
+    staging = f"staging_{table_name}"
+    conn.execute(f"CREATE OR REPLACE TEMP TABLE {staging} AS SELECT * FROM {table_name} LIMIT 0")
+    staged, rejected = import_tsv_to_duckdb(conn, gz_file, staging)
+
+    columns = [row[0] for row in conn.execute(f"DESCRIBE {table_name}").fetchall() if row[0] != key]
+    row_hash = lambda alias: "hash(" + ", ".join(f"{alias}.{c}" for c in columns) + ")"
+
+    current = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+    to_delete = conn.execute(f"""
+        SELECT COUNT(*) FROM {table_name} t
+        WHERE NOT EXISTS (SELECT 1 FROM {staging} s WHERE s.{key} = t.{key})
+    """).fetchone()[0]
+    if current and to_delete > current * MAX_REFRESH_DELETE_FRACTION:
+        conn.execute(f"DROP TABLE {staging}")
+        raise StageSkipped(f"Would delete {to_delete:,} of {current:,} rows - kept {table_name} as it was, "
+                           f"check the download")
+
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE delta_{table_name} AS
+        SELECT s.*, t.{key} IS NULL AS is_new
+        FROM {staging} s
+        LEFT JOIN {table_name} t ON s.{key} = t.{key}
+        WHERE t.{key} IS NULL OR {row_hash('s')} <> {row_hash('t')}
+    """)
+    inserted, updated = conn.execute(f"""
+        SELECT COUNT(*) FILTER (WHERE is_new), COUNT(*) FILTER (WHERE NOT is_new) FROM delta_{table_name}
+    """).fetchone()
+
+    # Apply atomically so readers never see a half-refreshed table
+    conn.execute("BEGIN TRANSACTION")
     conn.execute(f"""
-        COPY {table_name} FROM '{gz_file}' (
-            FORMAT CSV,
-            DELIMITER '\t',
-            HEADER true,
-            NULL '\\N',
-            QUOTE '',
-            ESCAPE ''
+        DELETE FROM {table_name} t
+        WHERE NOT EXISTS (SELECT 1 FROM {staging} s WHERE s.{key} = t.{key})
+    """)
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {table_name}
+        SELECT {key}, {", ".join(columns)} FROM delta_{table_name}
+    """)
+    conn.execute("COMMIT")
+
+    conn.execute(f"DROP TABLE {staging}")
+    conn.execute(f"DROP TABLE delta_{table_name}")
+
+    elapsed = time.perf_counter() - start
+    print(f"    {inserted:,} inserted, {updated:,} updated, {to_delete:,} deleted, "
+          f"{staged - inserted - updated:,} unchanged ({elapsed:.1f}s)")
+
+    return {"inserted": inserted, "updated": updated, "deleted": to_delete, "rejected": rejected}
+
+
+def create_lazy_tables_table(conn: duckdb.DuckDBPyConnection):
+    """State of the lazily loaded tables: view over Parquet, or materialized table"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS lazy_tables (
+            table_name VARCHAR PRIMARY KEY,
+            parquet_path VARCHAR,
+            status VARCHAR,
+            hits BIGINT,
+            registered_at TIMESTAMP,
+            materialized_at TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS lazy_usage_logs (
+            log_path VARCHAR PRIMARY KEY,
+            read_bytes BIGINT,
+            read_at TIMESTAMP
         )
     """)
 
-    # Get row count
-    count = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-    print(f"    Imported {count:,} rows")
 
-    return count
+def register_lazy_table(conn: duckdb.DuckDBPyConnection, gz_file: Path, schema: TableSchema):
+    """
+    Pipeline stage: convert a TSV to zstd Parquet and expose it as a view.
+    A table that was already materialized is reloaded from the new Parquet instead.
+    """
+    create_rejects_table(conn)
+    create_lazy_tables_table(conn)
+
+    parquet_file = gz_file.with_name(f"{schema.name}.parquet")
+    print(f"  [PARQUET] {gz_file.name} -> {parquet_file.name}...")
+    count = conn.execute(f"""
+        COPY (SELECT * FROM {read_tsv_sql(gz_file, schema.read_csv_columns())})
+        TO '{parquet_file.as_posix()}' (FORMAT parquet, COMPRESSION zstd)
+    """).fetchone()[0]
+    rejected = record_rejects(conn, gz_file)
+
+    row = conn.execute("SELECT status FROM lazy_tables WHERE table_name = ?", [schema.name]).fetchone()
+    status = row[0] if row else "view"
+    if status == "table":
+        conn.execute(f"CREATE OR REPLACE TABLE {schema.name} AS SELECT * FROM read_parquet('{parquet_file.as_posix()}')")
+    else:
+        conn.execute(f"CREATE OR REPLACE VIEW {schema.name} AS SELECT * FROM read_parquet('{parquet_file.as_posix()}')")
+
+    conn.execute("""
+        INSERT INTO lazy_tables VALUES (?, ?, ?, 0, now(), NULL)
+        ON CONFLICT (table_name) DO UPDATE SET parquet_path = excluded.parquet_path, registered_at = now()
+    """, [schema.name, parquet_file.as_posix(), status])
+
+    size_mb = parquet_file.stat().st_size / 1024 / 1024
+    print(f"    {count:,} rows, rejected {rejected:,}, {size_mb:.1f} MB Parquet, registered as {status}")
+    return {"inserted": count, "rejected": rejected, "status": status}
+
+
+def read_usage_log(usage_log: Path, offset: int = 0) -> tuple:
+    """
+    SQL text of the queries in an NDJSON usage log (lines with a "sql" field)
+    from byte offset on. Returns (queries, offset after the last complete line);
+    a line still being written is left for the next read.
+    """
+    if usage_log.stat().st_size < offset:
+        offset = 0  # log was rotated or truncated
+    with open(usage_log, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    complete = data[:data.rfind(b"\n") + 1]
+
+    queries = []
+    for line in complete.decode("utf-8").splitlines():
+        line = line.strip()
+        if line:
+            queries.append(json.loads(line).get("sql", ""))
+    return queries, offset + len(complete)
+
+
+def materialize_lazy_tables(conn: duckdb.DuckDBPyConnection, queries: list,
+                            threshold: int = LAZY_MATERIALIZE_THRESHOLD) -> list:
+    """
+    Add the queries referencing each lazy view to its hit count and load views
+    at or over the threshold into native tables. Returns the tables materialized.
+    """
+    create_lazy_tables_table(conn)
+    lazy = conn.execute("SELECT table_name, parquet_path, status, hits FROM lazy_tables ORDER BY table_name").fetchall()
+    if not lazy:
+        print("  [LAZY] No lazy tables registered (build with --lazy first)")
+        return []
+
+    materialized = []
+    for table, parquet_path, status, hits in lazy:
+        pattern = re.compile(rf"\b{table}\b", re.IGNORECASE)
+        hits += sum(1 for sql in queries if pattern.search(sql))
+        conn.execute("UPDATE lazy_tables SET hits = ? WHERE table_name = ?", [hits, table])
+
+        if status == "view" and hits >= threshold:
+            print(f"  [MATERIALIZE] {table} ({hits:,} queries >= {threshold:,})...")
+            conn.execute("BEGIN TRANSACTION")
+            conn.execute(f"DROP VIEW {table}")
+            conn.execute(f"CREATE TABLE {table} AS SELECT * FROM read_parquet('{parquet_path}')")
+            conn.execute("UPDATE lazy_tables SET status = 'table', materialized_at = now() WHERE table_name = ?", [table])
+            conn.execute("COMMIT")
+            materialized.append(table)
+            status = "table"
+
+        print(f"  [LAZY] {table}: {status}, {hits:,} queries")
+
+    return materialized
 
 
 def create_indexes(conn: duckdb.DuckDBPyConnection):
@@ -143,6 +426,89 @@ def create_indexes(conn: duckdb.DuckDBPyConnection):
     print("    Done")
 
 
+def create_titles_rated_table(conn: duckdb.DuckDBPyConnection):
+    """
+    Pre-joined title_basics + title_ratings, one row per (title, genre).
+    genre_index is the genre's position in the genres list (1 for titles without
+    genres), so genre_index = 1 gives one row per title. Ordered by
+    titleType, numVotes DESC so top-N and vote-threshold filters read a
+    contiguous prefix of each title type.
+    """
+    print("  [DENORMALIZE] Creating titles_rated...")
+
+    conn.execute("""
+        CREATE TABLE titles_rated AS
+        WITH rated AS (
+            SELECT
+                b.tconst,
+                b.titleType,
+                b.primaryTitle,
+                b.startYear,
+                b.runtimeMinutes,
+                b.isAdult,
+                b.genres,
+                r.averageRating,
+                r.numVotes,
+                COALESCE(string_split(b.genres, ','), ['']) AS genre_list
+            FROM title_basics b
+            JOIN title_ratings r ON b.tconst = r.tconst
+        )
+        SELECT
+            tconst, titleType, primaryTitle, startYear, runtimeMinutes, isAdult, genres,
+            NULLIF(genre_list[g.i], '') AS genre,
+            CAST(g.i AS INTEGER) AS genre_index,
+            averageRating, numVotes
+        FROM rated, range(1, len(genre_list) + 1) AS g(i)
+        ORDER BY titleType, numVotes DESC, tconst, genre_index
+    """)
+
+    print("    Done")
+
+
+def create_rating_leaderboard(conn: duckdb.DuckDBPyConnection, top_k: int = LEADERBOARD_K,
+                              vote_buckets: list = LEADERBOARD_VOTE_BUCKETS):
+    """
+    Sorted top-K lists by (averageRating DESC, numVotes DESC) for every
+    titleType, genre ('All' = any genre), vote threshold and decade (NULL for
+    titles without a start year). A year range made of whole decades is answered by merging its decade
+    lists: WHERE decade BETWEEN ... ORDER BY averageRating DESC, numVotes DESC
+    LIMIT n (exact for n <= top_k).
+    """
+    print("  [LEADERBOARD] Creating rating_leaderboard...")
+
+    buckets = ", ".join(str(v) for v in vote_buckets)
+    conn.execute(f"""
+        CREATE TABLE rating_leaderboard AS
+        WITH entries AS (
+            SELECT titleType, genre, tconst, primaryTitle, startYear, genres, runtimeMinutes,
+                   averageRating, numVotes
+            FROM titles_rated
+            WHERE genre IS NOT NULL
+            UNION ALL
+            SELECT titleType, 'All', tconst, primaryTitle, startYear, genres, runtimeMinutes,
+                   averageRating, numVotes
+            FROM titles_rated
+            WHERE genre_index = 1
+        )
+        SELECT
+            e.titleType,
+            e.genre,
+            CAST(b.min_votes AS INTEGER) AS min_votes,
+            CAST((e.startYear // 10) * 10 AS INTEGER) AS decade,
+            CAST(ROW_NUMBER() OVER (
+                PARTITION BY e.titleType, e.genre, b.min_votes, e.startYear // 10
+                ORDER BY e.averageRating DESC, e.numVotes DESC, e.tconst
+            ) AS INTEGER) AS rank,
+            e.tconst, e.primaryTitle, e.startYear, e.averageRating, e.numVotes, e.genres, e.runtimeMinutes
+        FROM entries e
+        JOIN unnest([{buckets}]) AS b(min_votes) ON e.numVotes >= b.min_votes
+        QUALIFY rank <= {top_k}
+        ORDER BY titleType, genre, min_votes, decade NULLS FIRST, rank
+    """)
+
+    print("    Done")
+
+
 def run_eda(conn: duckdb.DuckDBPyConnection, output_file: Path):
     """Run basic EDA and save results"""
     print("  [EDA] Running exploratory data analysis...")
@@ -216,11 +582,10 @@ def run_eda(conn: duckdb.DuckDBPyConnection, output_file: Path):
     results.append("## Top 10 Highest Rated Movies (100k+ votes)")
     results.append("-" * 40)
     rows = conn.execute("""
-        SELECT b.primaryTitle, b.startYear, r.averageRating, r.numVotes
-        FROM title_basics b
-        JOIN title_ratings r ON b.tconst = r.tconst
-        WHERE b.titleType = 'movie' AND r.numVotes >= 100000
-        ORDER BY r.averageRating DESC
+        SELECT primaryTitle, startYear, averageRating, numVotes
+        FROM titles_rated
+        WHERE titleType = 'movie' AND numVotes >= 100000 AND genre_index = 1
+        ORDER BY averageRating DESC
         LIMIT 10
     """).fetchall()
     for i, row in enumerate(rows, 1):
@@ -231,10 +596,10 @@ def run_eda(conn: duckdb.DuckDBPyConnection, output_file: Path):
     results.append("## Top 10 Most Voted Titles")
     results.append("-" * 40)
     rows = conn.execute("""
-        SELECT b.primaryTitle, b.titleType, b.startYear, r.numVotes, r.averageRating
-        FROM title_basics b
-        JOIN title_ratings r ON b.tconst = r.tconst
-        ORDER BY r.numVotes DESC
+        SELECT primaryTitle, titleType, startYear, numVotes, averageRating
+        FROM titles_rated
+        WHERE genre_index = 1
+        ORDER BY numVotes DESC
         LIMIT 10
     """).fetchall()
     for i, row in enumerate(rows, 1):
@@ -303,44 +668,71 @@ def run_eda(conn: duckdb.DuckDBPyConnection, output_file: Path):
     return output_text
 
 
-def main():
+def build_pipeline(files: dict, db_path: Path, refresh: bool = False, force: bool = False) -> Pipeline:
+    """Declare the IMDb build: one import stage per file, indexes, titles_rated and leaderboards, then any lazy views"""
+    stages = []
+    for filename, table in FILE_TO_TABLE.items():
+        if filename not in files:
+            continue
+        stages.append(Stage(
+            f"import:{table}",
+            functools.partial(import_table, gz_file=files[filename], schema=TABLE_SCHEMAS[table], refresh=refresh),
+            inputs=[files[filename]],
+            outputs=[table],
+            helpers=[import_tsv_to_duckdb, read_tsv_sql, record_rejects, refresh_table],
+            ignore=["refresh"],
+            replace=not refresh,
+        ))
+    imports = [stage.name for stage in stages]
+    stages.append(Stage("indexes", create_indexes, deps=imports))
+    if "import:title_basics" in imports and "import:title_ratings" in imports:
+        stages.append(Stage("titles_rated", create_titles_rated_table,
+                            deps=["import:title_basics", "import:title_ratings"],
+                            outputs=["titles_rated"]))
+        stages.append(Stage("leaderboard", create_rating_leaderboard,
+                            deps=["titles_rated"],
+                            outputs=["rating_leaderboard"],
+                            params={"top_k": LEADERBOARD_K, "vote_buckets": LEADERBOARD_VOTE_BUCKETS}))
+
+    for filename, table in LAZY_FILE_TO_TABLE.items():
+        if filename not in files:
+            continue
+        stages.append(Stage(
+            f"lazy:{table}",
+            functools.partial(register_lazy_table, gz_file=files[filename], schema=LAZY_SCHEMAS[table]),
+            inputs=[files[filename]],
+            views=[table],
+            files=[files[filename].with_name(f"{table}.parquet")],
+            helpers=[read_tsv_sql, record_rejects],
+        ))
+
+    return Pipeline("imdb", db_path, stages, force=force, hot_columns=HOT_COLUMNS)
+
+
+def main(refresh: bool = False, force: bool = False, lazy: bool = False):
     """Main execution"""
     print("=" * 60)
     print("IMDb Data Download and Import")
     print("=" * 60)
 
-    # Ensure data directory exists
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    db_path = DATA_DIR / "imdb.duckdb"
 
-    # Step 1: Download MVP files
-    print("\n[1/4] Downloading files...")
-    for filename in MVP_FILES:
-        download_file(filename)
+    if refresh and not db_path.exists():
+        print(f"\n  [WARN] {db_path.name} not found, doing a full build instead of a refresh")
+        refresh = False
 
-    # Step 2: Create DuckDB
-    print("\n[2/4] Creating DuckDB database...")
-    db_path = DATA_DIR / "imdb.duckdb"
-    if db_path.exists():
-        db_path.unlink()  # Remove existing
-    conn = create_duckdb_tables(db_path)
-
-    # Step 3: Import data
-    print("\n[3/4] Importing data...")
-    file_to_table = {
-        "title.basics.tsv.gz": "title_basics",
-        "title.ratings.tsv.gz": "title_ratings",
-        "name.basics.tsv.gz": "name_basics",
-    }
-    for filename, table in file_to_table.items():
-        gz_path = DATA_DIR / filename
-        if gz_path.exists():
-            import_tsv_to_duckdb(conn, gz_path, table)
-
-    # Create indexes
-    create_indexes(conn)
-
-    # Step 4: Run EDA
-    print("\n[4/4] Running EDA...")
+    # Step 1: Download MVP files (refresh always fetches the latest snapshot)
+    print("\n[1/3] Downloading files...")
+    download = MVP_FILES + (list(LAZY_FILE_TO_TABLE) if lazy else [])
+    files = HttpSource(BASE_URL, DATA_DIR, download).fetch(force=refresh)
+
+    # Step 2: Import (unchanged files are skipped by the stage cache)
+    print(f"\n[2/3] {'Refreshing' if refresh else 'Importing'} data...")
+    pipeline = build_pipeline(files, db_path, refresh=refresh, force=force)
+    conn = pipeline.run()
+
+    # Step 3: Run EDA
+    print("\n[3/3] Running EDA...")
     eda_output = DATA_DIR.parent / "eda_results.txt"
     run_eda(conn, eda_output)
 
@@ -352,9 +744,81 @@ def main():
     print(f"Database: {db_path}")
     print(f"Size: {db_size:.1f} MB")
     print(f"EDA: {eda_output}")
+    for filename, table in FILE_TO_TABLE.items():
+        result = pipeline.results.get(f"import:{table}")
+        if result is None:
+            continue
+        stats = result["result"]
+        if result["status"] == "cached":
+            print(f"{filename}: unchanged")
+        elif result["status"] == "skipped":
+            print(f"{filename}: skipped, table not refreshed")
+        elif "updated" in stats:
+            print(f"{filename}: {stats['inserted']:,} inserted, {stats['updated']:,} updated, "
+                  f"{stats['deleted']:,} deleted, {stats['rejected']:,} rejected")
+        else:
+            print(f"{filename}: {stats['inserted']:,} rows, {stats['rejected']:,} rejected")
+    for filename, table in LAZY_FILE_TO_TABLE.items():
+        result = pipeline.results.get(f"lazy:{table}")
+        if result is None:
+            continue
+        stats = result["result"]
+        if result["status"] == "cached":
+            print(f"{filename}: unchanged (lazy)")
+        else:
+            print(f"{filename}: {stats['inserted']:,} rows, {stats['rejected']:,} rejected ({stats['status']})")
 
     conn.close()
 
 
+def materialize(usage_log: Path, threshold: int = LAZY_MATERIALIZE_THRESHOLD):
+    """Count lazy view usage from a query log and materialize the busy ones"""
+    db_path = DATA_DIR / "imdb.duckdb"
+    print(f"[LAZY] Usage log: {usage_log}")
+    log_key = usage_log.resolve().as_posix()
+
+    conn = duckdb.connect(str(db_path))
+    create_lazy_tables_table(conn)
+    row = conn.execute("SELECT read_bytes FROM lazy_usage_logs WHERE log_path = ?", [log_key]).fetchone()
+    offset = row[0] if row else 0
+    queries, read_bytes = read_usage_log(usage_log, offset)
+    print(f"  {len(queries):,} new queries (from byte {offset:,})")
+
+    materialized = materialize_lazy_tables(conn, queries, threshold)
+    conn.execute("""
+        INSERT INTO lazy_usage_logs VALUES (?, ?, now())
+        ON CONFLICT (log_path) DO UPDATE SET read_bytes = excluded.read_bytes, read_at = now()
+    """, [log_key, read_bytes])
+    conn.execute("CHECKPOINT")
+
+    # Views became tables: refresh the manifest, keeping the build version
+    manifest = load_manifest(db_path)
+    if materialized and manifest:
+        write_manifest(conn, db_path, manifest["pipeline"], manifest["build_version"], manifest["hot_columns"])
+    conn.close()
+
+    print(f"Materialized: {', '.join(materialized) or 'none'}")
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Download IMDb datasets and import into DuckDB")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Apply only changed rows to the existing imdb.duckdb instead of rebuilding")
+    parser.add_argument("--force", action="store_true", help="Rebuild every stage, ignoring the stage cache")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="Directory for the TSV files and imdb.duckdb")
+    parser.add_argument("--lazy", action="store_true",
+                        help="Also register title.akas / title.principals as views over Parquet")
+    parser.add_argument("--materialize-lazy", action="store_true",
+                        help="Update lazy view usage from --usage-log and materialize busy views, then exit")
+    parser.add_argument("--usage-log", type=Path, help="NDJSON query log used by --materialize-lazy")
+    parser.add_argument("--threshold", type=int, default=LAZY_MATERIALIZE_THRESHOLD,
+                        help="Queries before a lazy view is materialized")
+    args = parser.parse_args()
+
+    DATA_DIR = args.data_dir
+    if args.materialize_lazy:
+        if not args.usage_log:
+            parser.error("--materialize-lazy needs --usage-log")
+        materialize(args.usage_log, args.threshold)
+    else:
+        main(refresh=args.refresh, force=args.force, lazy=args.lazy)
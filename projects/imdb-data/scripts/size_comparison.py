@@ -1,106 +1,72 @@
 """
 Compare DuckDB sizes with and without indexes
+
+Only the imported base tables (title_basics, title_ratings, name_basics) are
+compared: each is copied from imdb.duckdb into two scratch databases, one
+with the primary keys and create_indexes() indexes and one without. The
+other tables in imdb.duckdb (titles_rated, rating_leaderboard,
+import_rejects, stage and lazy-table metadata) would otherwise count as
+index overhead.
+
+For a per-table / per-column breakdown of any database (codecs, row groups,
+layout trials) use projects/scripts/analyze_storage.py.
 """
 
 import duckdb
 import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from build_profiles import apply_profile
+from download_and_import import TABLE_SCHEMAS, FILE_TO_TABLE, create_indexes
+
 DATA_DIR = Path(__file__).parent.parent / "data"
 os.chdir(DATA_DIR)
 
-# Create a new database without indexes
-print("Creating database without indexes...")
-db_path = "imdb_no_index.duckdb"
-
-# Remove if exists
-if os.path.exists(db_path):
-    os.remove(db_path)
-
-conn = duckdb.connect(db_path)
-
-# Create tables WITHOUT primary keys (no implicit indexes)
-conn.execute("""
-    CREATE TABLE title_basics (
-        tconst VARCHAR,
-        titleType VARCHAR,
-        primaryTitle VARCHAR,
-        originalTitle VARCHAR,
-        isAdult BOOLEAN,
-        startYear INTEGER,
-        endYear INTEGER,
-        runtimeMinutes INTEGER,
-        genres VARCHAR
-    )
-""")
-
-conn.execute("""
-    CREATE TABLE title_ratings (
-        tconst VARCHAR,
-        averageRating DECIMAL(3,1),
-        numVotes INTEGER
-    )
-""")
 
-conn.execute("""
-    CREATE TABLE name_basics (
-        nconst VARCHAR,
-        primaryName VARCHAR,
-        birthYear INTEGER,
-        deathYear INTEGER,
-        primaryProfession VARCHAR,
-        knownForTitles VARCHAR
-    )
-""")
+def copy_base_tables(db_path: str, indexes: bool) -> float:
+    """Copy the base tables of imdb.duckdb into a new database; returns its size in MB"""
+    if os.path.exists(db_path):
+        os.remove(db_path)
 
-# Import data using raw strings for the \N
-print("Importing title_basics...")
-conn.execute(r"""
-    COPY title_basics FROM 'title.basics.tsv.gz' (
-        FORMAT CSV, DELIMITER '\t', HEADER true, NULL '\N', QUOTE '', ESCAPE ''
-    )
-""")
-count1 = conn.execute("SELECT COUNT(*) FROM title_basics").fetchone()[0]
-print(f"  {count1:,} rows")
+    conn = duckdb.connect(db_path)
+    apply_profile(conn, DATA_DIR / db_path)
+    conn.execute("ATTACH 'imdb.duckdb' AS src (READ_ONLY)")
+    for table in FILE_TO_TABLE.values():
+        print(f"  {table}...")
+        conn.execute(TABLE_SCHEMAS[table].create_sql(primary_key=indexes))
+        conn.execute(f"INSERT INTO {table} SELECT * FROM src.{table}")
+    if indexes:
+        create_indexes(conn)
+    conn.execute("DETACH src")
 
-print("Importing title_ratings...")
-conn.execute(r"""
-    COPY title_ratings FROM 'title.ratings.tsv.gz' (
-        FORMAT CSV, DELIMITER '\t', HEADER true, NULL '\N', QUOTE '', ESCAPE ''
-    )
-""")
-count2 = conn.execute("SELECT COUNT(*) FROM title_ratings").fetchone()[0]
-print(f"  {count2:,} rows")
+    # Checkpoint to flush to disk
+    conn.execute("CHECKPOINT")
+    conn.close()
+    return os.path.getsize(db_path) / 1024 / 1024
 
-print("Importing name_basics...")
-conn.execute(r"""
-    COPY name_basics FROM 'name.basics.tsv.gz' (
-        FORMAT CSV, DELIMITER '\t', HEADER true, NULL '\N', QUOTE '', ESCAPE ''
-    )
-""")
-count3 = conn.execute("SELECT COUNT(*) FROM name_basics").fetchone()[0]
-print(f"  {count3:,} rows")
 
-# Checkpoint to flush to disk
-conn.execute("CHECKPOINT")
-conn.close()
-
-# Get sizes
-no_index_size = os.path.getsize(db_path) / 1024 / 1024
-with_index_size = os.path.getsize("imdb.duckdb") / 1024 / 1024
+print("Copying base tables with indexes + PKs...")
+with_index_size = copy_base_tables("imdb_with_index.duckdb", indexes=True)
+print("Copying base tables without indexes...")
+no_index_size = copy_base_tables("imdb_no_index.duckdb", indexes=False)
+full_size = os.path.getsize("imdb.duckdb") / 1024 / 1024
 
 print()
 print("=" * 50)
-print("Size Comparison")
+print("Size Comparison (base tables)")
 print("=" * 50)
 print(f"With indexes + PKs:    {with_index_size:,.1f} MB")
 print(f"Without indexes:       {no_index_size:,.1f} MB")
 print(f"Index overhead:        {with_index_size - no_index_size:,.1f} MB ({(with_index_size - no_index_size) / with_index_size * 100:.1f}%)")
 print()
-print(f"Raw TSV (uncompressed): 1,917.0 MB")
-print(f"Gzipped TSV:              496.5 MB")
+print(f"imdb.duckdb (all):     {full_size:,.1f} MB")
+gz_size = sum(os.path.getsize(f) for f in FILE_TO_TABLE) / 1024 / 1024
+print(f"Gzipped TSV:           {gz_size:,.1f} MB")
 
 # Cleanup
 print()
-print(f"Removing test database: {db_path}")
-os.remove(db_path)
+for db_path in ["imdb_with_index.duckdb", "imdb_no_index.duckdb"]:
+    print(f"Removing test database: {db_path}")
+    os.remove(db_path)
@@ -0,0 +1,353 @@
+"""
+DuckDB Storage Analyzer
+=======================
+Reports how a built .duckdb file spends its bytes, using pragma_storage_info:
+- per table: rows, row groups, data size, indexes
+- per column: estimated size and the compression codecs DuckDB chose
+- index + metadata overhead (used blocks not accounted for by column data)
+
+With --trial it rebuilds one table under alternative layouts (sort orders,
+narrowed integer types, ENUMs, Parquet codecs), each in its own scratch
+database, and recommends the smallest and the fastest to scan. A DuckDB
+layout's size is the used blocks after a CHECKPOINT, so tables that fit in
+fewer than MIN_TRIAL_BLOCKS blocks are reported as inconclusive (the
+layouts round to the same block count) and only the Parquet sizes compete.
+
+Usage:
+    python analyze_storage.py ../imdb-data/data/imdb.duckdb
+    python analyze_storage.py ../cricsheet-data/cricket.duckdb --trial ball_by_ball
+
+Sizes are estimates: a segment's size is the gap to the next segment in the
+same block. A segment alone in its block is charged the whole block (DuckDB
+only gives a segment its own block when it nearly fills it). The last
+segment of a shared block has no end offset: it is sized from the bytes per
+value of the same column's other segments, and when there are none it is
+left out and its block tail reported as unattributed, the column marked *.
+"""
+
+import argparse
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import duckdb
+
+# VARCHAR columns with at most this many distinct values are trialled as ENUM
+ENUM_MAX_VALUES = 1000
+
+# Candidate sort keys are the lowest-cardinality columns
+SORT_CANDIDATES = 2
+
+PARQUET_CODECS = ["snappy", "zstd", "gzip"]
+
+# DuckDB layout trials need at least this many blocks to tell layouts apart
+MIN_TRIAL_BLOCKS = 8
+
+INTEGER_TYPES = [
+    ("TINYINT", -2**7, 2**7 - 1),
+    ("SMALLINT", -2**15, 2**15 - 1),
+    ("INTEGER", -2**31, 2**31 - 1),
+]
+
+
+def fmt_mb(num_bytes: int) -> str:
+    return f"{num_bytes / 1024 / 1024:,.1f} MB"
+
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def list_tables(conn: duckdb.DuckDBPyConnection, database: str) -> list:
+    rows = conn.execute("""
+        SELECT schema_name, table_name FROM duckdb_tables()
+        WHERE database_name = ? AND NOT internal
+        ORDER BY schema_name, table_name
+    """, [database]).fetchall()
+    return [(schema, table) for schema, table in rows]
+
+
+def collect_segments(conn: duckdb.DuckDBPyConnection, database: str) -> list:
+    """
+    Return one dict per stored segment across all tables of a database,
+    with an estimated on-disk size in bytes ("bytes") and, for a segment whose
+    size could not be estimated, the unattributed block tail after it ("tail").
+    """
+    block_size = conn.execute(
+        "SELECT block_size FROM pragma_database_size() WHERE database_name = ?", [database]
+    ).fetchone()[0]
+
+    segments = []
+    for schema, table in list_tables(conn, database):
+        qualified = f"{database}.{schema}.{table}"
+        rows = conn.execute(f"""
+            SELECT row_group_id, column_name, segment_type, compression, count,
+                   block_id, block_offset, len(additional_block_ids)
+            FROM pragma_storage_info('{qualified}')
+        """).fetchall()
+        for row_group, column, segment_type, compression, count, block_id, offset, extra_blocks in rows:
+            segments.append({
+                "table": table if schema == "main" else f"{schema}.{table}",
+                "row_group": row_group,
+                "column": column,
+                "segment_type": segment_type,
+                "compression": compression,
+                "count": count,
+                "block_id": block_id,
+                "offset": offset,
+                "bytes": (extra_blocks or 0) * block_size,
+                "tail": 0,
+            })
+
+    # Segments share blocks (across tables too): size = gap to next segment in the block
+    by_block = defaultdict(list)
+    for seg in segments:
+        if seg["block_id"] >= 0:
+            by_block[seg["block_id"]].append(seg)
+    last_in_shared = []
+    for block_segments in by_block.values():
+        block_segments.sort(key=lambda s: s["offset"])
+        if len(block_segments) == 1:
+            block_segments[0]["bytes"] += block_size - block_segments[0]["offset"]
+            continue
+        for seg, nxt in zip(block_segments, block_segments[1:]):
+            seg["bytes"] += nxt["offset"] - seg["offset"]
+        last_in_shared.append(block_segments[-1])
+
+    # The last segment of a shared block ends somewhere before the block end
+    measured = defaultdict(lambda: [0, 0])
+    for seg in segments:
+        if seg["block_id"] >= 0 and seg not in last_in_shared and seg["count"]:
+            key = (seg["table"], seg["column"], seg["segment_type"], seg["compression"])
+            measured[key][0] += seg["bytes"]
+            measured[key][1] += seg["count"]
+    for seg in last_in_shared:
+        tail = block_size - seg["offset"]
+        total, count = measured.get((seg["table"], seg["column"], seg["segment_type"], seg["compression"]), (0, 0))
+        if count:
+            seg["bytes"] += min(round(total / count * seg["count"]), tail)
+        else:
+            seg["tail"] = tail
+
+    return segments
+
+
+def used_bytes(conn: duckdb.DuckDBPyConnection, database: str) -> int:
+    block_size, total, free = conn.execute("""
+        SELECT block_size, total_blocks, free_blocks FROM pragma_database_size()
+        WHERE database_name = ?
+    """, [database]).fetchone()
+    return (total - free) * block_size
+
+
+def print_report(conn: duckdb.DuckDBPyConnection, database: str):
+    """Print per-table and per-column storage for one attached database."""
+    segments = collect_segments(conn, database)
+
+    tables = defaultdict(lambda: {"bytes": 0, "row_groups": set()})
+    columns = defaultdict(lambda: {"bytes": 0, "codecs": defaultdict(int), "unsized": False})
+    for seg in segments:
+        tables[seg["table"]]["bytes"] += seg["bytes"]
+        tables[seg["table"]]["row_groups"].add(seg["row_group"])
+        col = columns[(seg["table"], seg["column"])]
+        col["bytes"] += seg["bytes"]
+        col["unsized"] |= seg["tail"] > 0
+        if seg["segment_type"] != "VALIDITY":
+            col["codecs"][seg["compression"]] += 1
+
+    data_total = sum(t["bytes"] for t in tables.values())
+    unattributed = sum(seg["tail"] for seg in segments)
+    used = used_bytes(conn, database)
+
+    print("=" * 70)
+    print(f"Storage Report: {database}")
+    print("=" * 70)
+    print(f"Used blocks:              {fmt_mb(used)}")
+    print(f"Column data:              {fmt_mb(data_total)}")
+    print(f"Unattributed block tails: {fmt_mb(unattributed)}  (last segments of shared blocks, columns marked *)")
+    print(f"Index + metadata overhead: {fmt_mb(max(used - data_total - unattributed, 0))}")
+
+    indexes = conn.execute("""
+        SELECT table_name, index_name, is_primary, expressions FROM duckdb_indexes()
+        WHERE database_name = ?
+        ORDER BY table_name, index_name
+    """, [database]).fetchall()
+    pk_tables = conn.execute("""
+        SELECT table_name FROM duckdb_tables()
+        WHERE database_name = ? AND has_primary_key
+    """, [database]).fetchall()
+
+    for table, info in sorted(tables.items(), key=lambda kv: -kv[1]["bytes"]):
+        schema, name = table.split(".", 1) if "." in table else ("main", table)
+        rows = conn.execute(
+            f"SELECT COUNT(*) FROM {database}.{quote_ident(schema)}.{quote_ident(name)}"
+        ).fetchone()[0]
+        print()
+        print(f"## {table}: {rows:,} rows, {len(info['row_groups'])} row groups, {fmt_mb(info['bytes'])}")
+        print("-" * 70)
+        print(f"  {'column':<24} {'size':>13} {'share':>7}  codecs")
+        table_cols = [(c, v) for (t, c), v in columns.items() if t == table]
+        for column, col in sorted(table_cols, key=lambda kv: -kv[1]["bytes"]):
+            share = col["bytes"] / info["bytes"] * 100 if info["bytes"] else 0
+            codecs = ", ".join(f"{codec}({n})" for codec, n in sorted(col["codecs"].items()))
+            size = fmt_mb(col["bytes"]) + ("*" if col["unsized"] else " ")
+            print(f"  {column:<24} {size:>13} {share:6.1f}%  {codecs}")
+
+        table_indexes = [i for i in indexes if i[0] == name]
+        if (name,) in pk_tables:
+            print("  index: PRIMARY KEY")
+        for _, index_name, _, expressions in table_indexes:
+            print(f"  index: {index_name} {expressions}")
+
+
+def describe(conn: duckdb.DuckDBPyConnection, source: str) -> list:
+    return [(row[0], row[1]) for row in conn.execute(f"DESCRIBE {source}").fetchall()]
+
+
+def narrowed_select(conn: duckdb.DuckDBPyConnection, source: str) -> str:
+    """SELECT list that shrinks integers to the smallest fitting type and low-cardinality strings to ENUM."""
+    exprs = []
+    for name, col_type in describe(conn, source):
+        ident = quote_ident(name)
+        expr = ident
+        if col_type in ("BIGINT", "INTEGER", "SMALLINT", "HUGEINT"):
+            lo, hi = conn.execute(f"SELECT MIN({ident}), MAX({ident}) FROM {source}").fetchone()
+            if lo is not None:
+                for int_type, type_lo, type_hi in INTEGER_TYPES:
+                    if type_lo <= lo and hi <= type_hi:
+                        if int_type != col_type:
+                            expr = f"CAST({ident} AS {int_type})"
+                        break
+        elif col_type == "VARCHAR":
+            distinct = conn.execute(f"SELECT approx_count_distinct({ident}) FROM {source}").fetchone()[0]
+            if distinct <= ENUM_MAX_VALUES:
+                values = [v[0] for v in conn.execute(
+                    f"SELECT DISTINCT {ident} FROM {source} WHERE {ident} IS NOT NULL ORDER BY 1"
+                ).fetchall()]
+                if values and len(values) <= ENUM_MAX_VALUES:
+                    literals = ", ".join("'" + v.replace("'", "''") + "'" for v in values)
+                    expr = f"CAST({ident} AS ENUM({literals}))"
+        exprs.append(f"{expr} AS {ident}")
+    return ", ".join(exprs)
+
+
+def sort_candidates(conn: duckdb.DuckDBPyConnection, source: str) -> list:
+    """Lowest-cardinality (but not constant) columns, best first."""
+    columns = describe(conn, source)
+    counts = conn.execute(
+        "SELECT " + ", ".join(f"approx_count_distinct({quote_ident(c)})" for c, _ in columns) + f" FROM {source}"
+    ).fetchone()
+    ranked = sorted((n, c) for (c, _), n in zip(columns, counts) if n > 1)
+    return [c for _, c in ranked[:SORT_CANDIDATES]]
+
+
+def time_scan(conn: duckdb.DuckDBPyConnection, source: str, runs: int = 2) -> float:
+    """Best-of-N time for a scan that decompresses every column."""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        conn.execute(f"SELECT MAX(COLUMNS(*)) FROM {source}").fetchall()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def trial_layouts(conn: duckdb.DuckDBPyConnection, database: str, table: str) -> list:
+    """
+    Rebuild `table` under alternative layouts and measure size and full-scan
+    time of each. DuckDB layouts each get a scratch database and are sized by
+    its used blocks after a CHECKPOINT; Parquet codecs by the written file.
+    Returns [(variant, bytes, seconds, blocks)], blocks None for Parquet.
+    """
+    source = f"{database}.main.{quote_ident(table)}"
+    results = []
+
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        scratch = Path(scratch_dir)
+        narrowed = narrowed_select(conn, source)
+        keys = sort_candidates(conn, source)
+
+        variants = {"baseline": f"SELECT * FROM {source}"}
+        for key in keys:
+            variants[f"sorted({key})"] = f"SELECT * FROM {source} ORDER BY {quote_ident(key)}"
+        if len(keys) > 1:
+            order = ", ".join(quote_ident(k) for k in keys)
+            variants[f"sorted({', '.join(keys)})"] = f"SELECT * FROM {source} ORDER BY {order}"
+        variants["narrow types + enum"] = f"SELECT {narrowed} FROM {source}"
+        if keys:
+            order = ", ".join(quote_ident(k) for k in keys)
+            variants[f"narrow types + enum, sorted({', '.join(keys)})"] = (
+                f"SELECT {narrowed} FROM {source} ORDER BY {order}"
+            )
+
+        for i, (variant, sql) in enumerate(variants.items()):
+            print(f"  [TRIAL] {variant}...")
+            conn.execute(f"ATTACH '{(scratch / f'trial{i}.duckdb').as_posix()}' AS trial (READ_WRITE)")
+            try:
+                conn.execute(f"CREATE TABLE trial.main.t AS {sql}")
+                conn.execute("CHECKPOINT trial")
+                block_size = conn.execute(
+                    "SELECT block_size FROM pragma_database_size() WHERE database_name = 'trial'"
+                ).fetchone()[0]
+                size = used_bytes(conn, "trial")
+                results.append((variant, size, time_scan(conn, "trial.main.t"), size // block_size))
+            finally:
+                conn.execute("DETACH trial")
+
+        for codec in PARQUET_CODECS:
+            variant = f"parquet ({codec})"
+            print(f"  [TRIAL] {variant}...")
+            path = (scratch / f"{table}_{codec}.parquet").as_posix()
+            conn.execute(f"COPY (SELECT * FROM {source}) TO '{path}' (FORMAT parquet, COMPRESSION {codec})")
+            results.append((variant, Path(path).stat().st_size, time_scan(conn, f"read_parquet('{path}')"), None))
+
+    return results
+
+
+def print_trials(table: str, results: list):
+    baseline = results[0][1]
+    width = max(len(r[0]) for r in results)
+    max_blocks = max(r[3] for r in results if r[3] is not None)
+    conclusive = max_blocks >= MIN_TRIAL_BLOCKS
+
+    print()
+    print("=" * 70)
+    print(f"Layout Trials: {table}")
+    print("=" * 70)
+    print(f"  {'variant':<{width}} {'size':>12} {'vs base':>8} {'scan':>9}")
+    for variant, size, seconds, _ in results:
+        ratio = size / baseline * 100 if baseline else 0
+        print(f"  {variant:<{width}} {fmt_mb(size):>12} {ratio:7.1f}% {seconds * 1000:7.1f}ms")
+
+    candidates = results
+    print()
+    if not conclusive:
+        print(f"DuckDB layouts: inconclusive, the table fits in {max_blocks} blocks "
+              f"(< {MIN_TRIAL_BLOCKS}), too few to compare layouts at block granularity")
+        candidates = [r for r in results if r[3] is None]
+    smallest = min(candidates, key=lambda r: r[1])
+    fastest = min(results, key=lambda r: r[2])
+    print(f"Smallest: {smallest[0]} ({fmt_mb(smallest[1])})")
+    print(f"Fastest scan: {fastest[0]} ({fastest[2] * 1000:.1f}ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report storage and compression of a DuckDB file")
+    parser.add_argument("database", type=Path, help="Path to a .duckdb file")
+    parser.add_argument("--trial", metavar="TABLE", action="append", default=[],
+                        help="Trial alternative layouts for TABLE (repeatable)")
+    args = parser.parse_args()
+
+    conn = duckdb.connect(str(args.database), read_only=True)
+    database = conn.execute("SELECT current_database()").fetchone()[0]
+
+    print_report(conn, database)
+    for table in args.trial:
+        print_trials(table, trial_layouts(conn, database, table))
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
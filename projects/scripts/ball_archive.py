@@ -0,0 +1,367 @@
+"""
+Ball-by-Ball Archive
+====================
+Columnar, memory-mappable copy of ball_by_ball for analyses that replay
+every delivery of every match in order (win probability, partnership
+reconstruction). Fetching those rows through SQL builds a Python tuple per
+delivery; the archive is read as NumPy arrays straight from the page cache.
+
+Layout of cricket.balls/ (written next to cricket.duckdb by the "archive"
+stage of process_cricsheet.py):
+- one .npy file per column, fixed width, deliveries in bowling order
+  (match_id, innings, ball_by_ball.delivery_seq): runs_off_bat, extras, wides, noballs, byes, legbyes,
+  penalty (int8), over (int16), delivery (int8, position within the over),
+  legal (0 for wides and no-balls), wicket (dismissals excluding retired
+  not out), bowler_wicket (credited to the bowler), striker, non_striker,
+  bowler (int32 codes into players)
+- per innings: innings_offsets (int64, n_innings + 1) into the deliveries,
+  innings_number (int8), batting_team, bowling_team (int16 codes into teams)
+- per match: match_offsets (int64, n_matches + 1) into the innings,
+  match_id (int64, ascending), start_date (datetime64[D]), match_type
+  (int8 codes into match_types), venue (int32 codes into venues)
+- archive.json: format version, source database, write time, counts,
+  column dtypes and the dictionaries (players, teams, venues, match_types)
+
+Compactness comes from narrow fixed-width types and dictionary codes (about
+30 bytes per delivery). The arrays are stored uncompressed so np.load can
+memory-map them; a codec would force a full decode on every open.
+
+BallArchive opens every array with mmap_mode="r". Matches and innings are
+slices of those memmaps, so iterating the whole history copies nothing:
+
+    archive = BallArchive("cricket.balls")
+    for match in archive.matches("ODI"):
+        for innings in match.innings():
+            score = innings["runs_off_bat"].sum() + innings["extras"].sum()
+
+Usage:
+    python ball_archive.py write cricket.duckdb        # -> cricket.balls/ (outside the pipeline)
+    python ball_archive.py info cricket.balls
+    python ball_archive.py bench cricket.duckdb        # full replay: archive vs SQL fetch
+"""
+
+import json
+import time
+import shutil
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Iterator, Optional
+
+import duckdb
+import numpy as np
+
+ARCHIVE_SUFFIX = ".balls"
+ARCHIVE_FORMAT = 2
+
+# Delivery columns: (name, dtype, SQL expression over ball_by_ball b). The DOUBLE
+# ball can't tell the 10th delivery of an over (0.10) from the 1st, so order
+# and position within the over come from the integer delivery_seq.
+DELIVERY_COLUMNS = [
+    ("runs_off_bat", "int8", "COALESCE(b.runs_off_bat, 0)"),
+    ("extras", "int8", "COALESCE(b.extras, 0)"),
+    ("wides", "int8", "COALESCE(b.wides, 0)"),
+    ("noballs", "int8", "COALESCE(b.noballs, 0)"),
+    ("byes", "int8", "COALESCE(TRY_CAST(b.byes AS INTEGER), 0)"),
+    ("legbyes", "int8", "COALESCE(TRY_CAST(b.legbyes AS INTEGER), 0)"),
+    ("penalty", "int8", "COALESCE(TRY_CAST(b.penalty AS INTEGER), 0)"),
+    ("over", "int16", "CAST(FLOOR(b.ball) AS INTEGER)"),
+    ("delivery", "int8", "ROW_NUMBER() OVER (PARTITION BY b.match_id, b.innings, FLOOR(b.ball) ORDER BY b.delivery_seq)"),
+    ("legal", "int8", "CASE WHEN COALESCE(b.wides, 0) = 0 AND COALESCE(b.noballs, 0) = 0 THEN 1 ELSE 0 END"),
+    ("wicket", "int8", """(CASE WHEN b.player_dismissed IS NOT NULL AND b.wicket_type NOT IN ({not_out}) THEN 1 ELSE 0 END)
+                        + (CASE WHEN b.other_player_dismissed IS NOT NULL
+                                 AND COALESCE(b.other_wicket_type, '') NOT IN ({not_out}) THEN 1 ELSE 0 END)"""),
+    ("bowler_wicket", "int8", """CASE WHEN b.wicket_type IS NOT NULL AND b.wicket_type NOT IN ({non_bowler})
+                                THEN 1 ELSE 0 END"""),
+    ("striker", "int32", "s.code"),
+    ("non_striker", "int32", "ns.code"),
+    ("bowler", "int32", "bw.code"),
+]
+
+INNINGS_COLUMNS = {"innings_number": "int8", "batting_team": "int16", "bowling_team": "int16"}
+MATCH_COLUMNS = {"match_id": "int64", "start_date": "datetime64[D]", "match_type": "int8", "venue": "int32"}
+
+
+def archive_path(db_path: Path) -> Path:
+    """cricket.duckdb -> cricket.balls"""
+    return Path(db_path).with_suffix(ARCHIVE_SUFFIX)
+
+
+def sql_list(values: list) -> str:
+    return ", ".join("'" + v.replace("'", "''") + "'" for v in values)
+
+
+def dictionary(conn: duckdb.DuckDBPyConnection, name: str, sql: str) -> list:
+    """Sorted distinct values of sql as a temp table (value, code); returns the values"""
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE {name} AS
+        SELECT value, CAST(ROW_NUMBER() OVER (ORDER BY value) - 1 AS INTEGER) AS code
+        FROM (SELECT DISTINCT COALESCE(value, '') AS value FROM ({sql}) AS t(value))
+    """)
+    return [row[0] for row in conn.execute(f"SELECT value FROM {name} ORDER BY code").fetchall()]
+
+
+def offsets(counts: np.ndarray) -> np.ndarray:
+    """Group sizes -> int64 offsets with a leading 0"""
+    out = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=out[1:])
+    return out
+
+
+def write_ball_archive(conn: duckdb.DuckDBPyConnection, out_dir: Path, non_bowler: list, not_out: list) -> dict:
+    """Write ball_by_ball as a columnar archive to out_dir (replaced atomically); returns its counts"""
+    out_dir = Path(out_dir)
+    print(f"Writing ball archive {out_dir.name}...")
+    start = time.perf_counter()
+
+    players = dictionary(conn, "archive_players", """
+        SELECT striker FROM ball_by_ball UNION SELECT non_striker FROM ball_by_ball
+        UNION SELECT bowler FROM ball_by_ball""")
+    teams = dictionary(conn, "archive_teams", """
+        SELECT batting_team FROM ball_by_ball UNION SELECT bowling_team FROM ball_by_ball""")
+    venues = dictionary(conn, "archive_venues", "SELECT venue FROM ball_by_ball")
+    match_types = dictionary(conn, "archive_match_types", "SELECT match_type FROM ball_by_ball")
+
+    select = ",\n".join(f"{expr.format(non_bowler=sql_list(non_bowler), not_out=sql_list(not_out))} AS {name}"
+                        for name, _, expr in DELIVERY_COLUMNS)
+    balls = conn.execute(f"""
+        SELECT {select}
+        FROM ball_by_ball b
+        JOIN archive_players s ON s.value = COALESCE(b.striker, '')
+        JOIN archive_players ns ON ns.value = COALESCE(b.non_striker, '')
+        JOIN archive_players bw ON bw.value = COALESCE(b.bowler, '')
+        ORDER BY b.match_id, b.innings, b.delivery_seq
+    """).fetchnumpy()
+
+    innings = conn.execute("""
+        SELECT b.match_id, b.innings AS innings_number, bt.code AS batting_team, ft.code AS bowling_team,
+               COUNT(*) AS deliveries
+        FROM ball_by_ball b
+        JOIN archive_teams bt ON bt.value = COALESCE(b.batting_team, '')
+        JOIN archive_teams ft ON ft.value = COALESCE(b.bowling_team, '')
+        GROUP BY ALL
+        ORDER BY b.match_id, b.innings
+    """).fetchnumpy()
+
+    matches = conn.execute("""
+        SELECT b.match_id, ANY_VALUE(b.start_date) AS start_date, ANY_VALUE(mt.code) AS match_type,
+               ANY_VALUE(v.code) AS venue, COUNT(DISTINCT b.innings) AS innings
+        FROM ball_by_ball b
+        JOIN archive_match_types mt ON mt.value = COALESCE(b.match_type, '')
+        JOIN archive_venues v ON v.value = COALESCE(b.venue, '')
+        GROUP BY b.match_id
+        ORDER BY b.match_id
+    """).fetchnumpy()
+
+    arrays = {name: np.asarray(balls[name]).astype(dtype) for name, dtype, _ in DELIVERY_COLUMNS}
+    arrays["innings_offsets"] = offsets(np.asarray(innings["deliveries"]))
+    arrays.update({name: np.asarray(innings[name]).astype(dtype) for name, dtype in INNINGS_COLUMNS.items()})
+    arrays["match_offsets"] = offsets(np.asarray(matches["innings"]))
+    arrays.update({name: np.asarray(matches[name]).astype(dtype) for name, dtype in MATCH_COLUMNS.items()})
+
+    partial = out_dir.with_name(out_dir.name + ".part")
+    shutil.rmtree(partial, ignore_errors=True)
+    partial.mkdir(parents=True)
+    for name, array in arrays.items():
+        np.save(partial / f"{name}.npy", np.ascontiguousarray(array))
+
+    counts = {"matches": len(arrays["match_id"]), "innings": len(arrays["innings_number"]),
+              "deliveries": len(arrays["runs_off_bat"])}
+    meta = {
+        "format": ARCHIVE_FORMAT,
+        "source": out_dir.with_suffix(".duckdb").name,
+        "written_at": datetime.now().isoformat(timespec="seconds"),
+        **counts,
+        "columns": {name: str(array.dtype) for name, array in arrays.items()},
+        "players": players,
+        "teams": teams,
+        "venues": venues,
+        "match_types": match_types,
+    }
+    (partial / "archive.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    partial.rename(out_dir)
+    size = sum(p.stat().st_size for p in out_dir.iterdir())
+    print(f"  {counts['deliveries']:,} deliveries, {counts['matches']:,} matches: "
+          f"{size / 1024 / 1024:,.1f} MB in {time.perf_counter() - start:.1f}s")
+    return counts
+
+
+# ============== Reader ==============
+
+class Innings:
+    """One innings: delivery columns are zero-copy views (innings["runs_off_bat"])"""
+
+    __slots__ = ("archive", "index", "start", "stop")
+
+    def __init__(self, archive: "BallArchive", index: int):
+        self.archive = archive
+        self.index = index
+        self.start, self.stop = (int(x) for x in archive.arrays["innings_offsets"][index:index + 2])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.archive.arrays[column][self.start:self.stop]
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    @property
+    def number(self) -> int:
+        return int(self.archive.arrays["innings_number"][self.index])
+
+    @property
+    def batting_team(self) -> str:
+        return self.archive.teams[self.archive.arrays["batting_team"][self.index]]
+
+    @property
+    def bowling_team(self) -> str:
+        return self.archive.teams[self.archive.arrays["bowling_team"][self.index]]
+
+
+class Match:
+    """One match: delivery columns across all its innings are zero-copy views (match["wicket"])"""
+
+    __slots__ = ("archive", "index", "first", "last")
+
+    def __init__(self, archive: "BallArchive", index: int):
+        self.archive = archive
+        self.index = index
+        self.first, self.last = (int(x) for x in archive.arrays["match_offsets"][index:index + 2])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        bounds = self.archive.arrays["innings_offsets"]
+        return self.archive.arrays[column][bounds[self.first]:bounds[self.last]]
+
+    def innings(self) -> Iterator[Innings]:
+        for index in range(self.first, self.last):
+            yield Innings(self.archive, index)
+
+    @property
+    def match_id(self) -> int:
+        return int(self.archive.arrays["match_id"][self.index])
+
+    @property
+    def start_date(self) -> np.datetime64:
+        return self.archive.arrays["start_date"][self.index]
+
+    @property
+    def match_type(self) -> str:
+        return self.archive.match_types[self.archive.arrays["match_type"][self.index]]
+
+    @property
+    def venue(self) -> str:
+        return self.archive.venues[self.archive.arrays["venue"][self.index]]
+
+
+class BallArchive:
+    """Memory-mapped reader for an archive directory written by write_ball_archive"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        meta = json.loads((self.path / "archive.json").read_text(encoding="utf-8"))
+        if meta["format"] != ARCHIVE_FORMAT:
+            raise ValueError(f"{self.path.name}: archive format {meta['format']}, expected {ARCHIVE_FORMAT}")
+        self.meta = meta
+        self.players = meta["players"]
+        self.teams = meta["teams"]
+        self.venues = meta["venues"]
+        self.match_types = meta["match_types"]
+        self.arrays = {name: np.load(self.path / f"{name}.npy", mmap_mode="r") for name in meta["columns"]}
+
+    def __len__(self) -> int:
+        return len(self.arrays["match_id"])
+
+    def __iter__(self) -> Iterator[Match]:
+        for index in range(len(self)):
+            yield Match(self, index)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """A whole column over every delivery of every match"""
+        return self.arrays[column]
+
+    def matches(self, match_type: Optional[str] = None) -> Iterator[Match]:
+        """Matches in match_id order, optionally of one format"""
+        if match_type is None:
+            yield from self
+            return
+        if match_type not in self.match_types:
+            return
+        code = self.match_types.index(match_type)
+        for index in np.flatnonzero(self.arrays["match_type"] == code):
+            yield Match(self, int(index))
+
+    def match(self, match_id: int) -> Match:
+        index = int(np.searchsorted(self.arrays["match_id"], match_id))
+        if index == len(self) or self.arrays["match_id"][index] != match_id:
+            raise KeyError(match_id)
+        return Match(self, index)
+
+
+# ============== CLI ==============
+
+def print_info(archive: BallArchive):
+    meta = archive.meta
+    print(f"{archive.path.name}: format {meta['format']}, from {meta['source']} at {meta['written_at']}")
+    print(f"  {meta['matches']:,} matches, {meta['innings']:,} innings, {meta['deliveries']:,} deliveries")
+    print(f"  {len(archive.players):,} players, {len(archive.teams):,} teams, {len(archive.venues):,} venues")
+    for name, dtype in meta["columns"].items():
+        size = (archive.path / f"{name}.npy").stat().st_size
+        print(f"  {name:<16} {dtype:<14} {size / 1024:>10,.0f} KB")
+
+
+def benchmark(db_path: Path):
+    """Innings totals for every match: archive replay vs one ordered SQL fetch"""
+    path = archive_path(db_path)
+    archive = BallArchive(path)
+
+    start = time.perf_counter()
+    archive_totals = [int(inn["runs_off_bat"].sum()) + int(inn["extras"].sum())
+                      for match in archive for inn in match.innings()]
+    archive_time = time.perf_counter() - start
+
+    conn = duckdb.connect(str(db_path), read_only=True)
+    start = time.perf_counter()
+    sql_totals, last, total = [], None, 0
+    for match_id, innings, runs, extras in conn.execute("""
+            SELECT match_id, innings, runs_off_bat, extras FROM ball_by_ball ORDER BY match_id, innings, ball
+            """).fetchall():
+        if (match_id, innings) != last:
+            if last is not None:
+                sql_totals.append(total)
+            last, total = (match_id, innings), 0
+        total += (runs or 0) + (extras or 0)
+    if last is not None:
+        sql_totals.append(total)
+    sql_time = time.perf_counter() - start
+    conn.close()
+
+    print(f"Replay of {archive.meta['deliveries']:,} deliveries in {archive.meta['innings']:,} innings:")
+    print(f"  archive:   {archive_time * 1000:8.1f} ms")
+    print(f"  SQL fetch: {sql_time * 1000:8.1f} ms")
+    print(f"  totals {'match' if archive_totals == sql_totals else 'DIFFER'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write, inspect and benchmark the ball-by-ball archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    write = sub.add_parser("write", help="Write <db>.balls from a built cricket.duckdb")
+    write.add_argument("db", type=Path)
+
+    info = sub.add_parser("info", help="Print an archive's counts and column sizes")
+    info.add_argument("archive", type=Path)
+
+    bench = sub.add_parser("bench", help="Time a full replay against an ordered SQL fetch")
+    bench.add_argument("db", type=Path)
+
+    args = parser.parse_args()
+    if args.command == "write":
+        from process_cricsheet import NON_BOWLER_WICKETS, NOT_OUT_WICKETS
+        conn = duckdb.connect(str(args.db), read_only=True)
+        write_ball_archive(conn, archive_path(args.db), NON_BOWLER_WICKETS, NOT_OUT_WICKETS)
+        conn.close()
+    elif args.command == "info":
+        print_info(BallArchive(args.archive))
+    else:
+        benchmark(args.db)
@@ -0,0 +1,158 @@
+"""
+DuckDB Build Profiles
+=====================
+Named resource budgets shared by the build scripts (process_cricsheet.py,
+download_and_import.py, size_comparison.py) so every pipeline sets
+memory_limit, threads, temp_directory and preserve_insertion_order the
+same way.
+
+Profiles:
+- small-vps: 1GB / 2 threads, lowered CPU priority. Safe to run next to a
+  live serving process on the Hetzner box.
+- workstation: 8GB / all cores.
+
+Select a profile with the BUILD_PROFILE environment variable:
+    BUILD_PROFILE=small-vps python process_cricsheet.py
+
+BuildMonitor samples DuckDB memory and spill usage during a build and
+prints the peaks at the end.
+"""
+
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_PROFILE = "workstation"
+
+# Niceness the process started with; a profile's "nice" is relative to it
+BASE_NICE = os.nice(0) if hasattr(os, "nice") else 0
+
+# threads=None leaves DuckDB's default (one per core)
+PROFILES = {
+    "small-vps": {
+        "memory_limit": "1GB",
+        "threads": 2,
+        "preserve_insertion_order": False,
+        "max_temp_directory_size": "20GB",
+        "nice": 10,
+    },
+    "workstation": {
+        "memory_limit": "8GB",
+        "threads": None,
+        "preserve_insertion_order": False,
+        "max_temp_directory_size": None,
+        "nice": 0,
+    },
+}
+
+
+def get_profile(name: Optional[str] = None) -> tuple:
+    """Resolve a profile by name, falling back to $BUILD_PROFILE then the default."""
+    name = name or os.environ.get("BUILD_PROFILE") or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown build profile '{name}' (choose from: {', '.join(PROFILES)})")
+    return name, PROFILES[name]
+
+
+def apply_profile(conn: duckdb.DuckDBPyConnection, db_path: Path, name: Optional[str] = None) -> dict:
+    """
+    Apply a build profile to an open connection.
+    Spill files go to $BUILD_TEMP_DIR if set, else '<db>.tmp' next to the database.
+    """
+    name, profile = get_profile(name)
+
+    temp_dir = Path(os.environ.get("BUILD_TEMP_DIR") or db_path.parent / f"{db_path.name}.tmp")
+
+    conn.execute(f"SET memory_limit = '{profile['memory_limit']}'")
+    if profile["threads"]:
+        conn.execute(f"SET threads = {profile['threads']}")
+    conn.execute(f"SET preserve_insertion_order = {str(profile['preserve_insertion_order']).lower()}")
+    conn.execute(f"SET temp_directory = '{temp_dir.as_posix()}'")
+    if profile["max_temp_directory_size"]:
+        conn.execute(f"SET max_temp_directory_size = '{profile['max_temp_directory_size']}'")
+
+    # Lower our CPU priority so a co-located server keeps its share. os.nice is
+    # relative, so step to the target: applying a profile again (several builds
+    # or databases in one process) doesn't stack.
+    if profile["nice"] and hasattr(os, "nice"):
+        increment = BASE_NICE + profile["nice"] - os.nice(0)
+        if increment > 0:
+            os.nice(increment)
+
+    settings = dict(conn.execute("""
+        SELECT name, value FROM duckdb_settings()
+        WHERE name IN ('memory_limit', 'threads', 'preserve_insertion_order', 'temp_directory')
+    """).fetchall())
+
+    print(f"  [PROFILE] {name}: memory_limit={settings['memory_limit']}, threads={settings['threads']}, "
+          f"preserve_insertion_order={settings['preserve_insertion_order']}, temp_directory={settings['temp_directory']}")
+
+    return settings
+
+
+class BuildMonitor:
+    """
+    Context manager that samples duckdb_memory() on a background cursor and
+    reports peak buffer memory, peak spill to temp_directory and peak process RSS.
+
+        with BuildMonitor(conn):
+            ... build ...
+
+    or monitor = BuildMonitor(conn).start() ... monitor.stop()
+    """
+
+    def __init__(self, conn: duckdb.DuckDBPyConnection, interval: float = 0.5):
+        self.cursor = conn.cursor()
+        self.interval = interval
+        self.peak_memory = 0
+        self.peak_spill = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        memory, spill = self.cursor.execute("""
+            SELECT SUM(memory_usage_bytes), SUM(temporary_storage_bytes) FROM duckdb_memory()
+        """).fetchone()
+        self.peak_memory = max(self.peak_memory, memory or 0)
+        self.peak_spill = max(self.peak_spill, spill or 0)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        self.cursor.close()
+        self.report()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def report(self):
+        print(f"  [RESOURCES] Peak DuckDB memory: {self.peak_memory / 1024 / 1024:,.1f} MB")
+        print(f"  [RESOURCES] Peak spill to disk: {self.peak_spill / 1024 / 1024:,.1f} MB")
+
+        if resource is not None:
+            # ru_maxrss is KB on Linux, bytes on macOS
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            rss_mb = rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+            print(f"  [RESOURCES] Peak process RSS:   {rss_mb:,.1f} MB")
@@ -0,0 +1,183 @@
+"""
+Database Catalog Manifest
+=========================
+Persists a metadata manifest next to each built database
+(cricket.duckdb -> cricket.duckdb.manifest.json) so schema pages and admin
+endpoints can answer table listings, column types, row counts and value
+ranges without DESCRIBE / COUNT(*) round trips against the database.
+
+Manifest contents: pipeline name, build version, build time, DuckDB
+version, and per table: row count, columns with type, min and max (as text),
+plus the hot columns to pre-load after open. Views are listed with their
+columns only (counting them would scan their source files).
+
+The ingest Pipeline writes the manifest at the end of every run. warm_up()
+touches the hot columns of a freshly opened (read-only) connection so the
+first requests after a deploy don't pay for cold reads.
+
+Usage:
+    python catalog.py manifest cricket.duckdb     # (re)write the manifest
+    python catalog.py show cricket.duckdb         # print it
+    python catalog.py warm cricket.duckdb         # time a warm-up pass
+"""
+
+import json
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+# Internal bookkeeping tables, left out of the manifest
+INTERNAL_TABLES = {"_ingest_stages"}
+
+# Column types MIN/MAX is not meaningful for
+NO_RANGE_TYPES = ("BLOB", "STRUCT", "MAP", "UNION", "[]")
+
+
+def manifest_path(db_path: Path) -> Path:
+    db_path = Path(db_path)
+    return db_path.with_name(db_path.name + MANIFEST_SUFFIX)
+
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def describe_table(conn: duckdb.DuckDBPyConnection, table: str, with_ranges: bool = True) -> dict:
+    """Row count and per-column type / min / max for one table (one scan)"""
+    columns = conn.execute(f"DESCRIBE {quote_ident(table)}").fetchall()
+    ranged = [(name, col_type) for name, col_type, *_ in columns
+              if with_ranges and not any(t in col_type for t in NO_RANGE_TYPES)]
+
+    selects = ["COUNT(*)"]
+    for name, _ in ranged:
+        selects.append(f"CAST(MIN({quote_ident(name)}) AS VARCHAR)")
+        selects.append(f"CAST(MAX({quote_ident(name)}) AS VARCHAR)")
+    values = conn.execute(f"SELECT {', '.join(selects)} FROM {quote_ident(table)}").fetchone()
+
+    ranges = {name: (values[1 + 2 * i], values[2 + 2 * i]) for i, (name, _) in enumerate(ranged)}
+    return {
+        "rows": values[0],
+        "columns": [
+            {"name": name, "type": col_type,
+             "min": ranges.get(name, (None, None))[0], "max": ranges.get(name, (None, None))[1]}
+            for name, col_type, *_ in columns
+        ],
+    }
+
+
+def build_manifest(conn: duckdb.DuckDBPyConnection, pipeline: str, build_version: str,
+                   hot_columns: Optional[dict] = None) -> dict:
+    """Collect the manifest for every table and view in the main database"""
+    tables = {}
+    for (table,) in conn.execute("""
+        SELECT table_name FROM duckdb_tables() WHERE database_name = current_database() ORDER BY table_name
+    """).fetchall():
+        if table not in INTERNAL_TABLES:
+            tables[table] = {"kind": "table", **describe_table(conn, table)}
+
+    for (view,) in conn.execute("""
+        SELECT view_name FROM duckdb_views()
+        WHERE database_name = current_database() AND NOT internal ORDER BY view_name
+    """).fetchall():
+        columns = conn.execute(f"DESCRIBE {quote_ident(view)}").fetchall()
+        tables[view] = {"kind": "view", "rows": None,
+                        "columns": [{"name": name, "type": col_type, "min": None, "max": None}
+                                    for name, col_type, *_ in columns]}
+
+    # Only keep hot columns that exist in this build
+    hot = {}
+    for table, columns in (hot_columns or {}).items():
+        if table in tables:
+            names = {c["name"] for c in tables[table]["columns"]}
+            hot[table] = [c for c in columns if c in names]
+
+    return {
+        "pipeline": pipeline,
+        "build_version": build_version,
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "duckdb_version": duckdb.__version__,
+        "tables": tables,
+        "hot_columns": hot,
+    }
+
+
+def write_manifest(conn: duckdb.DuckDBPyConnection, db_path: Path, pipeline: str, build_version: str,
+                   hot_columns: Optional[dict] = None) -> Path:
+    """Write <db>.manifest.json next to the database"""
+    manifest = build_manifest(conn, pipeline, build_version, hot_columns)
+    path = manifest_path(db_path)
+    partial = path.with_name(path.name + ".part")
+    partial.write_text(json.dumps(manifest, indent=2, default=str), encoding="utf-8")
+    partial.replace(path)
+    print(f"  [MANIFEST] {path.name}: {len(manifest['tables'])} tables, build {build_version}")
+    return path
+
+
+def load_manifest(db_path: Path) -> Optional[dict]:
+    path = manifest_path(db_path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def warm_up(conn: duckdb.DuckDBPyConnection, manifest: dict) -> float:
+    """
+    Read every hot column once (MIN over the column) so its blocks are in the
+    buffer pool and OS page cache before the first request. Returns seconds.
+    """
+    start = time.perf_counter()
+    for table, columns in manifest.get("hot_columns", {}).items():
+        if not columns:
+            continue
+        selects = ", ".join(f"MIN({quote_ident(c)})" for c in columns)
+        conn.execute(f"SELECT {selects} FROM {quote_ident(table)}").fetchall()
+    return time.perf_counter() - start
+
+
+def print_manifest(manifest: dict):
+    print("=" * 70)
+    print(f"{manifest['pipeline']} build {manifest['build_version']} ({manifest['built_at']}, "
+          f"DuckDB {manifest['duckdb_version']})")
+    print("=" * 70)
+    for table, info in manifest["tables"].items():
+        rows = f"{info['rows']:,} rows" if info["rows"] is not None else "view"
+        print(f"\n{table}: {rows}")
+        hot = set(manifest.get("hot_columns", {}).get(table, []))
+        for column in info["columns"]:
+            flag = "*" if column["name"] in hot else " "
+            value_range = f"{column['min']} .. {column['max']}" if column["min"] is not None else ""
+            print(f"  {flag} {column['name']:<28} {column['type']:<16} {value_range[:60]}")
+    print("\n* = hot column (pre-loaded by warm_up)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write, show or warm up from a database manifest")
+    parser.add_argument("command", choices=["manifest", "show", "warm"])
+    parser.add_argument("db", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "manifest":
+        # Keep pipeline name, version and hot columns from the previous manifest
+        previous = load_manifest(args.db) or {}
+        conn = duckdb.connect(str(args.db), read_only=True)
+        write_manifest(conn, args.db, previous.get("pipeline", args.db.stem),
+                       previous.get("build_version", "unknown"), previous.get("hot_columns"))
+        conn.close()
+    else:
+        manifest = load_manifest(args.db)
+        if manifest is None:
+            parser.error(f"No manifest for {args.db} (run: python catalog.py manifest {args.db})")
+        if args.command == "show":
+            print_manifest(manifest)
+        else:
+            conn = duckdb.connect(str(args.db), read_only=True)
+            seconds = warm_up(conn, manifest)
+            conn.close()
+            columns = sum(len(c) for c in manifest["hot_columns"].values())
+            print(f"Warmed {columns} hot columns in {seconds:.2f}s")
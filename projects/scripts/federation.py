@@ -0,0 +1,363 @@
+"""
+Query Federation
+================
+One catalog over several read-only sources, so a cross-dataset dashboard
+or an admin preview runs one query instead of opening each file and
+stitching results together:
+
+- .duckdb files (builds or published snapshots) are ATTACHed READ_ONLY
+  under an alias: cricket.ball_by_ball, imdb.title_basics
+- Parquet snapshots (a file, or a directory such as EXPORT DATABASE ...
+  (FORMAT parquet) writes) become views in a schema named by the alias:
+  cricket_pq.ball_by_ball over ball_by_ball.parquet
+
+Nothing is copied. Aliases default to the source's stem (a snapshot keeps
+its source name, as in the gateway), must be plain identifiers and are
+unique across both kinds.
+
+The combined catalog lives in one in-memory DuckDB instance opened with
+the serving settings (snapshot.SERVING_CONFIG). Queries run on pooled
+cursors of that instance; attached files share its buffer pool.
+
+The instance is shared by every client, so before it serves untrusted SQL
+it is locked (lock()): file access is limited to the attached Parquet
+paths and the configuration is frozen. query() (and the gateway) only run
+a single SELECT, so DETACH, CREATE, DROP, COPY and SET are rejected before
+they reach a pooled cursor.
+
+With track_scans on, every cursor has the profiler enabled (no output) and
+each query's scan operators are attributed to their source: queries,
+scans, rows scanned, rows produced and scan time per alias, plus rows
+scanned per table. Native table scans name their catalog; Parquet scans
+are matched by file path.
+
+    fed = Federation()
+    fed.attach("cricket.duckdb")
+    fed.attach("imdb.duckdb")
+    fed.lock()
+    columns, rows = fed.query(
+        "SELECT 'cricket' AS source, COUNT(*) FROM cricket.ball_by_ball "
+        "UNION ALL SELECT 'imdb', COUNT(*) FROM imdb.title_basics")
+    fed.stats()
+
+Usage:
+    python federation.py catalog --db cricket.duckdb --db imdb.duckdb --parquet /data/export/cricket
+    python federation.py query --snapshot-dir /data/snapshots "SELECT COUNT(*) FROM cricket.match_info"
+"""
+
+import re
+import json
+import queue
+import threading
+import argparse
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+from catalog import INTERNAL_TABLES, quote_ident
+from snapshot import POINTER_SUFFIX, SERVING_CONFIG, current_snapshot, served_name
+
+POOL_SIZE = 8
+
+ALIAS_PATTERN = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+# Names DuckDB already uses for catalogs and schemas
+RESERVED_ALIASES = {"main", "memory", "system", "temp", "information_schema", "pg_catalog"}
+
+
+def check_read_only(cur: duckdb.DuckDBPyConnection, sql: str):
+    """Raise duckdb.PermissionException unless sql is exactly one SELECT statement"""
+    types = [statement.type for statement in cur.extract_statements(sql)]
+    if types != [duckdb.StatementType.SELECT]:
+        found = ", ".join(t.name for t in types) or "no statement"
+        raise duckdb.PermissionException(f"Only a single SELECT statement is allowed here (got {found})")
+
+
+class Source:
+    """One attached source: a .duckdb file (kind 'duckdb') or Parquet views (kind 'parquet')"""
+
+    def __init__(self, alias: str, kind: str, path: Path, tables: list):
+        self.alias = alias
+        self.kind = kind
+        self.path = path
+        self.tables = tables
+
+    def __repr__(self):
+        return f"Source({self.alias!r}, {self.kind!r}, {self.path.as_posix()!r}, {len(self.tables)} tables)"
+
+
+class Federation:
+    """Read-only sources in one in-memory catalog, queried through a pool of cursors"""
+
+    def __init__(self, pool_size: int = POOL_SIZE, track_scans: bool = True, config: Optional[dict] = None):
+        self.conn = duckdb.connect(config={**SERVING_CONFIG, **(config or {})})
+        self.sources = {}
+        self.pool_size = pool_size
+        self.track_scans = track_scans
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.locked = False
+
+    # ============== Sources ==============
+
+    def _check_alias(self, alias: str):
+        if self.locked:
+            raise ValueError(f"Cannot attach '{alias}': the federation is locked")
+        if not ALIAS_PATTERN.match(alias) or alias in RESERVED_ALIASES:
+            raise ValueError(f"Invalid alias '{alias}' (lowercase identifier, not one of {sorted(RESERVED_ALIASES)})")
+        if alias in self.sources:
+            raise ValueError(f"Alias '{alias}' is already attached ({self.sources[alias].path})")
+
+    def attach(self, path: Path, alias: Optional[str] = None) -> Source:
+        """Attach a .duckdb file, a .parquet file or a directory of Parquet files"""
+        path = Path(path).resolve()
+        if path.is_dir() or path.suffix == ".parquet":
+            return self.attach_parquet(path, alias)
+
+        alias = alias or Path(served_name(path)).stem
+        with self._lock:
+            self._check_alias(alias)
+            self.conn.execute(f"ATTACH '{path.as_posix()}' AS {alias} (READ_ONLY)")
+            tables = [row[0] for row in self.conn.execute("""
+                SELECT table_name FROM information_schema.tables
+                WHERE table_catalog = ? AND table_schema = 'main'
+                ORDER BY table_name
+            """, [alias]).fetchall() if row[0] not in INTERNAL_TABLES]
+            source = self.sources[alias] = Source(alias, "duckdb", path, tables)
+        return source
+
+    def attach_parquet(self, path: Path, alias: Optional[str] = None) -> Source:
+        """
+        One view per Parquet file in schema alias. For a directory, each
+        *.parquet is a view named by its stem and each subdirectory holding
+        Parquet files (hive partitions) is one view over all of them.
+        """
+        path = Path(path).resolve()
+        alias = alias or path.stem
+        if path.is_dir():
+            views = {p.stem: f"'{p.as_posix()}'" for p in sorted(path.glob("*.parquet"))}
+            views.update({d.name: f"'{d.as_posix()}/**/*.parquet', hive_partitioning = true"
+                          for d in sorted(path.iterdir()) if d.is_dir() and any(d.rglob("*.parquet"))})
+        else:
+            views = {path.stem: f"'{path.as_posix()}'"}
+        views = {name: args for name, args in views.items() if name not in INTERNAL_TABLES}
+        if not views:
+            raise ValueError(f"No Parquet files in {path}")
+
+        with self._lock:
+            self._check_alias(alias)
+            self.conn.execute(f"CREATE SCHEMA {alias}")
+            for name, args in views.items():
+                self.conn.execute(f"CREATE VIEW {alias}.{quote_ident(name)} AS SELECT * FROM read_parquet({args})")
+            source = self.sources[alias] = Source(alias, "parquet", path, sorted(views))
+        return source
+
+    def attach_spec(self, spec: str) -> Source:
+        """Attach from a command-line spec: 'path' or 'alias=path'"""
+        alias, sep, path = str(spec).partition("=")
+        return self.attach(Path(path), alias) if sep else self.attach(Path(spec))
+
+    def attach_snapshots(self, snapshot_dir: Path) -> list:
+        """Attach the live snapshot (<stem>.current) of every database published in snapshot_dir"""
+        return [self.attach(current_snapshot(snapshot_dir, pointer.name[:-len(POINTER_SUFFIX)]))
+                for pointer in sorted(Path(snapshot_dir).glob(f"*{POINTER_SUFFIX}"))]
+
+    def lock(self):
+        """
+        Lock the instance down for serving: create the whole cursor pool (their
+        profiler setting can't change afterwards), restrict file access to the
+        attached Parquet paths and freeze the configuration. Nothing can be
+        attached afterwards.
+        """
+        with self._lock:
+            cursors = [self._new_cursor() for _ in range(self.pool_size - self._created)]
+            self._created = self.pool_size
+            directories = [f"{s.path.as_posix()}/" for s in self.sources.values()
+                           if s.kind == "parquet" and s.path.is_dir()]
+            paths = [s.path.as_posix() for s in self.sources.values() if s.kind == "parquet" and not s.path.is_dir()]
+            self.conn.execute("SET allowed_directories = ?", [directories])
+            self.conn.execute("SET allowed_paths = ?", [paths])
+            self.conn.execute("SET enable_external_access = false")
+            self.conn.execute("SET lock_configuration = true")
+            self.locked = True
+        for cur in cursors:
+            self._idle.put(cur)
+
+    def detach(self, alias: str):
+        with self._lock:
+            source = self.sources.pop(alias)
+            if source.kind == "duckdb":
+                self.conn.execute(f"DETACH {alias}")
+            else:
+                self.conn.execute(f"DROP SCHEMA {alias} CASCADE")
+            self._stats.pop(alias, None)
+
+    def catalog(self) -> list:
+        """(alias, kind, table) for every table and view across the sources"""
+        return [(s.alias, s.kind, table) for s in self.sources.values() for table in s.tables]
+
+    # ============== Cursors ==============
+
+    def _new_cursor(self) -> duckdb.DuckDBPyConnection:
+        cur = self.conn.cursor()
+        if self.track_scans:
+            cur.execute("SET enable_profiling = 'no_output'")
+        return cur
+
+    @contextmanager
+    def cursor(self):
+        """
+        A pooled cursor on the combined catalog. At most pool_size exist; callers
+        wait for an idle one beyond that. When the block completes, the scans of
+        the last query run on the cursor are recorded (a failed query records nothing).
+        """
+        try:
+            cur = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.pool_size
+                self._created += create
+            if create:
+                cur = self._new_cursor()
+            else:
+                cur = self._idle.get()
+        completed = False
+        try:
+            yield cur
+            completed = True
+        finally:
+            if completed and self.track_scans:
+                self._record(cur)
+            self._idle.put(cur)
+
+    def query(self, sql: str, params=None) -> tuple:
+        """Run sql (a single SELECT) on a pooled cursor and return (columns, rows)"""
+        with self.cursor() as cur:
+            check_read_only(cur, sql)
+            result = cur.execute(sql, params)
+            columns = [d[0] for d in result.description] if result.description else []
+            return columns, result.fetchall()
+
+    # ============== Scan stats ==============
+
+    def _source_of(self, extra: dict) -> tuple:
+        """(alias, table) a scan operator read from, or (None, None)"""
+        table = extra.get("Table")
+        if table:
+            catalog, _, name = table.partition(".")
+            if catalog in self.sources:
+                return catalog, name.rpartition(".")[2]
+            return None, None
+        files = extra.get("Filename(s)")
+        if files:
+            first = Path(files.split(",")[0].strip())
+            for source in self.sources.values():
+                if source.kind == "parquet" and (first == source.path or source.path in first.parents):
+                    relative = first.relative_to(source.path).parts if first != source.path else ()
+                    return source.alias, relative[0].removesuffix(".parquet") if relative else source.path.stem
+        return None, None
+
+    def _record(self, cur: duckdb.DuckDBPyConnection):
+        try:
+            profile = json.loads(cur.get_profiling_information(format="json"))
+        except (duckdb.Error, ValueError):
+            return  # no query ran on this cursor
+
+        scans = []
+
+        def walk(node):
+            for child in node.get("children", []):
+                if child.get("operator_type") == "TABLE_SCAN":
+                    alias, table = self._source_of(child.get("extra_info") or {})
+                    if alias:
+                        scans.append((alias, table, child))
+                walk(child)
+
+        walk(profile)
+        with self._lock:
+            for alias in {alias for alias, _, _ in scans}:
+                self._source_stats(alias)["queries"] += 1
+            for alias, table, op in scans:
+                stats = self._source_stats(alias)
+                rows = op.get("operator_rows_scanned") or 0
+                stats["scans"] += 1
+                stats["rows_scanned"] += rows
+                stats["rows_out"] += op.get("operator_cardinality") or 0
+                stats["scan_ms"] += (op.get("operator_timing") or 0) * 1000
+                stats["tables"][table] = stats["tables"].get(table, 0) + rows
+
+    def _source_stats(self, alias: str) -> dict:
+        return self._stats.setdefault(alias, {"queries": 0, "scans": 0, "rows_scanned": 0, "rows_out": 0,
+                                              "scan_ms": 0.0, "tables": {}})
+
+    def stats(self) -> dict:
+        """Per-source scan counters since start (or the last reset)"""
+        with self._lock:
+            return {alias: {**s, "scan_ms": round(s["scan_ms"], 3), "tables": dict(s["tables"])}
+                    for alias, s in self._stats.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+        self.conn.close()
+
+
+def print_stats(stats: dict):
+    print(f"\n{'Source':<16} {'Queries':>8} {'Scans':>6} {'Rows scanned':>14} {'Rows out':>12} {'Scan ms':>9}")
+    print("-" * 70)
+    for alias, s in stats.items():
+        print(f"{alias:<16} {s['queries']:>8,} {s['scans']:>6,} {s['rows_scanned']:>14,} "
+              f"{s['rows_out']:>12,} {s['scan_ms']:>9.1f}")
+        for table, rows in sorted(s["tables"].items(), key=lambda t: -t[1]):
+            print(f"  {table:<30} {rows:>14,}")
+
+
+if __name__ == "__main__":
+    sources = argparse.ArgumentParser(add_help=False)
+    sources.add_argument("--db", action="append", default=[],
+                         help="DuckDB file (repeatable; alias=path allowed)")
+    sources.add_argument("--parquet", action="append", default=[],
+                         help="Parquet file or export directory (repeatable; alias=path allowed)")
+    sources.add_argument("--snapshot-dir", type=Path, help="Attach every published snapshot in this directory")
+
+    parser = argparse.ArgumentParser(description="Query several read-only DuckDB files and Parquet snapshots as one catalog")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("catalog", parents=[sources], help="List the attached sources and their tables")
+    run = sub.add_parser("query", parents=[sources], help="Run one query and print its per-source scan stats")
+    run.add_argument("sql", help="SQL over alias.table names")
+    run.add_argument("--limit", type=int, default=50, help="Rows printed")
+    args = parser.parse_args()
+
+    fed = Federation()
+    try:
+        for spec in [*args.db, *args.parquet]:
+            fed.attach_spec(spec)
+        if args.snapshot_dir:
+            fed.attach_snapshots(args.snapshot_dir)
+        if not fed.sources:
+            parser.error("Give --db, --parquet and/or --snapshot-dir")
+        fed.lock()
+
+        if args.command == "catalog":
+            for source in fed.sources.values():
+                print(f"{source.alias} ({source.kind}): {source.path}")
+                for table in source.tables:
+                    print(f"  {source.alias}.{table}")
+        else:
+            columns, rows = fed.query(args.sql)
+            print(" | ".join(columns))
+            for row in rows[:args.limit]:
+                print(" | ".join("" if v is None else str(v) for v in row))
+            if len(rows) > args.limit:
+                print(f"... {len(rows) - args.limit:,} more rows")
+            print_stats(fed.stats())
+    finally:
+        fed.close()
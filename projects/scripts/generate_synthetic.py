@@ -0,0 +1,463 @@
+"""
+Synthetic Data Generator
+========================
+Writes deterministic, offline stand-ins for the real downloads so the
+pipelines and query benchmarks can run at any scale:
+- Cricsheet: t20s/odis/tests_csv2.zip (one ball CSV + _info.csv per match),
+  optionally the matching *_json.zip archives
+- IMDb: title.basics / title.ratings / name.basics .tsv.gz, optionally
+  title.akas / title.principals (the lazy tables)
+
+Scale 1.0 is roughly today's real volume (8,762 matches / ~4.4M deliveries,
+6M titles); --scale 10 writes ~10x. The same --seed always produces the same
+files, whatever the scale of the other dataset.
+
+Skew (--skew, Zipf exponent) controls how concentrated activity is:
+popular players are picked far more often and have longer careers, and a
+few titles collect most of the votes. 0 = uniform.
+
+Usage:
+    python generate_synthetic.py cricket /tmp/synth --scale 0.1
+    python generate_synthetic.py imdb /tmp/synth --scale 0.05 --lazy-files
+    python generate_synthetic.py all /tmp/synth --scale 10 --skew 1.5 --json
+
+Then build offline from the generated files:
+    python process_cricsheet.py --data-dir /tmp/synth
+    python ../imdb-data/scripts/download_and_import.py --data-dir /tmp/synth
+"""
+
+import io
+import csv
+import gzip
+import json
+import math
+import hashlib
+import random
+import zipfile
+import argparse
+from datetime import date, timedelta
+from pathlib import Path
+
+DEFAULT_SEED = 42
+DEFAULT_SKEW = 1.2
+
+# ============== Cricket ==============
+
+# matches: real counts at scale 1.0; runs: weights for 0, 1, 2, 3, 4, 6 off the bat
+FORMATS = {
+    "T20": {"csv": "t20s_csv2.zip", "json": "t20s_json.zip", "matches": 4801, "innings": 2, "overs": 20,
+            "wicket_p": 0.055, "runs": [35, 37, 9, 1, 12, 6]},
+    "ODI": {"csv": "odis_csv2.zip", "json": "odis_json.zip", "matches": 3073, "innings": 2, "overs": 50,
+            "wicket_p": 0.035, "runs": [45, 35, 7, 1, 10, 2]},
+    "TEST": {"csv": "tests_csv2.zip", "json": "tests_json.zip", "matches": 888, "innings": 4, "overs": 90,
+             "wicket_p": 0.018, "runs": [70, 18, 4, 1, 6, 1]},
+}
+
+BALL_HEADER = [
+    "match_id", "season", "start_date", "venue", "innings", "ball",
+    "batting_team", "bowling_team", "striker", "non_striker", "bowler",
+    "runs_off_bat", "extras", "wides", "noballs", "byes", "legbyes", "penalty",
+    "wicket_type", "player_dismissed", "other_wicket_type", "other_player_dismissed",
+]
+
+RUN_VALUES = [0, 1, 2, 3, 4, 6]
+WICKET_KINDS = ["caught", "bowled", "lbw", "run out", "stumped"]
+WICKET_WEIGHTS = [55, 20, 15, 6, 4]
+WIDE_P = 0.03
+NOBALL_P = 0.008
+
+FIRST_YEAR = 2002
+LAST_YEAR = 2025
+N_TEAMS = 16
+SQUAD_SIZE = 60
+N_VENUES = 40
+
+
+def zipf_weights(n: int, skew: float) -> list:
+    """Weight of the item at rank r is 1 / (r + 1) ** skew"""
+    return [1 / (rank + 1) ** skew for rank in range(n)]
+
+
+def weighted_sample(rng: random.Random, items: list, weights: list, k: int) -> list:
+    """k distinct items, drawn with probability proportional to weight (Efraimidis-Spirakis)"""
+    keyed = sorted(((rng.random() ** (1 / w), i) for i, w in enumerate(weights)), reverse=True)
+    return [items[i] for _, i in keyed[:k]]
+
+
+class Squad:
+    """A team's player pool: popularity rank sets both selection weight and career length."""
+
+    def __init__(self, rng: random.Random, team: str, skew: float):
+        self.team = team
+        self.players = [f"Player {team[-1]}{i:03d}" for i in range(SQUAD_SIZE)]
+        self.weights = zipf_weights(SQUAD_SIZE, skew)
+        top = self.weights[0]
+        self.careers = []
+        for weight in self.weights:
+            span = 1 + int(rng.expovariate(1 / (3 + 15 * weight / top)))
+            debut = rng.randint(FIRST_YEAR - span + 1, LAST_YEAR)
+            self.careers.append((debut, debut + span - 1))
+        # hashlib, not hash(): str hashes change between interpreter runs
+        self.registry = {p: hashlib.sha1(p.encode()).hexdigest()[:8] for p in self.players}
+
+    def pick_xi(self, rng: random.Random, year: int) -> list:
+        """Eleven players active in `year`, weighted by popularity, in batting order"""
+        active = [i for i, (start, end) in enumerate(self.careers) if start <= year <= end]
+        if len(active) < 11:
+            # Not enough active players: debutants fill the gaps
+            others = sorted(set(range(SQUAD_SIZE)) - set(active), key=lambda i: abs(self.careers[i][0] - year))
+            active += others[:11 - len(active)]
+        chosen = weighted_sample(rng, active, [self.weights[i] for i in active], 11)
+        return [self.players[i] for i in sorted(chosen)]
+
+
+def simulate_innings(rng: random.Random, fmt: dict, batting: list, bowling: list, target=None) -> tuple:
+    """Deliveries of one innings as (over, deliveries) and the total"""
+    striker, non_striker, next_in = batting[0], batting[1], 2
+    bowlers = bowling[-5:]
+    total = wickets = 0
+    overs = []
+
+    for over in range(fmt["overs"]):
+        bowler = bowlers[over % len(bowlers)]
+        deliveries = []
+        legal = 0
+        while legal < 6:
+            d = {"striker": striker, "non_striker": non_striker, "bowler": bowler,
+                 "runs": 0, "wides": None, "noballs": None, "wicket": None}
+            r = rng.random()
+            if r < WIDE_P:
+                d["wides"] = 1
+            else:
+                if r < WIDE_P + NOBALL_P:
+                    d["noballs"] = 1
+                else:
+                    legal += 1
+                d["runs"] = rng.choices(RUN_VALUES, fmt["runs"])[0]
+
+                if d["noballs"] is None and rng.random() < fmt["wicket_p"]:
+                    kind = rng.choices(WICKET_KINDS, WICKET_WEIGHTS)[0]
+                    out = non_striker if kind == "run out" and rng.random() < 0.3 else striker
+                    d["runs"] = 0 if kind != "run out" else d["runs"]
+                    d["wicket"] = (kind, out)
+
+            deliveries.append(d)
+            total += d["runs"] + (d["wides"] or 0) + (d["noballs"] or 0)
+
+            if d["runs"] % 2 == 1:
+                striker, non_striker = non_striker, striker
+            if d["wicket"]:
+                wickets += 1
+                if wickets == 10 or next_in >= len(batting):
+                    break
+                if d["wicket"][1] == striker:
+                    striker = batting[next_in]
+                else:
+                    non_striker = batting[next_in]
+                next_in += 1
+            if target is not None and total > target:
+                break
+
+        overs.append((over, deliveries))
+        striker, non_striker = non_striker, striker
+        if wickets == 10 or (target is not None and total > target):
+            break
+
+    return overs, total, wickets
+
+
+def simulate_match(rng: random.Random, match_type: str, match_id: int, squads: list, venues: list, skew: float) -> dict:
+    fmt = FORMATS[match_type]
+    home, away = rng.sample(squads, 2)
+    year = rng.randint(FIRST_YEAR, LAST_YEAR)
+    start = date(year, 1, 1) + timedelta(days=rng.randint(0, 360))
+    days = 5 if match_type == "TEST" else 1
+    xis = {home.team: home.pick_xi(rng, year), away.team: away.pick_xi(rng, year)}
+
+    toss_winner = rng.choice([home.team, away.team])
+    toss_decision = rng.choice(["bat", "field"])
+    first = toss_winner if toss_decision == "bat" else (away.team if toss_winner == home.team else home.team)
+    second = away.team if first == home.team else home.team
+
+    innings = []
+    totals = {first: 0, second: 0}
+    for no in range(fmt["innings"]):
+        batting_team = first if no % 2 == 0 else second
+        bowling_team = second if batting_team == first else first
+        # Only the last innings chases a target
+        target = None
+        if no == fmt["innings"] - 1:
+            target = totals[bowling_team] - totals[batting_team]
+        overs, total, wickets = simulate_innings(rng, fmt, xis[batting_team], xis[bowling_team], target)
+        totals[batting_team] += total
+        innings.append({"team": batting_team, "bowling_team": bowling_team, "overs": overs, "wickets": wickets})
+
+    last = innings[-1]
+    outcome = {}
+    if totals[last["team"]] > totals[last["bowling_team"]]:
+        outcome = {"winner": last["team"], "by": {"wickets": 10 - last["wickets"]}}
+    elif totals[last["team"]] < totals[last["bowling_team"]]:
+        if match_type == "TEST" and last["wickets"] < 10:
+            outcome = {"result": "draw"}
+        else:
+            outcome = {"winner": last["bowling_team"],
+                       "by": {"runs": totals[last["bowling_team"]] - totals[last["team"]]}}
+    else:
+        outcome = {"result": "tie"}
+
+    return {
+        "match_id": match_id,
+        "match_type": match_type,
+        "season": str(year),
+        "dates": [(start + timedelta(days=d)).isoformat() for d in range(days)],
+        "venue": venues[int(len(venues) * rng.random() ** (1 + skew)) % len(venues)],
+        "teams": [home.team, away.team],
+        "toss": {"winner": toss_winner, "decision": toss_decision},
+        "outcome": outcome,
+        "players": xis,
+        "registry": {p: squad.registry[p] for squad in (home, away) for p in xis[squad.team]},
+        "player_of_match": rng.choice(xis[outcome.get("winner", home.team)]),
+        "innings": innings,
+    }
+
+
+def match_csv(match: dict) -> tuple:
+    """(ball CSV, _info.csv) text in Cricsheet csv2 layout"""
+    balls = io.StringIO()
+    writer = csv.writer(balls)
+    writer.writerow(BALL_HEADER)
+    for no, inn in enumerate(match["innings"], start=1):
+        for over, deliveries in inn["overs"]:
+            for n, d in enumerate(deliveries, start=1):
+                kind, out = d["wicket"] or ("", "")
+                extras = (d["wides"] or 0) + (d["noballs"] or 0)
+                writer.writerow([
+                    match["match_id"], match["season"], match["dates"][0], match["venue"], no, f"{over}.{n}",
+                    inn["team"], inn["bowling_team"], d["striker"], d["non_striker"], d["bowler"],
+                    d["runs"], extras, d["wides"] or "", d["noballs"] or "", "", "", "",
+                    kind, out, "", "",
+                ])
+
+    info = io.StringIO()
+    writer = csv.writer(info)
+    writer.writerow(["version", "2.0.0"])
+    writer.writerow(["info", "balls_per_over", 6])
+    for team in match["teams"]:
+        writer.writerow(["info", "team", team])
+    writer.writerow(["info", "gender", "male"])
+    writer.writerow(["info", "season", match["season"]])
+    for day in match["dates"]:
+        writer.writerow(["info", "date", day.replace("-", "/")])
+    writer.writerow(["info", "venue", match["venue"]])
+    writer.writerow(["info", "city", match["venue"].split()[0]])
+    writer.writerow(["info", "toss_winner", match["toss"]["winner"]])
+    writer.writerow(["info", "toss_decision", match["toss"]["decision"]])
+    writer.writerow(["info", "player_of_match", match["player_of_match"]])
+    outcome = match["outcome"]
+    if "winner" in outcome:
+        writer.writerow(["info", "winner", outcome["winner"]])
+        for key, value in outcome["by"].items():
+            writer.writerow(["info", f"winner_{key}", value])
+    else:
+        writer.writerow(["info", "outcome", outcome["result"]])
+    for team, players in match["players"].items():
+        for player in players:
+            writer.writerow(["info", "player", team, player])
+    for player, registry_id in match["registry"].items():
+        writer.writerow(["info", "registry", "people", player, registry_id])
+
+    return balls.getvalue(), info.getvalue()
+
+
+def match_json(match: dict) -> str:
+    """The same match as a Cricsheet JSON document"""
+    innings = []
+    for inn in match["innings"]:
+        overs = []
+        for over, deliveries in inn["overs"]:
+            out = []
+            for d in deliveries:
+                extras = {k: d[k] for k in ("wides", "noballs") if d[k]}
+                entry = {
+                    "batter": d["striker"], "bowler": d["bowler"], "non_striker": d["non_striker"],
+                    "runs": {"batter": d["runs"], "extras": sum(extras.values()),
+                             "total": d["runs"] + sum(extras.values())},
+                }
+                if extras:
+                    entry["extras"] = extras
+                if d["wicket"]:
+                    entry["wickets"] = [{"player_out": d["wicket"][1], "kind": d["wicket"][0]}]
+                out.append(entry)
+            overs.append({"over": over, "deliveries": out})
+        innings.append({"team": inn["team"], "overs": overs})
+
+    return json.dumps({
+        "meta": {"data_version": "1.1.0"},
+        "info": {
+            "balls_per_over": 6,
+            "city": match["venue"].split()[0],
+            "dates": match["dates"],
+            "gender": "male",
+            "match_type": match["match_type"],
+            "outcome": match["outcome"],
+            "player_of_match": [match["player_of_match"]],
+            "players": match["players"],
+            "registry": {"people": match["registry"]},
+            "season": match["season"],
+            "teams": match["teams"],
+            "toss": match["toss"],
+            "venue": match["venue"],
+        },
+        "innings": innings,
+    })
+
+
+def generate_cricket(out_dir: Path, scale: float = 1.0, skew: float = DEFAULT_SKEW, seed: int = DEFAULT_SEED,
+                     with_json: bool = False):
+    """Write the three Cricsheet zips (and JSON zips with with_json)"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    teams_rng = random.Random(seed)
+    squads = [Squad(teams_rng, f"Team {chr(65 + i)}", skew) for i in range(N_TEAMS)]
+    venues = [f"Venue{i:02d} Ground" for i in range(N_VENUES)]
+
+    for offset, (match_type, fmt) in enumerate(FORMATS.items()):
+        rng = random.Random(f"{seed}:{match_type}")
+        n_matches = max(1, round(fmt["matches"] * scale))
+        print(f"  [CRICKET] {match_type}: {n_matches:,} matches -> {fmt['csv']}")
+
+        csv_zip = zipfile.ZipFile(out_dir / fmt["csv"], "w", zipfile.ZIP_DEFLATED)
+        json_zip = zipfile.ZipFile(out_dir / fmt["json"], "w", zipfile.ZIP_DEFLATED) if with_json else None
+        deliveries = 0
+        for i in range(n_matches):
+            match_id = 1_000_000 * (offset + 1) + i
+            match = simulate_match(rng, match_type, match_id, squads, venues, skew)
+            balls, info = match_csv(match)
+            csv_zip.writestr(f"{match_id}.csv", balls)
+            csv_zip.writestr(f"{match_id}_info.csv", info)
+            if json_zip:
+                json_zip.writestr(f"{match_id}.json", match_json(match))
+            deliveries += sum(len(d) for inn in match["innings"] for _, d in inn["overs"])
+        csv_zip.writestr("README.txt", "Synthetic data generated by generate_synthetic.py\n")
+        csv_zip.close()
+        if json_zip:
+            json_zip.close()
+        print(f"    {deliveries:,} deliveries")
+
+
+# ============== IMDb ==============
+
+IMDB_TITLES = 6_000_000
+RATED_SHARE = 0.25
+NAMES_PER_TITLE = 0.5
+
+TITLE_TYPES = ["tvEpisode", "short", "movie", "video", "tvSeries", "tvMovie", "tvMiniSeries",
+               "tvSpecial", "videoGame", "tvShort"]
+TITLE_TYPE_WEIGHTS = [70, 9, 7, 3, 2, 1.5, 0.5, 0.4, 0.4, 0.2]
+
+GENRES = ["Drama", "Comedy", "Documentary", "Talk-Show", "Short", "Romance", "Family", "Animation",
+          "Reality-TV", "News", "Action", "Crime", "Music", "Adventure", "Game-Show", "Thriller",
+          "Horror", "Fantasy", "Mystery", "Sport", "History", "Biography", "Sci-Fi", "Musical",
+          "Western", "War", "Adult", "Film-Noir"]
+
+PROFESSIONS = ["actor", "actress", "producer", "writer", "director", "composer", "cinematographer",
+               "editor", "miscellaneous"]
+CATEGORIES = ["actor", "actress", "self", "director", "writer", "producer", "composer"]
+REGIONS = ["US", "GB", "IN", "FR", "DE", "JP", "ES", "IT", "BR", "CA"]
+
+NULL = "\\N"
+
+
+def _tsv_writer(path: Path, header: list):
+    # compresslevel 1: generation speed matters more than file size here
+    f = gzip.open(path, "wt", encoding="utf-8", compresslevel=1, newline="")
+    f.write("\t".join(header) + "\n")
+    return f
+
+
+def generate_imdb(out_dir: Path, scale: float = 1.0, skew: float = DEFAULT_SKEW, seed: int = DEFAULT_SEED,
+                  lazy_files: bool = False, bad_line_rate: float = 0.0):
+    """Write IMDb-format TSV.gz files; bad_line_rate injects malformed lines to exercise import_rejects"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(f"{seed}:imdb")
+    n_titles = max(10, round(IMDB_TITLES * scale))
+    n_names = max(10, round(n_titles * NAMES_PER_TITLE))
+    genre_weights = zipf_weights(len(GENRES), skew / 2)
+    print(f"  [IMDB] {n_titles:,} titles, {n_names:,} names -> {out_dir}")
+
+    def bad(line: str) -> str:
+        return line.replace("\t", "\t\t", 1) if bad_line_rate and rng.random() < bad_line_rate else line
+
+    with _tsv_writer(out_dir / "title.basics.tsv.gz", ["tconst", "titleType", "primaryTitle", "originalTitle",
+                                                       "isAdult", "startYear", "endYear", "runtimeMinutes",
+                                                       "genres"]) as f:
+        for i in range(1, n_titles + 1):
+            title_type = rng.choices(TITLE_TYPES, TITLE_TYPE_WEIGHTS)[0]
+            year = str(int(2025 - rng.expovariate(1 / 25))) if rng.random() > 0.08 else NULL
+            end_year = str(int(year) + rng.randint(0, 10)) if title_type == "tvSeries" and year != NULL else NULL
+            runtime = str(rng.randint(5, 180)) if rng.random() > 0.3 else NULL
+            genres = ",".join(sorted(set(rng.choices(GENRES, genre_weights, k=rng.randint(1, 3))))) \
+                if rng.random() > 0.05 else NULL
+            title = f"Synthetic Title {i}"
+            f.write(bad(f"tt{i:07d}\t{title_type}\t{title}\t{title}\t{int(rng.random() < 0.02)}\t{year}\t"
+                        f"{end_year}\t{runtime}\t{genres}") + "\n")
+
+    # Votes follow a Pareto tail: a few blockbusters, a long tail of tiny counts
+    with _tsv_writer(out_dir / "title.ratings.tsv.gz", ["tconst", "averageRating", "numVotes"]) as f:
+        alpha = 1 / max(skew, 0.1)
+        for i in range(1, n_titles + 1):
+            if rng.random() < RATED_SHARE:
+                votes = min(3_000_000, int(5 * rng.paretovariate(alpha)))
+                rating = min(10.0, max(1.0, round(rng.gauss(6.5 + 0.2 * math.log10(votes), 1.2), 1)))
+                f.write(bad(f"tt{i:07d}\t{rating}\t{votes}") + "\n")
+
+    with _tsv_writer(out_dir / "name.basics.tsv.gz", ["nconst", "primaryName", "birthYear", "deathYear",
+                                                      "primaryProfession", "knownForTitles"]) as f:
+        for i in range(1, n_names + 1):
+            birth = str(rng.randint(1900, 2010)) if rng.random() > 0.7 else NULL
+            death = str(int(birth) + rng.randint(30, 95)) if birth != NULL and rng.random() < 0.1 else NULL
+            professions = ",".join(rng.sample(PROFESSIONS, rng.randint(1, 3)))
+            known = ",".join(f"tt{rng.randint(1, n_titles):07d}" for _ in range(rng.randint(1, 4)))
+            f.write(bad(f"nm{i:07d}\tSynthetic Person {i}\t{birth}\t{death}\t{professions}\t{known}") + "\n")
+
+    if not lazy_files:
+        return
+
+    with _tsv_writer(out_dir / "title.akas.tsv.gz", ["titleId", "ordering", "title", "region", "language",
+                                                     "types", "attributes", "isOriginalTitle"]) as f:
+        for i in range(1, n_titles + 1):
+            for ordering in range(1, rng.randint(1, 5) + 1):
+                region = rng.choice(REGIONS) if ordering > 1 else NULL
+                f.write(f"tt{i:07d}\t{ordering}\tSynthetic Title {i} ({region})\t{region}\t{NULL}\t"
+                        f"{NULL}\t{NULL}\t{int(ordering == 1)}\n")
+
+    with _tsv_writer(out_dir / "title.principals.tsv.gz", ["tconst", "ordering", "nconst", "category", "job",
+                                                           "characters"]) as f:
+        for i in range(1, n_titles + 1):
+            for ordering in range(1, rng.randint(2, 8) + 1):
+                # Popular people: index drawn from a power law over n_names
+                person = 1 + int(n_names * rng.random() ** (1 + skew)) % n_names
+                category = rng.choice(CATEGORIES)
+                characters = f'["Character {ordering}"]' if category in ("actor", "actress", "self") else NULL
+                f.write(f"tt{i:07d}\t{ordering}\tnm{person:07d}\t{category}\t{NULL}\t{characters}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Cricsheet / IMDb files for offline scale tests")
+    parser.add_argument("dataset", choices=["cricket", "imdb", "all"])
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--scale", type=float, default=1.0, help="1.0 = roughly the real data volume")
+    parser.add_argument("--skew", type=float, default=DEFAULT_SKEW, help="Zipf exponent for popularity (0 = uniform)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--json", action="store_true", help="Also write Cricsheet *_json.zip archives")
+    parser.add_argument("--lazy-files", action="store_true", help="Also write title.akas / title.principals")
+    parser.add_argument("--bad-line-rate", type=float, default=0.0, help="Share of malformed IMDb lines")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Synthetic data: {args.dataset}, scale {args.scale}, skew {args.skew}, seed {args.seed}")
+    print("=" * 60)
+    if args.dataset in ("cricket", "all"):
+        generate_cricket(args.out_dir, args.scale, args.skew, args.seed, args.json)
+    if args.dataset in ("imdb", "all"):
+        generate_imdb(args.out_dir, args.scale, args.skew, args.seed, args.lazy_files, args.bad_line_rate)
+    print("Done")
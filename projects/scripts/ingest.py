@@ -0,0 +1,290 @@
+"""
+Ingestion Framework
+===================
+Shared plumbing for the Cricsheet and IMDb build scripts:
+- Source adapters (LocalSource, HttpSource): locate or download raw files
+- TableSchema: typed table declarations
+- Stage / Pipeline: ordered build stages with skip-if-unchanged caching,
+  per-stage timing and row counts, build profile and resource monitoring
+
+A stage's fingerprint covers its function source (plus any helper functions
+listed), its params, the size and mtime of its input files and the
+fingerprints of the stages it depends on.
+Fingerprints are kept in the _ingest_stages table of the target database.
+A stage is skipped when its fingerprint matches and its outputs exist: its
+tables, plus any views (table or view) and files it declares. When a stage
+is rebuilt, tables it produced last time but no longer declares (e.g. the
+JSON-only reviews table after switching to csv) are dropped.
+A stage fn that decides not to build (e.g. a refresh guard) raises
+StageSkipped: its fingerprint isn't recorded, so it runs (and warns) again
+on the next build instead of being reported as cached.
+After every run a metadata manifest (catalog.py) is written next to the
+database; its build version is a hash of the stage fingerprints.
+
+Example:
+    source = LocalSource(DATA_DIR, ["t20s_csv2.zip"])
+    files = source.fetch()
+    pipeline = Pipeline("cricsheet", DATA_DIR / "cricket.duckdb", [
+        Stage("load", load_tables, inputs=files.values(), outputs=["ball_by_ball"]),
+        Stage("matchup", create_matchup_table, deps=["load"], outputs=["matchup"]),
+    ])
+    conn = pipeline.run()
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+from build_profiles import apply_profile, BuildMonitor
+from catalog import write_manifest
+
+STAGES_TABLE = "_ingest_stages"
+
+
+# ============== Sources ==============
+
+class LocalSource:
+    """Files expected to already be in data_dir (e.g. manually downloaded zips)."""
+
+    def __init__(self, data_dir: Path, files: list):
+        self.data_dir = Path(data_dir)
+        self.files = list(files)
+
+    def fetch(self, force: bool = False) -> dict:
+        """Return {filename: path} for the files that exist."""
+        found = {}
+        for filename in self.files:
+            path = self.data_dir / filename
+            if path.exists():
+                found[filename] = path
+            else:
+                print(f"WARNING: {path} not found, skipping...")
+        return found
+
+
+class HttpSource(LocalSource):
+    """Files downloaded from base_url into data_dir when missing (or when forced)."""
+
+    def __init__(self, base_url: str, data_dir: Path, files: list):
+        super().__init__(data_dir, files)
+        self.base_url = base_url
+
+    def download(self, filename: str, force: bool = False) -> Path:
+        """Download a file if not already present"""
+        filepath = self.data_dir / filename
+
+        if filepath.exists() and not force:
+            print(f"  [SKIP] {filename} already exists ({filepath.stat().st_size / 1024 / 1024:.1f} MB)")
+            return filepath
+
+        url = self.base_url + filename
+        print(f"  [DOWNLOAD] {filename}...")
+
+        # Download with progress
+        def report_progress(block_num, block_size, total_size):
+            downloaded = block_num * block_size
+            percent = min(100, downloaded * 100 / total_size) if total_size > 0 else 0
+            mb_downloaded = downloaded / 1024 / 1024
+            mb_total = total_size / 1024 / 1024
+            print(f"\r    {mb_downloaded:.1f} / {mb_total:.1f} MB ({percent:.1f}%)", end="", flush=True)
+
+        # Download to a temp name so an interrupted download never looks complete
+        partial = filepath.with_name(filepath.name + ".part")
+        urllib.request.urlretrieve(url, partial, reporthook=report_progress)
+        partial.replace(filepath)
+        print()  # newline after progress
+
+        return filepath
+
+    def fetch(self, force: bool = False) -> dict:
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        return {filename: self.download(filename, force) for filename in self.files}
+
+
+# ============== Schemas ==============
+
+class TableSchema:
+    """Typed declaration of a table: ordered {column: type} plus optional primary key."""
+
+    def __init__(self, name: str, columns: dict, primary_key: Optional[str] = None):
+        self.name = name
+        self.columns = dict(columns)
+        self.primary_key = primary_key
+
+    def __repr__(self):
+        # Stable repr: schemas are part of stage fingerprints
+        return f"TableSchema({self.name!r}, {self.columns!r}, primary_key={self.primary_key!r})"
+
+    def create_sql(self, primary_key: bool = True) -> str:
+        cols = []
+        for column, col_type in self.columns.items():
+            suffix = " PRIMARY KEY" if primary_key and column == self.primary_key else ""
+            cols.append(f"{column} {col_type}{suffix}")
+        return f"CREATE TABLE IF NOT EXISTS {self.name} (\n    " + ",\n    ".join(cols) + "\n)"
+
+    def read_csv_columns(self) -> str:
+        """The columns={...} argument for read_csv, so the reader casts to the declared types."""
+        return "{" + ", ".join(f"'{c}': '{t}'" for c, t in self.columns.items()) + "}"
+
+
+# ============== Stages ==============
+
+class StageSkipped(Exception):
+    """Raised by a stage fn that left its outputs as they were; the message says why."""
+
+
+class Stage:
+    """
+    One build step. fn(conn) creates the output tables; its return value is
+    kept in the pipeline results. With replace=True the outputs are dropped
+    before fn runs, so fn can use plain CREATE TABLE. views (names that may be
+    a table or a view) and files (paths) are outputs that are only checked
+    for existence, never dropped or counted. Keyword arguments of a
+    functools.partial fn named in `ignore` (mode switches that don't change
+    the result) are left out of the fingerprint.
+    """
+
+    def __init__(self, name: str, fn, outputs=(), inputs=(), deps=(), params: Optional[dict] = None,
+                 helpers=(), ignore=(), replace: bool = True, views=(), files=()):
+        self.name = name
+        self.fn = fn
+        self.helpers = list(helpers)
+        self.outputs = list(outputs)
+        self.views = list(views)
+        self.files = [Path(p) for p in files]
+        self.inputs = [Path(p) for p in inputs]
+        self.deps = list(deps)
+        self.params = params or {}
+        self.replace = replace
+        self.ignore = set(ignore)
+
+    def fingerprint(self, dep_fingerprints: dict) -> str:
+        fn = self.fn
+        params = dict(self.params)
+        if isinstance(fn, functools.partial):
+            keywords = sorted((k, v) for k, v in fn.keywords.items() if k not in self.ignore)
+            params["__partial__"] = [repr(a) for a in fn.args] + [f"{k}={v!r}" for k, v in keywords]
+            fn = fn.func
+
+        h = hashlib.sha256()
+        for code in [fn] + self.helpers:
+            h.update(inspect.getsource(code).encode())
+        h.update(json.dumps(params, sort_keys=True, default=str).encode())
+        for path in sorted(self.inputs):
+            stat = path.stat()
+            h.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        for dep in self.deps:
+            h.update(dep_fingerprints[dep].encode())
+        return h.hexdigest()[:16]
+
+
+class Pipeline:
+    """
+    Runs stages in order against one database file, skipping unchanged stages.
+    hot_columns ({table: [columns]}) is recorded in the manifest for warm-up.
+    """
+
+    def __init__(self, name: str, db_path: Path, stages: list, force: bool = False, profile: Optional[str] = None,
+                 hot_columns: Optional[dict] = None):
+        self.name = name
+        self.db_path = Path(db_path)
+        self.stages = stages
+        self.force = force
+        self.profile = profile
+        self.hot_columns = hot_columns or {}
+        self.results = {}
+
+    def _cached(self, conn: duckdb.DuckDBPyConnection, stage: Stage, fingerprint: str) -> bool:
+        if self.force:
+            return False
+        row = conn.execute(f"SELECT fingerprint FROM {STAGES_TABLE} WHERE stage = ?", [stage.name]).fetchone()
+        if row is None or row[0] != fingerprint:
+            return False
+        tables = {r[0] for r in conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+        views = {r[0] for r in conn.execute("SELECT view_name FROM duckdb_views() WHERE NOT internal").fetchall()}
+        return (all(table in tables for table in stage.outputs)
+                and all(name in tables | views for name in stage.views)
+                and all(path.exists() for path in stage.files))
+
+    def _stale_outputs(self, conn: duckdb.DuckDBPyConnection, stage: Stage) -> list:
+        """Tables the stage recorded last time that it no longer declares"""
+        row = conn.execute(f"SELECT outputs FROM {STAGES_TABLE} WHERE stage = ?", [stage.name]).fetchone()
+        return [t for t in json.loads(row[0]) if t not in stage.outputs] if row else []
+
+    def _record(self, conn, stage: Stage, fingerprint: str, seconds: float, rows: dict):
+        conn.execute(f"""
+            INSERT OR REPLACE INTO {STAGES_TABLE} VALUES (?, ?, ?, ?, ?, ?)
+        """, [stage.name, fingerprint, json.dumps(stage.outputs), json.dumps(rows), seconds, datetime.now()])
+
+    def run(self) -> duckdb.DuckDBPyConnection:
+        """Run all stages and return the open connection (caller closes it)."""
+        print(f"\n[PIPELINE] {self.name} -> {self.db_path}")
+
+        conn = duckdb.connect(str(self.db_path))
+        apply_profile(conn, self.db_path, self.profile)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {STAGES_TABLE} (
+                stage VARCHAR PRIMARY KEY,
+                fingerprint VARCHAR,
+                outputs VARCHAR,
+                row_counts VARCHAR,
+                seconds DOUBLE,
+                built_at TIMESTAMP
+            )
+        """)
+
+        fingerprints = {}
+        with BuildMonitor(conn):
+            for stage in self.stages:
+                fingerprint = stage.fingerprint(fingerprints)
+                fingerprints[stage.name] = fingerprint
+
+                if self._cached(conn, stage, fingerprint):
+                    print(f"  [CACHED] {stage.name}")
+                    self.results[stage.name] = {"status": "cached", "seconds": 0.0, "result": None}
+                    continue
+
+                print(f"  [STAGE] {stage.name}")
+                for table in self._stale_outputs(conn, stage):
+                    print(f"    [DROP] {table} (no longer produced by {stage.name})")
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                if stage.replace:
+                    for table in stage.outputs:
+                        conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+                start = time.perf_counter()
+                try:
+                    result = stage.fn(conn)
+                except StageSkipped as e:
+                    print(f"    [SKIPPED] {e}")
+                    self.results[stage.name] = {"status": "skipped", "seconds": time.perf_counter() - start,
+                                                "result": None}
+                    continue
+                seconds = time.perf_counter() - start
+
+                rows = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in stage.outputs}
+                self._record(conn, stage, fingerprint, seconds, rows)
+                self.results[stage.name] = {"status": "built", "seconds": seconds, "result": result}
+
+                counts = ", ".join(f"{t}={n:,}" for t, n in rows.items())
+                print(f"    {seconds:.1f}s {counts}".rstrip())
+
+        conn.execute("CHECKPOINT")
+        self.print_timings()
+
+        build_version = hashlib.sha256(json.dumps(fingerprints, sort_keys=True).encode()).hexdigest()[:12]
+        write_manifest(conn, self.db_path, self.name, build_version, self.hot_columns)
+        return conn
+
+    def print_timings(self):
+        print(f"\n  {'stage':<24} {'status':<8} {'time':>8}")
+        for name, result in self.results.items():
+            print(f"  {name:<24} {result['status']:<8} {result['seconds']:7.1f}s")
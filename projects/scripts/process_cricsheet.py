@@ -1,37 +1,96 @@
 """
 Cricsheet Data Processing Script
 ================================
-Processes ball-by-ball and match info CSVs from cricsheet.org zip files
-and loads them into a DuckDB database.
+Processes ball-by-ball and match info from cricsheet.org zip files and loads
+them into a DuckDB database. Two input formats are supported:
+- csv (default): *_csv2.zip, one ball CSV plus one _info.csv per match
+- json: *_json.zip, one JSON document per match (single pass, richer data)
 
 Output Tables:
-- ball_by_ball: All deliveries with match_type column (T20/ODI/TEST)
+- ball_by_ball: All deliveries with match_type column (T20/ODI/TEST) and
+  delivery_seq (position in the match; "ball" is over.delivery as a DOUBLE,
+  so the 10th delivery of an over, 0.10, reads as 0.1 - order by delivery_seq)
 - match_info: Flattened metadata (one row per match)
+- matchup: Batter vs bowler aggregates per (striker_id, bowler_id, match_type, year)
+- batting_progression: Per-innings batting with career totals and rolling form
+- bowling_progression: Per-innings bowling with career totals and rolling form
+- player_season: Per (player, match_type, year) batting and bowling splits
+- player_leaderboard: Top-K batters by runs and bowlers by wickets per format and year
+- player_registry: Cricsheet registry id for every player in every match
+- players: Canonical player per registry id with aliases and a normalized search key
+- player_splits: Batting/bowling cube per player_id by format, year, opponent and venue
+- innings_state: Score, wickets, partnership and chase state after every delivery
+
+JSON format only:
+- reviews: DRS reviews (who reviewed, umpire, decision)
+- powerplays: Powerplay ranges per innings
+
+Next to the database, cricket.balls/ holds ball_by_ball as memory-mappable
+NumPy arrays for full-history replays (see ball_archive.py).
 
 Usage:
     python process_cricsheet.py
+    python process_cricsheet.py --format json
+    python process_cricsheet.py --data-dir /path/to/zips --force
+    python process_cricsheet.py --benchmark   # parse throughput, csv vs json
+    BUILD_PROFILE=small-vps python process_cricsheet.py   # see build_profiles.py
 
-Re-run monthly to refresh data (drops and recreates tables).
+Re-run monthly to refresh data. Stages run through ingest.Pipeline: a stage
+is skipped when its inputs and code are unchanged (--force rebuilds all).
 """
 
 import zipfile
 import io
 import csv
 import os
+import json
+import time
+import argparse
+import functools
+import itertools
 from pathlib import Path
 import duckdb
 
+# orjson is optional; it parses the JSON archives several times faster
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+from ingest import LocalSource, Pipeline, Stage
+import ball_archive
+
 # Configuration
 SCRIPT_DIR = Path(__file__).parent
 DATA_DIR = SCRIPT_DIR.parent / "cricsheet-data"
 OUTPUT_DB = DATA_DIR / "cricket.duckdb"
 
 ZIP_FILES = {
-    "T20": DATA_DIR / "t20s_csv2.zip",
-    "ODI": DATA_DIR / "odis_csv2.zip",
-    "TEST": DATA_DIR / "tests_csv2.zip",
+    "T20": "t20s_csv2.zip",
+    "ODI": "odis_csv2.zip",
+    "TEST": "tests_csv2.zip",
+}
+
+JSON_ZIP_FILES = {
+    "T20": "t20s_json.zip",
+    "ODI": "odis_json.zip",
+    "TEST": "tests_json.zip",
 }
 
+# ball_by_ball columns as written by the csv2 format (match_type and delivery_seq are appended)
+BALL_COLUMNS = [
+    "match_id", "season", "start_date", "venue", "innings", "ball",
+    "batting_team", "bowling_team", "striker", "non_striker", "bowler",
+    "runs_off_bat", "extras", "wides", "noballs", "byes", "legbyes", "penalty",
+    "wicket_type", "player_dismissed", "other_wicket_type", "other_player_dismissed",
+    "match_type", "delivery_seq",
+]
+
+REGISTRY_COLUMNS = ["match_id", "team", "player", "registry_id"]
+REVIEW_COLUMNS = ["match_id", "innings", "ball", "review_by", "umpire", "batter", "decision", "review_type"]
+POWERPLAY_COLUMNS = ["match_id", "innings", "from_ball", "to_ball", "powerplay_type"]
+
 # Metadata fields to extract (in order)
 METADATA_FIELDS = [
     "match_id",
@@ -58,9 +117,64 @@ METADATA_FIELDS = [
     "match_referee",
 ]
 
+# Wicket types NOT credited to the bowler (see docs/DASHBOARD_PLAN.md)
+NON_BOWLER_WICKETS = [
+    "run out",
+    "retired hurt",
+    "retired not out",
+    "retired out",
+    "obstructing the field",
+]
+
+# Wicket types that leave the batter not out
+NOT_OUT_WICKETS = [
+    "retired hurt",
+    "retired not out",
+]
+
+# Window size (innings) for rolling form columns in the progression tables
+ROLLING_INNINGS = 10
+
+# Players kept per (metric, match_type, year) leaderboard
+LEADERBOARD_K = 100
+
+# Optional filter dimensions of the player_splits cube (player_id and role are always grouped)
+SPLIT_DIMENSIONS = ["match_type", "year", "opponent", "venue"]
+
+# Overs per innings for limited-overs formats (balls remaining, chase targets)
+MAX_OVERS = {"T20": 20, "ODI": 50}
+
+# Columns the dashboard pages filter and aggregate on, pre-loaded after open
+HOT_COLUMNS = {
+    "ball_by_ball": ["match_type", "start_date", "striker", "bowler", "batting_team", "bowling_team",
+                     "runs_off_bat", "wicket_type", "player_dismissed"],
+    "match_info": ["match_type", "start_date", "team1", "team2", "winner"],
+    "matchup": ["striker_id", "bowler_id", "match_type", "year"],
+    "player_leaderboard": ["metric", "match_type", "year"],
+    "players": ["player_id", "name", "search_key"],
+    "player_splits": ["player_id", "role", "match_type", "year", "opponent", "venue"],
+}
+
+
+def sql_list(values: list) -> str:
+    """Render a list of strings as a SQL IN-list body."""
+    return ", ".join(f"'{v}'" for v in values)
+
+
+def player_id_join(alias: str, name: str, team: str) -> tuple:
+    """
+    (join, expression) resolving ball_by_ball b's name column to players.player_id:
+    the registry id of that name in the match's team, else 'name:<name>'
+    (as in create_players_table). Two players sharing a name stay apart.
+    """
+    join = f"""LEFT JOIN (
+            SELECT match_id, team, player, MIN(registry_id) AS registry_id FROM player_registry GROUP BY ALL
+        ) {alias} ON {alias}.match_id = b.match_id AND {alias}.team = b.{team} AND {alias}.player = b.{name}"""
+    return join, f"COALESCE({alias}.registry_id, 'name:' || b.{name})"
+
 
 def parse_info_csv(content: str, match_id: str, match_type: str) -> dict:
-    """Parse an _info.csv file into a flat dictionary."""
+    """Parse an _info.csv file into a flat dictionary (plus its player registry rows under "registry")."""
     info = {field: None for field in METADATA_FIELDS}
     info["match_id"] = match_id
     info["match_type"] = match_type
@@ -68,6 +182,8 @@ def parse_info_csv(content: str, match_id: str, match_type: str) -> dict:
     teams = []
     umpires = []
     dates = []
+    players = []  # (team, player)
+    people = {}   # player -> Cricsheet registry id
 
     reader = csv.reader(io.StringIO(content))
     for row in reader:
@@ -78,7 +194,11 @@ def parse_info_csv(content: str, match_id: str, match_type: str) -> dict:
             key = row[1]
             value = row[2] if len(row) > 2 else None
 
-            if key == "team":
+            if key == "player" and len(row) > 3:
+                players.append((value, row[3]))
+            elif key == "registry" and value == "people" and len(row) > 4:
+                people[row[3]] = row[4]
+            elif key == "team":
                 teams.append(value)
             elif key == "date":
                 dates.append(value)
@@ -131,6 +251,9 @@ def parse_info_csv(content: str, match_id: str, match_type: str) -> dict:
     if dates:
         info["start_date"] = dates[0]
 
+    # player_registry rows (REGISTRY_COLUMNS); not a match_info field
+    info["registry"] = [[match_id, team, player, people.get(player)] for team, player in players]
+
     return info
 
 
@@ -166,12 +289,12 @@ def process_zip_file(zip_path: Path, match_type: str):
                 for row_idx, row in enumerate(reader):
                     if row_idx == 0:
                         if not header_added:
-                            # Add match_type to header
-                            ball_rows.append(row + ['match_type'])
+                            # Add match_type and delivery_seq to header
+                            ball_rows.append(row + ['match_type', 'delivery_seq'])
                             header_added = True
                         continue
-                    # Add match_type to each row
-                    ball_rows.append(row + [match_type])
+                    # Add match_type and the delivery's position in the file to each row
+                    ball_rows.append(row + [match_type, row_idx])
 
             if (i + 1) % 500 == 0:
                 print(f"    Processed {i + 1}/{len(ball_files)} ball-by-ball files...")
@@ -192,82 +315,735 @@ def process_zip_file(zip_path: Path, match_type: str):
     return ball_rows, info_rows
 
 
-def create_database():
-    """Process all zip files and create DuckDB database."""
-    print("=" * 60)
-    print("Cricsheet Data Processing")
-    print("=" * 60)
+def parse_match_json(data: bytes, match_id: str, match_type: str) -> dict:
+    """
+    Parse one Cricsheet JSON match into csv2-shaped ball rows, a match_info dict
+    and rows for the registry/review/powerplay detail tables.
+    Extras that did not occur are None, as in the csv2 files.
+    """
+    match = json_loads(data)
+    info = match["info"]
+
+    teams = info.get("teams", [])
+    dates = info.get("dates", [])
+    officials = info.get("officials", {})
+    outcome = info.get("outcome", {})
+    by = outcome.get("by", {})
+    toss = info.get("toss", {})
+    event = info.get("event", {})
+    umpires = officials.get("umpires", [])
+    season = str(info.get("season")) if info.get("season") is not None else None
+    start_date = dates[0] if dates else None
+
+    first = lambda values: values[0] if values else None
+    match_info = {
+        "match_id": match_id,
+        "match_type": match_type,
+        "team1": teams[0] if len(teams) >= 1 else None,
+        "team2": teams[1] if len(teams) >= 2 else None,
+        "gender": info.get("gender"),
+        "season": season,
+        "start_date": start_date,
+        "venue": info.get("venue"),
+        "city": info.get("city") or None,
+        "event": event.get("name"),
+        "match_number": event.get("match_number"),
+        "toss_winner": toss.get("winner"),
+        "toss_decision": toss.get("decision"),
+        "winner": outcome.get("winner"),
+        "winner_runs": by.get("runs"),
+        "winner_wickets": by.get("wickets"),
+        "player_of_match": first(info.get("player_of_match", [])),
+        "umpire1": umpires[0] if len(umpires) >= 1 else None,
+        "umpire2": umpires[1] if len(umpires) >= 2 else None,
+        "tv_umpire": first(officials.get("tv_umpires", [])),
+        "reserve_umpire": first(officials.get("reserve_umpires", [])),
+        "match_referee": first(officials.get("match_referees", [])),
+    }
+
+    people = info.get("registry", {}).get("people", {})
+    registry_rows = [
+        [match_id, team, player, people.get(player)]
+        for team, players in info.get("players", {}).items()
+        for player in players
+    ]
+
+    ball_rows = []
+    review_rows = []
+    powerplay_rows = []
+    seq = 0
+    for innings_no, innings in enumerate(match.get("innings", []), start=1):
+        batting_team = innings["team"]
+        bowling_team = next((t for t in teams if t != batting_team), None)
+
+        for pp in innings.get("powerplays", []):
+            powerplay_rows.append([match_id, innings_no, pp.get("from"), pp.get("to"), pp.get("type")])
+
+        for over in innings.get("overs", []):
+            for n, delivery in enumerate(over["deliveries"], start=1):
+                ball = f"{over['over']}.{n}"
+                seq += 1
+                runs = delivery["runs"]
+                extras = delivery.get("extras", {})
+                wickets = delivery.get("wickets", [])
+                w1 = wickets[0] if len(wickets) >= 1 else {}
+                w2 = wickets[1] if len(wickets) >= 2 else {}
+
+                ball_rows.append([
+                    match_id, season, start_date, info.get("venue"), innings_no, ball,
+                    batting_team, bowling_team,
+                    delivery["batter"], delivery["non_striker"], delivery["bowler"],
+                    runs["batter"], runs["extras"],
+                    extras.get("wides"), extras.get("noballs"), extras.get("byes"),
+                    extras.get("legbyes"), extras.get("penalty"),
+                    w1.get("kind"), w1.get("player_out"), w2.get("kind"), w2.get("player_out"),
+                    match_type, seq,
+                ])
 
+                review = delivery.get("review")
+                if review:
+                    review_rows.append([
+                        match_id, innings_no, ball, review.get("by"), review.get("umpire"),
+                        review.get("batter"), review.get("decision"), review.get("type"),
+                    ])
+
+    return {
+        "balls": ball_rows,
+        "info": match_info,
+        "registry": registry_rows,
+        "reviews": review_rows,
+        "powerplays": powerplay_rows,
+    }
+
+
+def process_json_zip(zip_path: Path, match_type: str) -> dict:
+    """Parse every match JSON in a Cricsheet *_json.zip archive (one pass per match)."""
+    print(f"Processing {zip_path.name}...")
+
+    parsed = {"balls": [], "info": [], "registry": [], "reviews": [], "powerplays": []}
+
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        match_files = [f for f in zf.namelist() if f.endswith('.json')]
+        print(f"  Found {len(match_files)} match files")
+
+        for i, filename in enumerate(match_files):
+            match = parse_match_json(zf.read(filename), filename.replace('.json', ''), match_type)
+            parsed["balls"].extend(match["balls"])
+            parsed["info"].append(match["info"])
+            parsed["registry"].extend(match["registry"])
+            parsed["reviews"].extend(match["reviews"])
+            parsed["powerplays"].extend(match["powerplays"])
+
+            if (i + 1) % 500 == 0:
+                print(f"    Processed {i + 1}/{len(match_files)} match files...")
+
+    print(f"  Done: {len(parsed['balls'])} ball rows, {len(parsed['info'])} matches")
+    return parsed
+
+
+def create_table_from_rows(conn: duckdb.DuckDBPyConnection, table: str, header: list, rows: list):
+    """Load rows into a new table via a temp CSV, letting DuckDB infer column types."""
+    print(f"Creating {table} table...")
+
+    # Write to temp CSV for DuckDB to read (more efficient for large data)
+    temp_csv = DATA_DIR / f"temp_{table}.csv"
+    with open(temp_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+    conn.execute(f"""
+        CREATE TABLE {table} AS
+        SELECT * FROM read_csv_auto('{temp_csv.as_posix()}', header=true)
+    """)
+
+    # Clean up temp file
+    os.remove(temp_csv)
+
+
+def create_matchup_table(conn: duckdb.DuckDBPyConnection):
+    """
+    Pre-aggregate ball_by_ball into one row per (striker_id, bowler_id,
+    match_type, year), keyed by players.player_id so two players sharing a
+    name are separate matchups (striker/bowler hold a delivery spelling).
+    Rows are sorted by striker_id/bowler_id so head-to-head lookups only
+    touch a few row groups instead of scanning every delivery.
+    """
+    print("Creating matchup table...")
+
+    excluded = sql_list(NON_BOWLER_WICKETS)
+    striker_join, striker_id = player_id_join("rs", "striker", "batting_team")
+    bowler_join, bowler_id = player_id_join("rb", "bowler", "bowling_team")
+
+    conn.execute(f"""
+        CREATE TABLE matchup AS
+        SELECT
+            {striker_id} AS striker_id,
+            {bowler_id} AS bowler_id,
+            ANY_VALUE(b.striker) AS striker,
+            ANY_VALUE(b.bowler) AS bowler,
+            b.match_type,
+            CAST(YEAR(b.start_date) AS INTEGER) AS year,
+            CAST(COUNT(*) AS INTEGER) AS balls,
+            CAST(SUM(b.runs_off_bat) AS INTEGER) AS runs,
+            CAST(SUM(CASE
+                WHEN b.wicket_type IS NOT NULL
+                  AND b.player_dismissed = b.striker
+                  AND b.wicket_type NOT IN ({excluded})
+                THEN 1 ELSE 0
+            END) AS INTEGER) AS dismissals,
+            CAST(SUM(CASE
+                WHEN b.runs_off_bat = 0 AND COALESCE(b.wides, 0) = 0 AND COALESCE(b.noballs, 0) = 0
+                THEN 1 ELSE 0
+            END) AS INTEGER) AS dots,
+            CAST(SUM(CASE WHEN b.runs_off_bat = 4 THEN 1 ELSE 0 END) AS INTEGER) AS fours,
+            CAST(SUM(CASE WHEN b.runs_off_bat = 6 THEN 1 ELSE 0 END) AS INTEGER) AS sixes
+        FROM ball_by_ball b
+        {striker_join}
+        {bowler_join}
+        GROUP BY striker_id, bowler_id, b.match_type, year
+        ORDER BY striker_id, bowler_id, b.match_type, year
+    """)
+
+    # Table is physically sorted by striker_id; index covers bowler-side lookups
+    conn.execute("CREATE INDEX idx_matchup_bowler ON matchup(bowler_id)")
+
+
+def create_progression_tables(conn: duckdb.DuckDBPyConnection, rolling_innings: int = ROLLING_INNINGS):
+    """
+    Build career-progression tables with window functions in a single pass each:
+    - batting_progression / bowling_progression: one row per player innings with
+      career-to-date totals and rolling averages over the last N innings
+    - player_season: per-season splits derived from the two tables above
+    All three are sorted by player so chart queries are simple range scans.
+    """
+    print("Creating progression tables...")
+
+    not_out = sql_list(NOT_OUT_WICKETS)
+    excluded = sql_list(NON_BOWLER_WICKETS)
+
+    career = "PARTITION BY player, match_type ORDER BY start_date, match_id, innings"
+    windows = f"""
+        WINDOW
+            career AS ({career} ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW),
+            recent AS ({career} ROWS BETWEEN {rolling_innings - 1} PRECEDING AND CURRENT ROW)
+    """
+
+    # Dismissals are keyed on player_dismissed so non-striker run outs count too
+    conn.execute(f"""
+        CREATE TABLE batting_progression AS
+        WITH faced AS (
+            SELECT
+                striker AS player, match_type, match_id, innings,
+                MIN(start_date) AS start_date,
+                MIN(batting_team) AS team,
+                CAST(SUM(runs_off_bat) AS INTEGER) AS runs,
+                CAST(COUNT(*) AS INTEGER) AS balls
+            FROM ball_by_ball
+            GROUP BY striker, match_type, match_id, innings
+        ),
+        outs AS (
+            SELECT
+                player_dismissed AS player, match_type, match_id, innings,
+                MIN(start_date) AS start_date,
+                MIN(batting_team) AS team
+            FROM ball_by_ball
+            WHERE player_dismissed IS NOT NULL
+              AND wicket_type NOT IN ({not_out})
+            GROUP BY player_dismissed, match_type, match_id, innings
+        ),
+        innings_totals AS (
+            SELECT
+                COALESCE(f.player, o.player) AS player,
+                COALESCE(f.match_type, o.match_type) AS match_type,
+                COALESCE(f.match_id, o.match_id) AS match_id,
+                COALESCE(f.innings, o.innings) AS innings,
+                COALESCE(f.start_date, o.start_date) AS start_date,
+                COALESCE(f.team, o.team) AS team,
+                COALESCE(f.runs, 0) AS runs,
+                COALESCE(f.balls, 0) AS balls,
+                CASE WHEN o.player IS NOT NULL THEN 1 ELSE 0 END AS dismissed
+            FROM faced f
+            FULL OUTER JOIN outs o
+              ON f.player = o.player AND f.match_id = o.match_id AND f.innings = o.innings
+        )
+        SELECT
+            player, match_type, match_id, innings, start_date, team,
+            runs, balls, dismissed,
+            CAST(ROW_NUMBER() OVER career AS INTEGER) AS innings_no,
+            CAST(SUM(runs) OVER career AS INTEGER) AS career_runs,
+            CAST(SUM(balls) OVER career AS INTEGER) AS career_balls,
+            CAST(SUM(dismissed) OVER career AS INTEGER) AS career_dismissals,
+            ROUND(SUM(runs) OVER career / NULLIF(SUM(dismissed) OVER career, 0), 2) AS career_average,
+            ROUND(SUM(runs) OVER recent / NULLIF(SUM(dismissed) OVER recent, 0), 2) AS rolling_average,
+            ROUND(SUM(runs) OVER recent * 100.0 / NULLIF(SUM(balls) OVER recent, 0), 2) AS rolling_strike_rate
+        FROM innings_totals
+        {windows}
+        ORDER BY player, match_type, innings_no
+    """)
+
+    conn.execute(f"""
+        CREATE TABLE bowling_progression AS
+        WITH innings_totals AS (
+            SELECT
+                bowler AS player, match_type, match_id, innings,
+                MIN(start_date) AS start_date,
+                MIN(bowling_team) AS team,
+                CAST(COUNT(*) AS INTEGER) AS balls,
+                CAST(SUM(runs_off_bat + COALESCE(wides, 0) + COALESCE(noballs, 0)) AS INTEGER) AS runs_conceded,
+                CAST(SUM(CASE
+                    WHEN wicket_type IS NOT NULL AND wicket_type NOT IN ({excluded})
+                    THEN 1 ELSE 0
+                END) AS INTEGER) AS wickets
+            FROM ball_by_ball
+            GROUP BY bowler, match_type, match_id, innings
+        )
+        SELECT
+            player, match_type, match_id, innings, start_date, team,
+            balls, runs_conceded, wickets,
+            CAST(ROW_NUMBER() OVER career AS INTEGER) AS innings_no,
+            CAST(SUM(wickets) OVER career AS INTEGER) AS career_wickets,
+            CAST(SUM(runs_conceded) OVER career AS INTEGER) AS career_runs_conceded,
+            CAST(SUM(balls) OVER career AS INTEGER) AS career_balls,
+            ROUND(SUM(runs_conceded) OVER career / NULLIF(SUM(wickets) OVER career, 0), 2) AS career_average,
+            ROUND(SUM(runs_conceded) OVER recent / NULLIF(SUM(wickets) OVER recent, 0), 2) AS rolling_average,
+            ROUND(SUM(runs_conceded) OVER recent * 6.0 / NULLIF(SUM(balls) OVER recent, 0), 2) AS rolling_economy
+        FROM innings_totals
+        {windows}
+        ORDER BY player, match_type, innings_no
+    """)
+
+    conn.execute("""
+        CREATE TABLE player_season AS
+        WITH bat AS (
+            SELECT
+                player, match_type, CAST(YEAR(start_date) AS INTEGER) AS year,
+                CAST(COUNT(*) AS INTEGER) AS bat_innings,
+                CAST(SUM(runs) AS INTEGER) AS runs,
+                CAST(SUM(balls) AS INTEGER) AS balls_faced,
+                CAST(SUM(dismissed) AS INTEGER) AS dismissals
+            FROM batting_progression
+            GROUP BY player, match_type, year
+        ),
+        bowl AS (
+            SELECT
+                player, match_type, CAST(YEAR(start_date) AS INTEGER) AS year,
+                CAST(COUNT(*) AS INTEGER) AS bowl_innings,
+                CAST(SUM(balls) AS INTEGER) AS balls_bowled,
+                CAST(SUM(runs_conceded) AS INTEGER) AS runs_conceded,
+                CAST(SUM(wickets) AS INTEGER) AS wickets
+            FROM bowling_progression
+            GROUP BY player, match_type, year
+        )
+        SELECT
+            COALESCE(bat.player, bowl.player) AS player,
+            COALESCE(bat.match_type, bowl.match_type) AS match_type,
+            COALESCE(bat.year, bowl.year) AS year,
+            COALESCE(bat_innings, 0) AS bat_innings,
+            COALESCE(runs, 0) AS runs,
+            COALESCE(balls_faced, 0) AS balls_faced,
+            COALESCE(dismissals, 0) AS dismissals,
+            ROUND(runs / NULLIF(dismissals, 0), 2) AS batting_average,
+            ROUND(runs * 100.0 / NULLIF(balls_faced, 0), 2) AS strike_rate,
+            COALESCE(bowl_innings, 0) AS bowl_innings,
+            COALESCE(balls_bowled, 0) AS balls_bowled,
+            COALESCE(runs_conceded, 0) AS runs_conceded,
+            COALESCE(wickets, 0) AS wickets,
+            ROUND(runs_conceded / NULLIF(wickets, 0), 2) AS bowling_average,
+            ROUND(runs_conceded * 6.0 / NULLIF(balls_bowled, 0), 2) AS economy
+        FROM bat
+        FULL OUTER JOIN bowl
+          ON bat.player = bowl.player AND bat.match_type = bowl.match_type AND bat.year = bowl.year
+        ORDER BY player, match_type, year
+    """)
+
+
+def create_player_leaderboard(conn: duckdb.DuckDBPyConnection, top_k: int = LEADERBOARD_K):
+    """
+    Precomputed sorted top-K lists from player_season: batters by runs and
+    bowlers by wickets, per match_type ('All' for every format) and year
+    (NULL for career). A leaderboard request reads one small presorted list
+    instead of aggregating and sorting ball_by_ball. Multi-year ranges still
+    need player_season, since a top-K of sums cannot be merged from per-year lists.
+    """
+    print("Creating player_leaderboard table...")
+
+    conn.execute(f"""
+        CREATE TABLE player_leaderboard AS
+        WITH totals AS (
+            SELECT
+                player,
+                COALESCE(match_type, 'All') AS match_type,
+                year,
+                SUM(bat_innings) AS bat_innings,
+                SUM(runs) AS runs,
+                SUM(dismissals) AS dismissals,
+                SUM(bowl_innings) AS bowl_innings,
+                SUM(runs_conceded) AS runs_conceded,
+                SUM(wickets) AS wickets
+            FROM player_season
+            GROUP BY GROUPING SETS ((player, match_type, year), (player, match_type), (player, year), (player))
+        ),
+        entries AS (
+            SELECT 'runs' AS metric, match_type, year, player, runs AS value, bat_innings AS innings,
+                   ROUND(runs / NULLIF(dismissals, 0), 2) AS average
+            FROM totals WHERE runs > 0
+            UNION ALL
+            SELECT 'wickets', match_type, year, player, wickets, bowl_innings,
+                   ROUND(runs_conceded / NULLIF(wickets, 0), 2)
+            FROM totals WHERE wickets > 0
+        )
+        SELECT
+            metric, match_type, year,
+            CAST(ROW_NUMBER() OVER (PARTITION BY metric, match_type, year ORDER BY value DESC, player) AS INTEGER) AS rank,
+            player,
+            CAST(value AS INTEGER) AS value,
+            CAST(innings AS INTEGER) AS innings,
+            average
+        FROM entries
+        QUALIFY rank <= {top_k}
+        ORDER BY metric, match_type, year NULLS FIRST, rank
+    """)
+
+
+def create_players_table(conn: duckdb.DuckDBPyConnection):
+    """
+    Canonical player table: one row per Cricsheet registry id (players without
+    one are keyed 'name:<name>'). Delivery names are matched to ids per match
+    through player_registry, so two players sharing a name stay apart and one
+    player appearing under several spellings collapses into one row.
+
+    name is the spelling used in the most matches (latest wins ties), aliases
+    holds the others. search_key is every spelling normalized (accents
+    stripped, lowercased, punctuation collapsed to single spaces) and joined
+    with '|', so a name search is a LIKE over this small table instead of
+    ball_by_ball.
+    """
+    print("Creating players table...")
+
+    conn.execute("""
+        CREATE TABLE players AS
+        WITH deliveries AS (
+            SELECT match_id, name, SUM(faced) AS faced, SUM(bowled) AS bowled
+            FROM (
+                SELECT match_id, striker AS name, COUNT(*) AS faced, 0 AS bowled FROM ball_by_ball GROUP BY ALL
+                UNION ALL
+                SELECT match_id, bowler, 0, COUNT(*) FROM ball_by_ball GROUP BY ALL
+            )
+            GROUP BY ALL
+        ),
+        per_match AS (
+            SELECT
+                COALESCE(r.registry_id, 'name:' || COALESCE(r.player, d.name)) AS player_id,
+                COALESCE(r.player, d.name) AS name,
+                r.team,
+                COALESCE(r.match_id, d.match_id) AS match_id,
+                COALESCE(d.faced, 0) AS faced,
+                COALESCE(d.bowled, 0) AS bowled
+            FROM player_registry r
+            FULL OUTER JOIN deliveries d ON r.match_id = d.match_id AND r.player = d.name
+        ),
+        spellings AS (
+            SELECT
+                p.player_id, p.name,
+                trim(regexp_replace(strip_accents(lower(p.name)), '[^a-z0-9]+', ' ', 'g')) AS name_key,
+                COUNT(DISTINCT p.match_id) AS matches,
+                MAX(m.start_date) AS last_played
+            FROM per_match p LEFT JOIN match_info m ON p.match_id = m.match_id
+            GROUP BY ALL
+        ),
+        names AS (
+            SELECT
+                player_id,
+                FIRST(name ORDER BY matches DESC, last_played DESC NULLS LAST, name) AS name,
+                LIST(name ORDER BY matches DESC, last_played DESC NULLS LAST, name) AS spellings,
+                STRING_AGG(DISTINCT name_key, '|') AS search_key
+            FROM spellings
+            GROUP BY player_id
+        ),
+        totals AS (
+            SELECT
+                p.player_id,
+                LIST(DISTINCT p.team ORDER BY p.team) FILTER (WHERE p.team IS NOT NULL) AS teams,
+                LIST(DISTINCT m.match_type ORDER BY m.match_type) FILTER (WHERE m.match_type IS NOT NULL) AS match_types,
+                COUNT(DISTINCT p.match_id) AS matches,
+                MIN(YEAR(m.start_date)) AS first_year,
+                MAX(YEAR(m.start_date)) AS last_year,
+                SUM(p.faced) AS balls_faced,
+                SUM(p.bowled) AS balls_bowled
+            FROM per_match p LEFT JOIN match_info m ON p.match_id = m.match_id
+            GROUP BY p.player_id
+        )
+        SELECT
+            n.player_id,
+            n.name,
+            n.search_key,
+            list_filter(n.spellings, lambda x: x <> n.name) AS aliases,
+            COALESCE(t.teams, []) AS teams,
+            COALESCE(t.match_types, []) AS match_types,
+            CAST(t.matches AS INTEGER) AS matches,
+            t.first_year,
+            t.last_year,
+            CAST(t.balls_faced AS INTEGER) AS balls_faced,
+            CAST(t.balls_bowled AS INTEGER) AS balls_bowled
+        FROM names n JOIN totals t USING (player_id)
+        ORDER BY n.search_key
+    """)
+    conn.execute("CREATE UNIQUE INDEX idx_players_id ON players(player_id)")
+
+
+def create_player_splits(conn: duckdb.DuckDBPyConnection, dimensions: list = SPLIT_DIMENSIONS):
+    """
+    Batting and bowling splits cube: one GROUPING SETS pass over ball_by_ball
+    grouping (player_id, role) by every subset of the dimensions (format,
+    year, opponent, venue). player_id is players.player_id, so players
+    sharing a name stay apart; player is their canonical name. A dimension
+    left out of a set is stored as 'All' for match_type and NULL for the
+    others, so any filter combination the pages offer ("vs opponent", "at
+    venue", in a format and year) is one lookup:
+
+        WHERE player_id = ? AND role = 'bat' AND match_type = 'All'
+          AND year IS NULL AND opponent = 'India' AND venue IS NULL
+
+    Every metric, matches included, is additive across years (a match has one
+    year, format, opponent and venue), so year ranges sum the per-year rows.
+    For bat rows outs are dismissals, for bowl rows bowler-credited wickets;
+    runs are runs off the bat, or runs conceded including wides and no-balls.
+    balls counts every delivery, wides included, as matchup and the pages do;
+    dots exclude wides and no-balls in both roles, as matchup.dots does.
+    """
+    print("Creating player_splits table...")
+
+    not_out = sql_list(NOT_OUT_WICKETS)
+    excluded = sql_list(NON_BOWLER_WICKETS)
+    sets = ", ".join(f"({', '.join(['player_id', 'role', *combo])})"
+                     for size in range(len(dimensions) + 1)
+                     for combo in itertools.combinations(dimensions, size))
+
+    striker_join, striker_id = player_id_join("rs", "striker", "batting_team")
+    non_striker_join, non_striker_id = player_id_join("rn", "non_striker", "batting_team")
+    bowler_join, bowler_id = player_id_join("rb", "bowler", "bowling_team")
+
+    # Non-striker run outs are extra bat rows (no ball faced) so dismissals are complete
+    conn.execute(f"""
+        CREATE TABLE player_splits AS
+        WITH facts AS (
+            SELECT
+                {striker_id} AS player_id, 'bat' AS role, b.match_type, YEAR(b.start_date) AS year,
+                b.bowling_team AS opponent, COALESCE(b.venue, 'Unknown') AS venue, b.match_id, b.innings,
+                1 AS ball,
+                b.runs_off_bat AS runs,
+                CASE WHEN b.player_dismissed = b.striker AND b.wicket_type NOT IN ({not_out}) THEN 1 ELSE 0 END AS out,
+                CASE WHEN b.runs_off_bat = 0 AND COALESCE(b.wides, 0) = 0 AND COALESCE(b.noballs, 0) = 0
+                     THEN 1 ELSE 0 END AS dot,
+                CASE WHEN b.runs_off_bat = 4 THEN 1 ELSE 0 END AS four,
+                CASE WHEN b.runs_off_bat = 6 THEN 1 ELSE 0 END AS six
+            FROM ball_by_ball b
+            {striker_join}
+            UNION ALL
+            SELECT
+                {non_striker_id}, 'bat', b.match_type, YEAR(b.start_date), b.bowling_team,
+                COALESCE(b.venue, 'Unknown'), b.match_id, b.innings, 0, 0, 1, 0, 0, 0
+            FROM ball_by_ball b
+            {non_striker_join}
+            WHERE b.player_dismissed = b.non_striker AND b.wicket_type NOT IN ({not_out})
+            UNION ALL
+            SELECT
+                {bowler_id}, 'bowl', b.match_type, YEAR(b.start_date), b.batting_team,
+                COALESCE(b.venue, 'Unknown'), b.match_id, b.innings,
+                1,
+                b.runs_off_bat + COALESCE(b.wides, 0) + COALESCE(b.noballs, 0),
+                CASE WHEN b.wicket_type IS NOT NULL AND b.wicket_type NOT IN ({excluded}) THEN 1 ELSE 0 END,
+                CASE WHEN b.runs_off_bat = 0 AND COALESCE(b.wides, 0) = 0 AND COALESCE(b.noballs, 0) = 0
+                     THEN 1 ELSE 0 END,
+                CASE WHEN b.runs_off_bat = 4 THEN 1 ELSE 0 END,
+                CASE WHEN b.runs_off_bat = 6 THEN 1 ELSE 0 END
+            FROM ball_by_ball b
+            {bowler_join}
+        ),
+        cube AS (
+            SELECT
+                player_id,
+                role,
+                COALESCE(match_type, 'All') AS match_type,
+                CAST(year AS SMALLINT) AS year,
+                opponent,
+                venue,
+                CAST(COUNT(DISTINCT match_id) AS INTEGER) AS matches,
+                CAST(COUNT(DISTINCT (match_id, innings)) AS INTEGER) AS innings,
+                CAST(SUM(ball) AS INTEGER) AS balls,
+                CAST(SUM(runs) AS INTEGER) AS runs,
+                CAST(SUM(out) AS INTEGER) AS outs,
+                CAST(SUM(four) AS INTEGER) AS fours,
+                CAST(SUM(six) AS INTEGER) AS sixes,
+                CAST(SUM(dot) AS INTEGER) AS dots
+            FROM facts
+            GROUP BY GROUPING SETS ({sets})
+        )
+        SELECT c.player_id, COALESCE(p.name, c.player_id) AS player, c.* EXCLUDE (player_id)
+        FROM cube c LEFT JOIN players p USING (player_id)
+        ORDER BY c.player_id, c.role, c.match_type, c.year NULLS FIRST, c.opponent NULLS FIRST, c.venue NULLS FIRST
+    """)
+
+
+def create_innings_state(conn: duckdb.DuckDBPyConnection, max_overs: dict = MAX_OVERS):
+    """
+    Reconstruct the state of every innings after each delivery: score,
+    wickets, the current partnership (numbered by the wicket it is for) with
+    its runs and balls, legal balls bowled and, in limited-overs matches,
+    balls remaining and the chase (target, runs required, required rate).
+
+    All running totals share one window (match_id, innings ordered by
+    delivery_seq, not by the DOUBLE ball, which can't tell 0.1 from 0.10),
+    so DuckDB computes them in a single sorted pass. Fall of wickets is
+    WHERE wicket > 0; a partnership's final row is its last ball:
+
+        SELECT partnership, MAX(partnership_runs) FROM innings_state
+        WHERE match_id = ? AND innings = 1 GROUP BY partnership
+
+    Wickets exclude retired hurt / retired not out. The target is the first
+    innings total + 1 for the second innings of T20s and ODIs; revised (DLS)
+    targets and reduced overs are not in the source data, so shortened
+    matches keep the full-length values.
+    """
+    print("Creating innings_state table...")
+
+    not_out = sql_list(NOT_OUT_WICKETS)
+    overs = " ".join(f"WHEN '{match_type}' THEN {n}" for match_type, n in max_overs.items())
+
+    conn.execute(f"""
+        CREATE TABLE innings_state AS
+        WITH deliveries AS (
+            SELECT
+                match_id, match_type, innings, ball, delivery_seq, batting_team, striker, non_striker,
+                runs_off_bat + COALESCE(extras, 0) AS runs,
+                CASE WHEN COALESCE(wides, 0) = 0 AND COALESCE(noballs, 0) = 0 THEN 1 ELSE 0 END AS legal,
+                (CASE WHEN player_dismissed IS NOT NULL AND wicket_type NOT IN ({not_out}) THEN 1 ELSE 0 END)
+                  + (CASE WHEN other_player_dismissed IS NOT NULL
+                           AND COALESCE(other_wicket_type, '') NOT IN ({not_out}) THEN 1 ELSE 0 END) AS wicket,
+                CASE match_type {overs} END * 6 AS max_balls
+            FROM ball_by_ball
+        ),
+        running AS (
+            SELECT
+                *,
+                SUM(runs) OVER w AS score,
+                SUM(wicket) OVER w AS wickets,
+                SUM(legal) OVER w AS legal_balls,
+                SUM(wicket) OVER w - wicket + 1 AS partnership
+            FROM deliveries
+            WINDOW w AS (PARTITION BY match_id, innings ORDER BY delivery_seq ROWS UNBOUNDED PRECEDING)
+        ),
+        state AS (
+            SELECT
+                *,
+                SUM(runs) OVER p AS partnership_runs,
+                SUM(legal) OVER p AS partnership_balls,
+                CASE WHEN innings = 2 AND max_balls IS NOT NULL
+                     THEN SUM(runs) FILTER (WHERE innings = 1) OVER (PARTITION BY match_id) + 1
+                END AS target
+            FROM running
+            WINDOW p AS (PARTITION BY match_id, innings, partnership ORDER BY delivery_seq ROWS UNBOUNDED PRECEDING)
+        )
+        SELECT
+            match_id,
+            match_type,
+            innings,
+            ball,
+            delivery_seq,
+            batting_team,
+            striker,
+            non_striker,
+            CAST(runs AS SMALLINT) AS runs,
+            CAST(wicket AS TINYINT) AS wicket,
+            CAST(score AS SMALLINT) AS score,
+            CAST(wickets AS TINYINT) AS wickets,
+            CAST(partnership AS TINYINT) AS partnership,
+            CAST(partnership_runs AS SMALLINT) AS partnership_runs,
+            CAST(partnership_balls AS SMALLINT) AS partnership_balls,
+            CAST(legal_balls AS SMALLINT) AS legal_balls,
+            CAST(max_balls - legal_balls AS SMALLINT) AS balls_remaining,
+            CAST(target AS SMALLINT) AS target,
+            CAST(CASE WHEN target IS NOT NULL THEN GREATEST(target - score, 0) END AS SMALLINT) AS runs_required,
+            ROUND(CASE WHEN target IS NOT NULL AND max_balls > legal_balls
+                       THEN GREATEST(target - score, 0) * 6.0 / (max_balls - legal_balls)
+                  END, 2) AS required_run_rate
+        FROM state
+        ORDER BY match_id, innings, delivery_seq
+    """)
+
+
+def load_base_tables(conn: duckdb.DuckDBPyConnection, zip_files: dict):
+    """Parse the csv2 zip files ({match_type: path}) and load ball_by_ball, match_info and player_registry."""
     all_ball_rows = []
     all_info_rows = []
     header = None
 
     # Process each zip file
-    for match_type, zip_path in ZIP_FILES.items():
-        if not zip_path.exists():
-            print(f"WARNING: {zip_path} not found, skipping...")
-            continue
-
+    for match_type, zip_path in zip_files.items():
         ball_rows, info_rows = process_zip_file(zip_path, match_type)
 
         if ball_rows:
             if header is None:
                 header = ball_rows[0]
-                all_ball_rows.append(header)
-            # Skip header from subsequent files
+            # Skip header row, it is written once below
             all_ball_rows.extend(ball_rows[1:])
 
         all_info_rows.extend(info_rows)
 
     print("\n" + "=" * 60)
-    print(f"Total: {len(all_ball_rows)-1} ball-by-ball rows, {len(all_info_rows)} matches")
+    print(f"Total: {len(all_ball_rows)} ball-by-ball rows, {len(all_info_rows)} matches")
     print("=" * 60)
 
-    # Create DuckDB database
-    print(f"\nCreating DuckDB database: {OUTPUT_DB}")
+    create_table_from_rows(conn, "ball_by_ball", header or BALL_COLUMNS, all_ball_rows)
+    create_table_from_rows(conn, "match_info", METADATA_FIELDS,
+                           [[info.get(field) for field in METADATA_FIELDS] for info in all_info_rows])
+    create_table_from_rows(conn, "player_registry", REGISTRY_COLUMNS,
+                           [row for info in all_info_rows for row in info["registry"]])
 
-    # Remove existing database to recreate
-    if OUTPUT_DB.exists():
-        os.remove(OUTPUT_DB)
 
-    conn = duckdb.connect(str(OUTPUT_DB))
+def load_base_tables_json(conn: duckdb.DuckDBPyConnection, zip_files: dict):
+    """Parse the JSON zip files ({match_type: path}) and load the base and detail tables."""
+    parsed = {"balls": [], "info": [], "registry": [], "reviews": [], "powerplays": []}
 
-    # Create ball_by_ball table from CSV data
-    print("Creating ball_by_ball table...")
+    for match_type, zip_path in zip_files.items():
+        for key, rows in process_json_zip(zip_path, match_type).items():
+            parsed[key].extend(rows)
 
-    # Write to temp CSV for DuckDB to read (more efficient for large data)
-    temp_ball_csv = DATA_DIR / "temp_ball_by_ball.csv"
-    with open(temp_ball_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerows(all_ball_rows)
-
-    conn.execute(f"""
-        CREATE TABLE ball_by_ball AS
-        SELECT * FROM read_csv_auto('{temp_ball_csv.as_posix()}', header=true)
-    """)
+    print("\n" + "=" * 60)
+    print(f"Total: {len(parsed['balls'])} ball-by-ball rows, {len(parsed['info'])} matches")
+    print("=" * 60)
 
-    # Clean up temp file
-    os.remove(temp_ball_csv)
+    create_table_from_rows(conn, "ball_by_ball", BALL_COLUMNS, parsed["balls"])
+    create_table_from_rows(conn, "match_info", METADATA_FIELDS,
+                           [[info.get(field) for field in METADATA_FIELDS] for info in parsed["info"]])
+    create_table_from_rows(conn, "player_registry", REGISTRY_COLUMNS, parsed["registry"])
+    create_table_from_rows(conn, "reviews", REVIEW_COLUMNS, parsed["reviews"])
+    create_table_from_rows(conn, "powerplays", POWERPLAY_COLUMNS, parsed["powerplays"])
 
-    # Create match_info table
-    print("Creating match_info table...")
 
-    # Write to temp CSV
-    temp_info_csv = DATA_DIR / "temp_match_info.csv"
-    with open(temp_info_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=METADATA_FIELDS)
-        writer.writeheader()
-        writer.writerows(all_info_rows)
+def benchmark_parsers(data_dir: Path):
+    """Time parsing of the csv2 and JSON archives present in data_dir."""
+    print("=" * 60)
+    print(f"Parser Benchmark (JSON parser: {json_loads.__module__})")
+    print("=" * 60)
 
-    conn.execute(f"""
-        CREATE TABLE match_info AS
-        SELECT * FROM read_csv_auto('{temp_info_csv.as_posix()}', header=true)
-    """)
+    for label, files, parse in [
+        ("csv", ZIP_FILES, lambda path, mt: process_zip_file(path, mt)[0][1:]),
+        ("json", JSON_ZIP_FILES, lambda path, mt: process_json_zip(path, mt)["balls"]),
+    ]:
+        deliveries = 0
+        start = time.perf_counter()
+        for match_type, name in files.items():
+            if (data_dir / name).exists():
+                deliveries += len(parse(data_dir / name, match_type))
+        elapsed = time.perf_counter() - start
+        rate = deliveries / elapsed if elapsed else 0
+        print(f"  [{label}] {deliveries:,} deliveries in {elapsed:.2f}s ({rate:,.0f} deliveries/s)")
 
-    # Clean up temp file
-    os.remove(temp_info_csv)
 
-    # Show summary
+def print_summary(conn: duckdb.DuckDBPyConnection):
+    """Print row counts and schemas of the built tables."""
     print("\n" + "=" * 60)
     print("Database Summary")
     print("=" * 60)
@@ -286,6 +1062,14 @@ def create_database():
     for row in result:
         print(f"  - {row[0]}: {row[1]:,} matches")
 
+    result = conn.execute("SELECT COUNT(*) as count FROM matchup").fetchone()
+    print(f"\nmatchup: {result[0]:,} rows")
+
+    for table in ["batting_progression", "bowling_progression", "player_season", "player_leaderboard",
+                  "players", "player_splits", "innings_state"]:
+        result = conn.execute(f"SELECT COUNT(*) as count FROM {table}").fetchone()
+        print(f"{table}: {result[0]:,} rows")
+
     # Show schema
     print("\n" + "=" * 60)
     print("Table Schemas")
@@ -301,6 +1085,79 @@ def create_database():
     for row in result:
         print(f"  {row[0]}: {row[1]}")
 
+
+def build_pipeline(force: bool = False, fmt: str = "csv") -> Pipeline:
+    """Declare the Cricsheet build: base load (csv or json), then derived tables."""
+    names = JSON_ZIP_FILES if fmt == "json" else ZIP_FILES
+    files = LocalSource(DATA_DIR, names.values()).fetch()
+    zip_files = {mt: DATA_DIR / name for mt, name in names.items() if name in files}
+
+    if fmt == "json":
+        load = Stage("load", functools.partial(load_base_tables_json, zip_files=zip_files),
+                     inputs=zip_files.values(),
+                     outputs=["ball_by_ball", "match_info", "player_registry", "reviews", "powerplays"],
+                     params={"fields": METADATA_FIELDS, "columns": BALL_COLUMNS},
+                     helpers=[process_json_zip, parse_match_json, create_table_from_rows])
+    else:
+        load = Stage("load", functools.partial(load_base_tables, zip_files=zip_files),
+                     inputs=zip_files.values(),
+                     outputs=["ball_by_ball", "match_info", "player_registry"],
+                     params={"fields": METADATA_FIELDS},
+                     helpers=[process_zip_file, parse_info_csv, create_table_from_rows])
+
+    return Pipeline("cricsheet", OUTPUT_DB, [
+        load,
+        Stage("archive", functools.partial(ball_archive.write_ball_archive, out_dir=ball_archive.archive_path(OUTPUT_DB),
+                                           non_bowler=NON_BOWLER_WICKETS, not_out=NOT_OUT_WICKETS),
+              deps=["load"],
+              files=[ball_archive.archive_path(OUTPUT_DB)],
+              helpers=[ball_archive.dictionary, ball_archive.offsets],
+              params={"columns": ball_archive.DELIVERY_COLUMNS, "format": ball_archive.ARCHIVE_FORMAT}),
+        Stage("matchup", create_matchup_table,
+              deps=["load"],
+              helpers=[player_id_join],
+              outputs=["matchup"],
+              params={"non_bowler": NON_BOWLER_WICKETS}),
+        Stage("progression", create_progression_tables,
+              deps=["load"],
+              outputs=["batting_progression", "bowling_progression", "player_season"],
+              params={"rolling_innings": ROLLING_INNINGS, "non_bowler": NON_BOWLER_WICKETS,
+                      "not_out": NOT_OUT_WICKETS}),
+        Stage("players", create_players_table,
+              deps=["load"],
+              outputs=["players"]),
+        Stage("splits", create_player_splits,
+              deps=["load", "players"],
+              outputs=["player_splits"],
+              helpers=[player_id_join],
+              params={"dimensions": SPLIT_DIMENSIONS, "non_bowler": NON_BOWLER_WICKETS,
+                      "not_out": NOT_OUT_WICKETS}),
+        Stage("innings_state", create_innings_state,
+              deps=["load"],
+              outputs=["innings_state"],
+              params={"max_overs": MAX_OVERS, "not_out": NOT_OUT_WICKETS}),
+        Stage("leaderboard", create_player_leaderboard,
+              deps=["progression"],
+              outputs=["player_leaderboard"],
+              params={"top_k": LEADERBOARD_K}),
+    ], force=force, hot_columns=HOT_COLUMNS)
+
+
+def set_data_dir(data_dir: Path):
+    """Point the script at a different data directory (zips in, cricket.duckdb out)."""
+    global DATA_DIR, OUTPUT_DB
+    DATA_DIR = Path(data_dir)
+    OUTPUT_DB = DATA_DIR / "cricket.duckdb"
+
+
+def create_database(force: bool = False, fmt: str = "csv"):
+    """Process all zip files and create (or update) the DuckDB database."""
+    print("=" * 60)
+    print(f"Cricsheet Data Processing ({fmt})")
+    print("=" * 60)
+
+    conn = build_pipeline(force, fmt).run()
+    print_summary(conn)
     conn.close()
 
     print("\n" + "=" * 60)
@@ -310,4 +1167,15 @@ def create_database():
 
 
 if __name__ == "__main__":
-    create_database()
+    parser = argparse.ArgumentParser(description="Build cricket.duckdb from Cricsheet zips")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="Directory with the *_csv2.zip files")
+    parser.add_argument("--force", action="store_true", help="Rebuild every stage, ignoring the stage cache")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv", help="Which Cricsheet archives to ingest")
+    parser.add_argument("--benchmark", action="store_true", help="Compare csv and json parse throughput, then exit")
+    args = parser.parse_args()
+
+    set_data_dir(args.data_dir)
+    if args.benchmark:
+        benchmark_parsers(DATA_DIR)
+    else:
+        create_database(force=args.force, fmt=args.format)
@@ -0,0 +1,523 @@
+"""
+Query Gateway
+=============
+asyncio query server that runs locally in front of the DuckDB files and
+speaks the backend's query API:
+
+    POST /api/query/cricket.duckdb   {"sql": "...", "limit": 1000}
+      -> {"columns": [...], "rows": [[...]], "row_count": n, "truncated": bool}
+    POST /api/batch/cricket.duckdb   {"queries": [{"name": "stats", "sql": "...", "limit": 1}, ...],
+                                      "shared": {"m": "SELECT ... FROM match_info"}}
+      -> {"results": {"stats": <QueryResponse> | {"error": "..."}, ...}}
+    POST /api/leaderboard/cricket.duckdb  {"kind": "batting", "match_type": "ODI", "year_from": 2010,
+                                           "year_to": 2025, "team": "All", "min_matches": 10}
+      -> QueryResponse from the NumPy stats cache (stats_cache.py)
+    POST /api/query/federated        (with --federate) one catalog over every served database,
+                                     as <stem>.<table>: cricket.ball_by_ball JOIN imdb...
+    GET  /api/stats                  per-database counters and latency percentiles
+
+A batch replaces a page's separate round trips with one request. Its
+queries run concurrently, each on its own cursor; the databases are opened
+read-only, so every cursor reads the same snapshot. Identical queries in a
+batch run once. Relations named in "shared" are scanned once into an Arrow
+table that every query in the batch can select from, so several panels
+reading the same table share that scan.
+
+Under a burst (many users opening CricketDashboard at once) it keeps
+latency flat by:
+- single-flight: identical in-flight requests (same database, SQL and
+  limit) share one execution and one encoded response
+- a per-database concurrency cap with a fair queue: waiting requests are
+  served round-robin across clients, so one client's burst can't starve
+  the others
+- a bounded thread pool: queries run on worker threads, each with its own
+  cursor on one shared read-only connection per database
+
+Databases are opened with snapshot.open_snapshot (read-only, small buffer
+pool per process). With --snapshot-dir the gateway serves the published
+snapshots (<stem>.current) under their source names.
+
+With --federate (or --parquet) the served databases, plus any Parquet
+exports, are also ATTACHed into one federation.Federation catalog served as
+"federated" (query and batch routes). The federation is locked once its
+sources are attached and only runs single SELECT statements (queries and
+shared relations). Its pooled cursors record per-source scan stats,
+reported under "sources" in /api/stats.
+
+Responses are encoded by result_stream.stream_json (DuckDB builds the row
+JSON). The HTTP layer is deliberately minimal (one request per connection);
+put it behind the existing proxy or nginx for TLS and keep-alive.
+
+Usage:
+    python query_gateway.py serve --db cricket.duckdb --db imdb.duckdb --port 8080
+    python query_gateway.py serve --snapshot-dir /data/snapshots
+    python query_gateway.py serve --snapshot-dir /data/snapshots --federate --parquet /data/export/cricket
+    python query_gateway.py bench --db cricket.duckdb --clients 50
+"""
+
+import os
+import json
+import time
+import asyncio
+import argparse
+import functools
+import statistics
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+from federation import Federation, check_read_only
+from result_stream import MAX_JSON_ROWS, stream_json
+from snapshot import POINTER_SUFFIX, current_snapshot, open_snapshot, served_name
+from stats_cache import StatsCache
+
+# Filters accepted by /api/leaderboard (StatsCache.leaderboard arguments)
+LEADERBOARD_PARAMS = {"kind", "match_type", "year_from", "year_to", "team", "min_matches", "sort", "descending",
+                      "limit"}
+
+MAX_CONCURRENT_PER_DB = 4
+POOL_SIZE = 8
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_QUERIES = 20
+LATENCY_WINDOW = 2000
+
+# Name the federated catalog is served under
+FEDERATED = "federated"
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._inflight = {}
+
+    async def do(self, key, fn) -> tuple:
+        """Await fn() once per key; returns (result, shared) where shared means another call ran it"""
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key]), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody else awaited isn't logged as "never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+
+class FairLimiter:
+    """
+    At most `limit` holders at a time. Waiters queue per client and are
+    admitted round-robin across clients.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiting = OrderedDict()  # client -> deque of futures
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._waiting.values())
+
+    async def acquire(self, client: str):
+        if self.active < self.limit and not self._waiting:
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(client, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was handed to us as we were cancelled: pass it on
+                self.release()
+            else:
+                self._waiting[client].remove(future)
+                if not self._waiting[client]:
+                    del self._waiting[client]
+            raise
+
+    def release(self):
+        while self._waiting:
+            client, queue = self._waiting.popitem(last=False)
+            future = queue.popleft()
+            if queue:
+                self._waiting[client] = queue  # back of the line
+            if not future.done():
+                future.set_result(None)  # slot moves straight to the waiter
+                return
+        self.active -= 1
+
+    def slot(self, client: str):
+        """async with limiter.slot(client): ..."""
+        return _Slot(self, client)
+
+
+class _Slot:
+    def __init__(self, limiter: FairLimiter, client: str):
+        self.limiter = limiter
+        self.client = client
+
+    async def __aenter__(self):
+        await self.limiter.acquire(self.client)
+
+    async def __aexit__(self, *exc):
+        self.limiter.release()
+        return False
+
+
+class DatabaseStats:
+    def __init__(self):
+        self.requests = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.queue_waits = deque(maxlen=LATENCY_WINDOW)
+
+    def summary(self) -> dict:
+        def pct(values, q):
+            if not values:
+                return None
+            ordered = sorted(values)
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+        return {
+            "requests": self.requests,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "latency_ms": {"p50": pct(self.latencies, 0.5), "p99": pct(self.latencies, 0.99),
+                           "max": pct(self.latencies, 1.0)},
+            "queue_wait_ms": {"p50": pct(self.queue_waits, 0.5), "p99": pct(self.queue_waits, 0.99)},
+        }
+
+
+class QueryGateway:
+    """Single-flight + fair per-database limits + bounded thread pool over read-only DuckDB files."""
+
+    def __init__(self, db_paths: list, max_concurrent: int = MAX_CONCURRENT_PER_DB, pool_size: int = POOL_SIZE,
+                 coalesce: bool = True, federate: bool = False, parquet: tuple = ()):
+        self.paths = {served_name(p): Path(p) for p in db_paths}
+        self.databases = {name: open_snapshot(path) for name, path in self.paths.items()}
+        self.federation = None
+        if federate or parquet:
+            self.federation = Federation(pool_size)
+            for path in self.paths.values():
+                self.federation.attach(path)
+            for spec in parquet:
+                self.federation.attach_spec(spec)
+            self.federation.lock()
+            self.databases[FEDERATED] = self.federation.conn
+        self.stats_caches = {}
+        self.limiters = {name: FairLimiter(max_concurrent) for name in self.databases}
+        self.stats = {name: DatabaseStats() for name in self.databases}
+        self.pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="query")
+        self.flight = SingleFlight()
+        self.coalesce = coalesce
+
+    @contextmanager
+    def _cursor(self, database: str, sql: str):
+        """
+        A cursor on database to run sql: pooled (and scan-tracked) for the
+        federation, which shares one instance across clients and so only runs
+        a single SELECT; else a fresh one
+        """
+        if database == FEDERATED:
+            with self.federation.cursor() as cursor:
+                check_read_only(cursor, sql)
+                yield cursor
+            return
+        cursor = self.databases[database].cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    def _run(self, database: str, sql: str, limit: int, relations: Optional[dict] = None) -> bytes:
+        with self._cursor(database, sql) as cursor:
+            try:
+                for name, table in (relations or {}).items():
+                    cursor.register(name, table)
+                return b"".join(stream_json(cursor, sql, max_rows=limit))
+            finally:
+                # Pooled cursors are reused: batch relations must not outlive the query
+                for name in relations or {}:
+                    cursor.unregister(name)
+
+    def _materialize(self, database: str, sql: str):
+        with self._cursor(database, sql) as cursor:
+            return cursor.execute(sql).to_arrow_table()
+
+    async def _in_pool(self, database: str, client: str, fn, *args):
+        """Run fn(*args) on the thread pool once a slot on database is free"""
+        stats = self.stats[database]
+        queued_at = time.perf_counter()
+        async with self.limiters[database].slot(client):
+            stats.queue_waits.append((time.perf_counter() - queued_at) * 1000)
+            stats.executed += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, fn, *args)
+
+    async def _execute(self, database: str, sql: str, limit: int, client: str,
+                       relations: Optional[dict] = None) -> bytes:
+        return await self._in_pool(database, client, self._run, database, sql, limit, relations)
+
+    async def query(self, database: str, sql: str, limit: Optional[int] = None, client: str = "",
+                    relations: Optional[dict] = None) -> bytes:
+        """
+        Encoded QueryResponse JSON for sql against database (a file name such as
+        cricket.duckdb). relations are Arrow tables registered by name for this query.
+        """
+        if database not in self.databases:
+            raise KeyError(database)
+        stats = self.stats[database]
+        stats.requests += 1
+        limit = limit or MAX_JSON_ROWS
+        start = time.perf_counter()
+        try:
+            # Batch-local relations change what a name means, so those queries aren't shared
+            if self.coalesce and not relations:
+                body, shared = await self.flight.do((database, sql.strip(), limit),
+                                                    lambda: self._execute(database, sql, limit, client))
+                stats.coalesced += shared
+            else:
+                body = await self._execute(database, sql, limit, client, relations)
+            return body
+        except duckdb.Error:
+            stats.errors += 1
+            raise
+        finally:
+            stats.latencies.append((time.perf_counter() - start) * 1000)
+
+    async def batch(self, database: str, queries: list, shared: Optional[dict] = None, client: str = "") -> bytes:
+        """
+        Encoded {"results": {name: QueryResponse | {"error": ...}}} for a list of
+        {"name", "sql", "limit"} queries. A failing query only fails its own entry;
+        a failing shared relation fails the batch.
+        """
+        if database not in self.databases:
+            raise KeyError(database)
+
+        relations = {}
+        if shared:
+            names = list(shared)
+            tables = await asyncio.gather(*(self._in_pool(database, client, self._materialize, database, shared[n])
+                                            for n in names))
+            relations = dict(zip(names, tables))
+
+        # Identical queries in the batch run once
+        runs = {}
+        for q in queries:
+            key = (q["sql"].strip(), q.get("limit") or MAX_JSON_ROWS)
+            if key not in runs:
+                runs[key] = self.query(database, key[0], key[1], client, relations)
+        bodies = dict(zip(runs, await asyncio.gather(*runs.values(), return_exceptions=True)))
+
+        parts = []
+        for q in queries:
+            body = bodies[(q["sql"].strip(), q.get("limit") or MAX_JSON_ROWS)]
+            if isinstance(body, duckdb.Error):
+                body = _error(str(body))
+            elif isinstance(body, BaseException):
+                raise body
+            parts.append(json.dumps(q["name"]).encode() + b": " + body)
+        return b'{"results": {' + b", ".join(parts) + b"}}"
+
+    async def leaderboard(self, database: str, params: dict, client: str = "") -> bytes:
+        """Encoded QueryResponse for a batting/bowling leaderboard from the database's stats cache"""
+        if database not in self.databases:
+            raise KeyError(database)
+        cache = self.stats_caches.setdefault(database, StatsCache(self.paths[database]))
+        # First call (and a version change) loads the arrays, so it runs on the pool like a query
+        result = await self._in_pool(database, client, functools.partial(cache.leaderboard, **params))
+        return json.dumps(result).encode()
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        for name, conn in self.databases.items():
+            if name != FEDERATED:
+                conn.close()
+        if self.federation:
+            self.federation.close()
+
+
+# ============== HTTP ==============
+
+async def _respond(writer: asyncio.StreamWriter, status: int, body: bytes):
+    reason = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+              405: "Method Not Allowed", 413: "Payload Too Large"}.get(status, "Error")
+    writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    writer.close()
+
+
+def _error(message: str) -> bytes:
+    return json.dumps({"error": message}).encode()
+
+
+def make_handler(gateway: QueryGateway, token: Optional[str] = None):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            method, path, _ = request_line.split(" ", 2)
+            headers = {k.strip().lower(): v.strip() for k, v in
+                       (line.split(":", 1) for line in header_lines if ":" in line)}
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            writer.close()
+            return
+
+        if token and headers.get("authorization") != f"Bearer {token}":
+            return await _respond(writer, 401, _error("Unauthorized"))
+
+        if method == "GET" and path == "/api/stats":
+            body = {name: stats.summary() for name, stats in gateway.stats.items()}
+            if gateway.federation:
+                body[FEDERATED]["sources"] = gateway.federation.stats()
+            return await _respond(writer, 200, json.dumps(body).encode())
+
+        route, _, database = path.removeprefix("/api/").partition("/")
+        if not path.startswith("/api/") or route not in ("query", "batch", "leaderboard") or not database:
+            return await _respond(writer, 404, _error("Not found"))
+        if method != "POST":
+            return await _respond(writer, 405, _error("POST required"))
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            return await _respond(writer, 400, _error("Invalid Content-Length"))
+        if length > MAX_BODY_BYTES:
+            return await _respond(writer, 413, _error("Request too large"))
+        try:
+            payload = json.loads(await reader.readexactly(length))
+            if route == "query":
+                sql = payload["sql"]
+            elif route == "leaderboard":
+                if not isinstance(payload, dict) or not set(payload) <= LEADERBOARD_PARAMS:
+                    raise ValueError
+            else:
+                queries, shared = payload["queries"], payload.get("shared") or {}
+                if not isinstance(shared, dict) or not 0 < len(queries) <= MAX_BATCH_QUERIES:
+                    raise ValueError
+                if len({q["name"] for q in queries}) != len(queries) or not all(isinstance(q["sql"], str) for q in queries):
+                    raise ValueError
+        except (asyncio.IncompleteReadError, ValueError, KeyError, TypeError):
+            expected = {
+                "query": "JSON with a 'sql' field",
+                "batch": f"JSON with 1-{MAX_BATCH_QUERIES} uniquely named 'queries' ({{name, sql, limit}})",
+                "leaderboard": f"a JSON object with keys from: {', '.join(sorted(LEADERBOARD_PARAMS))}",
+            }[route]
+            return await _respond(writer, 400, _error(f"Body must be {expected}"))
+
+        client = headers.get("x-forwarded-for") or (writer.get_extra_info("peername") or ("",))[0]
+        try:
+            if route == "query":
+                body = await gateway.query(database, sql, payload.get("limit"), client)
+            elif route == "batch":
+                body = await gateway.batch(database, queries, shared, client)
+            else:
+                body = await gateway.leaderboard(database, payload, client)
+        except KeyError:
+            return await _respond(writer, 404, _error(f"Unknown database: {database}"))
+        except (duckdb.Error, ValueError, TypeError) as e:
+            return await _respond(writer, 400, _error(str(e)))
+        await _respond(writer, 200, body)
+
+    return handle
+
+
+async def serve(gateway: QueryGateway, host: str, port: int, token: Optional[str] = None):
+    server = await asyncio.start_server(make_handler(gateway, token), host, port)
+    print(f"[GATEWAY] Serving {', '.join(gateway.databases)} on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+# ============== Burst benchmark ==============
+
+BENCH_QUERIES = [
+    "SELECT match_type, COUNT(*) FROM match_info GROUP BY match_type",
+    "SELECT striker, SUM(runs_off_bat) AS runs FROM ball_by_ball GROUP BY striker ORDER BY runs DESC LIMIT 10",
+    "SELECT bowler, COUNT(*) FILTER (WHERE player_dismissed IS NOT NULL) AS w FROM ball_by_ball "
+    "GROUP BY bowler ORDER BY w DESC LIMIT 10",
+    "SELECT EXTRACT(YEAR FROM start_date) AS year, COUNT(*) FROM match_info GROUP BY year ORDER BY year",
+]
+
+
+async def _burst(gateway: QueryGateway, database: str, clients: int) -> list:
+    """Every client fires the dashboard's queries at once; returns per-request latencies (ms)"""
+    async def one(client: int, sql: str):
+        start = time.perf_counter()
+        await gateway.query(database, sql, client=f"client-{client}")
+        return (time.perf_counter() - start) * 1000
+
+    return await asyncio.gather(*(one(c, sql) for c in range(clients) for sql in BENCH_QUERIES))
+
+
+def bench(db_path: Path, clients: int, max_concurrent: int, pool_size: int):
+    print("=" * 70)
+    print(f"Gateway burst: {clients} clients x {len(BENCH_QUERIES)} queries against {Path(db_path).name}")
+    print("=" * 70)
+    print(f"  {'mode':<14} {'executed':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'wall s':>8}")
+    for coalesce in (False, True):
+        gateway = QueryGateway([db_path], max_concurrent, pool_size, coalesce=coalesce)
+        database = next(iter(gateway.databases))
+        start = time.perf_counter()
+        latencies = sorted(asyncio.run(_burst(gateway, database, clients)))
+        wall = time.perf_counter() - start
+        executed = gateway.stats[database].executed
+        gateway.close()
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+        print(f"  {'single-flight' if coalesce else 'direct':<14} {executed:>9,} "
+              f"{statistics.median(latencies):>9.1f} {p99:>9.1f} {latencies[-1]:>9.1f} {wall:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="asyncio query gateway for the DuckDB files")
+    parser.add_argument("command", choices=["serve", "bench"])
+    parser.add_argument("--db", type=Path, action="append", default=[], help="Database file (repeatable)")
+    parser.add_argument("--snapshot-dir", type=Path, help="Serve every published snapshot in this directory")
+    parser.add_argument("--federate", action="store_true",
+                        help=f"Also serve all databases as one catalog named '{FEDERATED}'")
+    parser.add_argument("--parquet", action="append", default=[],
+                        help="Parquet file or export directory ([alias=]path) added to the federated catalog "
+                             "(repeatable)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-concurrent", type=int, default=MAX_CONCURRENT_PER_DB, help="Per database")
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE)
+    parser.add_argument("--clients", type=int, default=50, help="bench: concurrent clients")
+    args = parser.parse_args()
+
+    if args.snapshot_dir:
+        args.db += [current_snapshot(args.snapshot_dir, pointer.name[:-len(POINTER_SUFFIX)])
+                    for pointer in sorted(args.snapshot_dir.glob(f"*{POINTER_SUFFIX}"))]
+    if not args.db:
+        parser.error("Give --db and/or --snapshot-dir")
+
+    if args.command == "bench":
+        bench(args.db[0], args.clients, args.max_concurrent, args.pool_size)
+    else:
+        gateway = QueryGateway(args.db, args.max_concurrent, args.pool_size,
+                               federate=args.federate, parquet=args.parquet)
+        try:
+            asyncio.run(serve(gateway, args.host, args.port, os.environ.get("GATEWAY_TOKEN")))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            gateway.close()
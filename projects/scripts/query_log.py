@@ -0,0 +1,289 @@
+"""
+Query Log
+=========
+Instrumentation for queries against cricket.duckdb and imdb.duckdb, plus a
+report that ranks query templates by the total time they consume.
+
+QueryLogger.execute() runs a query and appends one NDJSON line per query:
+database, sql, template (literals replaced by ?), latency, rows returned.
+A sample of queries (sample_rate) runs with DuckDB's JSON profiler on, the
+same data EXPLAIN ANALYZE shows, adding rows scanned and per-operator
+timings. Queries are never run a second time to profile them: a slow query
+that was not sampled is logged with its latency only, and a profile that
+cannot be read is dropped without touching the query's result.
+
+    logger = QueryLogger("queries.ndjson", sample_rate=0.1)
+    columns, rows = logger.execute(conn, sql, database="cricket")
+
+The log is plain NDJSON so several server processes can append to it; the
+report loads it into DuckDB (and can keep it in a query_log table). Its
+"sql" field is also what download_and_import.py --materialize-lazy reads.
+
+Usage:
+    python query_log.py run cricket.duckdb dashboard.sql --log queries.ndjson --sample 1
+    python query_log.py report queries.ndjson --top 20
+    python query_log.py report queries.ndjson --save query_log.duckdb
+"""
+
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+SAMPLE_RATE = 0.1
+TOP_OPERATORS = 5
+
+
+# ============== Templates ==============
+
+def normalize_sql(sql: str) -> str:
+    """Query template: comments dropped, literals replaced by ?, IN lists collapsed, whitespace squeezed"""
+    sql = re.sub(r"--[^\n]*", " ", sql)
+    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.DOTALL)
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    sql = re.sub(r"\(\s*\?(?:\s*,\s*\?)+\s*\)", "(?, ...)", sql)
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";")
+
+
+def template_id(template: str) -> str:
+    return hashlib.sha1(template.encode()).hexdigest()[:12]
+
+
+# ============== Profiles ==============
+
+def read_profile(path: str) -> dict:
+    """Rows scanned and the most expensive operators from a DuckDB JSON profile"""
+    with open(path, encoding="utf-8") as f:
+        profile = json.load(f)
+
+    operators = []
+
+    def walk(node):
+        for child in node.get("children", []):
+            operators.append({
+                "operator": child.get("operator_name") or child.get("operator_type") or child.get("name"),
+                "ms": (child.get("operator_timing", child.get("timing")) or 0) * 1000,
+                "rows": child.get("operator_cardinality", child.get("cardinality")),
+                "rows_scanned": child.get("operator_rows_scanned"),
+            })
+            walk(child)
+
+    walk(profile)
+    operators.sort(key=lambda op: op["ms"], reverse=True)
+
+    rows_scanned = profile.get("cumulative_rows_scanned")
+    if rows_scanned is None:
+        rows_scanned = sum(op["rows_scanned"] or 0 for op in operators)
+    return {"rows_scanned": rows_scanned, "operators": operators[:TOP_OPERATORS]}
+
+
+# ============== Logger ==============
+
+class QueryLogger:
+    """Runs queries and appends latency / row / profile records to an NDJSON log."""
+
+    def __init__(self, log_path: Path, sample_rate: float = SAMPLE_RATE):
+        self.log_path = Path(log_path)
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+
+    def _run_profiled(self, conn: duckdb.DuckDBPyConnection, sql: str, params) -> tuple:
+        fd, profile_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            conn.execute("SET enable_profiling = 'json'")
+            conn.execute(f"SET profiling_output = '{Path(profile_path).as_posix()}'")
+            try:
+                start = time.perf_counter()
+                result = conn.execute(sql, params)
+                columns = [d[0] for d in result.description] if result.description else []
+                rows = result.fetchall()
+                latency_ms = (time.perf_counter() - start) * 1000
+            finally:
+                conn.execute("PRAGMA disable_profiling")
+            try:
+                profile = read_profile(profile_path)
+            except (OSError, ValueError):
+                profile = None
+            return columns, rows, latency_ms, profile
+        finally:
+            os.remove(profile_path)
+
+    def execute(self, conn: duckdb.DuckDBPyConnection, sql: str, database: str, params=None) -> tuple:
+        """Run sql, log it and return (columns, rows). Failed queries are logged with their error."""
+        profiled = random.random() < self.sample_rate
+        profile = None
+        error = None
+        columns, rows = [], []
+
+        start = time.perf_counter()
+        try:
+            if profiled:
+                columns, rows, latency_ms, profile = self._run_profiled(conn, sql, params)
+            else:
+                result = conn.execute(sql, params)
+                columns = [d[0] for d in result.description] if result.description else []
+                rows = result.fetchall()
+                latency_ms = (time.perf_counter() - start) * 1000
+        except duckdb.Error as e:
+            latency_ms = (time.perf_counter() - start) * 1000
+            error = e
+
+        template = normalize_sql(sql)
+        self.log({
+            "logged_at": datetime.now().isoformat(timespec="milliseconds"),
+            "database": database,
+            "template_id": template_id(template),
+            "template": template,
+            "sql": sql,
+            "latency_ms": round(latency_ms, 3),
+            "rows_returned": len(rows),
+            "rows_scanned": profile["rows_scanned"] if profile else None,
+            "profiled": profiled,
+            "operators": profile["operators"] if profile else None,
+            "error": str(error) if error else None,
+        })
+
+        if error:
+            raise error
+        return columns, rows
+
+    def log(self, record: dict):
+        with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+# ============== Report ==============
+
+def load_log(conn: duckdb.DuckDBPyConnection, log_path: Path, table: str = "query_log"):
+    """Load an NDJSON query log into a table"""
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE {table} AS
+        SELECT * FROM read_json('{Path(log_path).as_posix()}', format = 'newline_delimited', columns = {{
+            'logged_at': 'TIMESTAMP',
+            'database': 'VARCHAR',
+            'template_id': 'VARCHAR',
+            'template': 'VARCHAR',
+            'sql': 'VARCHAR',
+            'latency_ms': 'DOUBLE',
+            'rows_returned': 'BIGINT',
+            'rows_scanned': 'BIGINT',
+            'profiled': 'BOOLEAN',
+            'operators': 'STRUCT(operator VARCHAR, ms DOUBLE, "rows" BIGINT, rows_scanned BIGINT)[]',
+            'error': 'VARCHAR'
+        }})
+    """)
+
+
+def print_report(conn: duckdb.DuckDBPyConnection, top: int = 20, table: str = "query_log"):
+    total_queries, total_ms = conn.execute(f"SELECT COUNT(*), SUM(latency_ms) FROM {table}").fetchone()
+    if not total_queries:
+        print("No queries logged")
+        return
+
+    print("=" * 100)
+    print(f"Query Log: {total_queries:,} queries, {total_ms / 1000:,.1f}s total")
+    print("=" * 100)
+
+    print(f"\nTop {top} templates by total time")
+    print(f"  {'template':<12} {'db':<8} {'calls':>7} {'total s':>9} {'share':>6} {'avg ms':>9} {'p95 ms':>9} "
+          f"{'max ms':>9} {'rows scanned':>13}")
+    templates = conn.execute(f"""
+        SELECT template_id, ANY_VALUE(database), COUNT(*), SUM(latency_ms), AVG(latency_ms),
+               quantile_cont(latency_ms, 0.95), MAX(latency_ms), AVG(rows_scanned), ANY_VALUE(template)
+        FROM {table}
+        GROUP BY template_id
+        ORDER BY SUM(latency_ms) DESC
+        LIMIT {top}
+    """).fetchall()
+    for tid, db, calls, total, avg, p95, worst, scanned, template in templates:
+        scanned = f"{scanned:,.0f}" if scanned is not None else "-"
+        print(f"  {tid:<12} {db:<8} {calls:>7,} {total / 1000:>9.2f} {total / total_ms * 100:>5.1f}% {avg:>9.1f} "
+              f"{p95:>9.1f} {worst:>9.1f} {scanned:>13}")
+        print(f"    {template[:96]}")
+
+    print(f"\nSlowest operators (profiled queries)")
+    operators = conn.execute(f"""
+        SELECT template_id, op.operator, COUNT(*), AVG(op.ms), AVG(op.rows)
+        FROM (SELECT template_id, UNNEST(operators) AS op FROM {table} WHERE operators IS NOT NULL)
+        GROUP BY ALL
+        ORDER BY AVG(op.ms) * COUNT(*) DESC
+        LIMIT {top}
+    """).fetchall()
+    for tid, operator, samples, avg_ms, avg_rows in operators:
+        rows = f"{avg_rows:,.0f}" if avg_rows is not None else "-"
+        print(f"  {tid:<12} {operator:<24} {samples:>5} samples {avg_ms:>9.2f} ms avg {rows:>13} rows")
+
+    print(f"\nSlowest queries")
+    for logged_at, db, latency, sql in conn.execute(f"""
+        SELECT logged_at, database, latency_ms, sql FROM {table} ORDER BY latency_ms DESC LIMIT 10
+    """).fetchall():
+        print(f"  {latency:>9.1f} ms  {db:<8} {logged_at}  {' '.join(sql.split())[:60]}")
+
+    errors = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE error IS NOT NULL").fetchone()[0]
+    if errors:
+        print(f"\n{errors:,} failed queries: SELECT * FROM {table} WHERE error IS NOT NULL")
+
+
+def report(log_path: Path, top: int = 20, save: Optional[Path] = None):
+    conn = duckdb.connect(str(save) if save else ":memory:")
+    load_log(conn, log_path)
+    print_report(conn, top)
+    conn.close()
+    if save:
+        print(f"\nSaved query_log table to {save}")
+
+
+# ============== Replay ==============
+
+def run_queries(db_path: Path, sql_file: Path, log_path: Path, database: Optional[str] = None,
+                sample_rate: float = SAMPLE_RATE, repeat: int = 1):
+    """Run each ;-separated statement in sql_file against a database through the logger"""
+    statements = [s.strip() for s in Path(sql_file).read_text(encoding="utf-8").split(";") if s.strip()]
+    database = database or Path(db_path).stem
+    logger = QueryLogger(log_path, sample_rate=sample_rate)
+
+    conn = duckdb.connect(str(db_path), read_only=True)
+    for _ in range(repeat):
+        for sql in statements:
+            try:
+                logger.execute(conn, sql, database)
+            except duckdb.Error as e:
+                print(f"  [ERROR] {' '.join(sql.split())[:60]}: {str(e).splitlines()[0]}")
+    conn.close()
+    print(f"Ran {len(statements) * repeat:,} queries against {db_path}, logged to {log_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query instrumentation and slow-query report")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run a SQL file through the logger")
+    run.add_argument("db", type=Path)
+    run.add_argument("sql_file", type=Path)
+    run.add_argument("--log", type=Path, default=Path("queries.ndjson"))
+    run.add_argument("--database", help="Name recorded in the log (default: db file stem)")
+    run.add_argument("--sample", type=float, default=SAMPLE_RATE, help="Share of queries to profile")
+    run.add_argument("--repeat", type=int, default=1)
+
+    rep = sub.add_parser("report", help="Rank query templates by total time")
+    rep.add_argument("log", type=Path)
+    rep.add_argument("--top", type=int, default=20)
+    rep.add_argument("--save", type=Path, help="Keep the log as a query_log table in this DuckDB file")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run_queries(args.db, args.sql_file, args.log, args.database, args.sample, args.repeat)
+    else:
+        report(args.log, args.top, args.save)
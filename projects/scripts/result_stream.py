@@ -0,0 +1,278 @@
+"""
+Result Streaming
+================
+Serializes query results batch by batch from DuckDB's Arrow reader instead
+of materializing every row as a Python tuple and then as one JSON document.
+Memory stays bounded by one record batch (batch_size rows).
+
+Encoders:
+- arrow: Arrow IPC stream (application/vnd.apache.arrow.stream), columns
+  are written from DuckDB's Arrow buffers without a per-row Python step
+- ndjson: one JSON object per row, flushed per batch
+- json: the frontend's QueryResponse shape ({columns, rows, row_count,
+  truncated}), emitted in chunks so the existing client can read it
+Both JSON encoders let DuckDB build each row's JSON text (to_json /
+json_array); Python only joins the strings of a batch. JSON has no
+Infinity or NaN, so non-finite FLOAT/DOUBLE values are encoded as null
+(JSON.parse would otherwise reject the whole response). Statements that
+can't be a subquery (PRAGMA, several statements) fall back to a plain
+fetch in json, so it accepts whatever a cursor accepts, with the cursor's
+column names.
+
+Each encoder is a generator of bytes chunks that can be handed to a
+streaming HTTP response or written to a file:
+
+    for chunk in stream_query(conn, sql, fmt="arrow"):
+        out.write(chunk)
+
+Requires pyarrow (DuckDB's Arrow export depends on it).
+
+Usage:
+    python result_stream.py cricket.duckdb "SELECT * FROM ball_by_ball" --format arrow --out balls.arrows
+    python result_stream.py cricket.duckdb "SELECT * FROM ball_by_ball" --benchmark
+"""
+
+import io
+import sys
+import json
+import math
+import time
+import argparse
+from pathlib import Path
+from typing import Iterator, Optional
+
+import duckdb
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # only needed when streaming
+    pa = None
+
+BATCH_SIZE = 100_000
+
+# Frontend default row cap for JSON responses (QueryResponse.truncated)
+MAX_JSON_ROWS = 10_000
+
+CONTENT_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+def record_batches(conn: duckdb.DuckDBPyConnection, sql: str, batch_size: int = BATCH_SIZE, params=None):
+    """Arrow RecordBatchReader over a query result"""
+    if pa is None:
+        raise RuntimeError("pyarrow is required for result streaming: pip install pyarrow")
+    result = conn.execute(sql, params)
+    # to_arrow_reader replaced fetch_record_batch in newer DuckDB releases
+    if hasattr(result, "to_arrow_reader"):
+        return result.to_arrow_reader(batch_size)
+    return result.fetch_record_batch(batch_size)
+
+
+def _subquery(sql: str) -> str:
+    # On its own lines, so a trailing -- comment can't swallow the closing parenthesis
+    return "\n" + sql.strip().rstrip(";") + "\n"
+
+
+def _wrappable(conn: duckdb.DuckDBPyConnection, sql: str) -> bool:
+    """Whether sql parses as the body of SELECT * FROM (...)"""
+    try:
+        conn.extract_statements(f"SELECT * FROM ({_subquery(sql)})")
+    except duckdb.ParserException:
+        return False
+    return True
+
+
+def _finite_select(conn: duckdb.DuckDBPyConnection, sql: str, params=None) -> str:
+    """SELECT list over the subquery's columns with non-finite FLOAT/DOUBLE values as NULL"""
+    relation = conn.sql(f"SELECT * FROM ({sql})", params=params)
+    exprs = []
+    for name, dtype in zip(relation.columns, relation.dtypes):
+        ident = '"' + name.replace('"', '""') + '"'
+        if dtype.id in ("float", "double"):
+            exprs.append(f"CASE WHEN isfinite({ident}) THEN {ident} END AS {ident}")
+        else:
+            exprs.append(ident)
+    return ", ".join(exprs)
+
+
+def _finite(value):
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+
+def _limit_clause(max_rows: Optional[int]) -> str:
+    return f" LIMIT {int(max_rows)}" if max_rows is not None else ""
+
+
+def stream_arrow(conn: duckdb.DuckDBPyConnection, sql: str, batch_size: int = BATCH_SIZE,
+                 max_rows: Optional[int] = None, params=None) -> Iterator[bytes]:
+    """Arrow IPC stream: schema message, then one message per record batch"""
+    reader = record_batches(conn, f"SELECT * FROM ({_subquery(sql)}){_limit_clause(max_rows)}", batch_size, params)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()  # end-of-stream marker
+
+
+def stream_ndjson(conn: duckdb.DuckDBPyConnection, sql: str, batch_size: int = BATCH_SIZE,
+                  max_rows: Optional[int] = None, params=None) -> Iterator[bytes]:
+    """One JSON object per row; rows are encoded by DuckDB (to_json), joined a batch at a time"""
+    sql = _subquery(sql)
+    reader = record_batches(conn, f"""
+        SELECT CAST(to_json(q) AS VARCHAR)
+        FROM (SELECT {_finite_select(conn, sql, params)} FROM ({sql})) q{_limit_clause(max_rows)}
+    """, batch_size, params)
+    for batch in reader:
+        yield ("\n".join(batch.column(0).to_pylist()) + "\n").encode()
+
+
+def stream_json(conn: duckdb.DuckDBPyConnection, sql: str, batch_size: int = BATCH_SIZE,
+                max_rows: Optional[int] = MAX_JSON_ROWS, params=None) -> Iterator[bytes]:
+    """QueryResponse JSON ({columns, rows, row_count, truncated}) written incrementally"""
+    if not _wrappable(conn, sql):
+        yield _fetch_json(conn, sql, max_rows, params)
+        return
+
+    sql = _subquery(sql)
+    # Names as the statement returns them (the subquery would rename duplicates: a, a_1)
+    columns = conn.sql(sql, params=params).columns
+    yield f'{{"columns": {json.dumps(columns)}, "rows": ['.encode()
+
+    # One extra row tells us whether the result was truncated
+    limit = _limit_clause(max_rows + 1 if max_rows is not None else None)
+    reader = record_batches(conn, f"""
+        SELECT CAST(json_array(*COLUMNS(*)) AS VARCHAR)
+        FROM (SELECT {_finite_select(conn, sql, params)} FROM ({sql})){limit}
+    """, batch_size, params)
+
+    row_count = 0
+    truncated = False
+    for batch in reader:
+        rows = batch.column(0).to_pylist()
+        if max_rows is not None and row_count + len(rows) > max_rows:
+            rows = rows[:max_rows - row_count]
+            truncated = True
+        if rows:
+            yield ((", " if row_count else "") + ", ".join(rows)).encode()
+            row_count += len(rows)
+
+    yield f'], "row_count": {row_count}, "truncated": {json.dumps(truncated)}}}'.encode()
+
+
+def _fetch_json(conn: duckdb.DuckDBPyConnection, sql: str, max_rows: Optional[int] = MAX_JSON_ROWS,
+                params=None) -> bytes:
+    """QueryResponse JSON through a plain cursor fetch, for statements stream_json can't wrap"""
+    result = conn.execute(sql, params)
+    columns = [d[0] for d in result.description] if result.description else []
+    rows = result.fetchall() if max_rows is None else result.fetchmany(max_rows + 1)
+    truncated = max_rows is not None and len(rows) > max_rows
+    rows = [[_finite(value) for value in row] for row in rows[:max_rows]]
+    return json.dumps({"columns": columns, "rows": rows, "row_count": len(rows), "truncated": truncated},
+                      default=str).encode()
+
+
+ENCODERS = {
+    "arrow": stream_arrow,
+    "ndjson": stream_ndjson,
+    "json": stream_json,
+}
+
+
+def stream_query(conn: duckdb.DuckDBPyConnection, sql: str, fmt: str = "arrow", batch_size: int = BATCH_SIZE,
+                 max_rows: Optional[int] = None, params=None) -> Iterator[bytes]:
+    """Run sql and yield the encoded result in chunks. json caps at MAX_JSON_ROWS unless max_rows is given."""
+    if fmt not in ENCODERS:
+        raise ValueError(f"Unknown format '{fmt}' (choose from: {', '.join(ENCODERS)})")
+    if fmt == "json" and max_rows is None:
+        max_rows = MAX_JSON_ROWS
+    return ENCODERS[fmt](conn, sql, batch_size, max_rows, params)
+
+
+def schema_preview(conn: duckdb.DuckDBPyConnection, table: str, rows: int = 5) -> Iterator[bytes]:
+    """Column names/types plus the first rows of a table as a small Arrow stream"""
+    return stream_query(conn, f'SELECT * FROM "{table}"', fmt="arrow", max_rows=rows)
+
+
+# ============== Benchmark ==============
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def benchmark(db_path: Path, sql: str, batch_size: int = BATCH_SIZE):
+    """Compare fetchall + json.dumps against each streaming encoder (time and bytes)"""
+    conn = duckdb.connect(str(db_path), read_only=True)
+
+    print("=" * 70)
+    print(f"Result streaming benchmark: {db_path.name}")
+    print("=" * 70)
+    print(f"  {'method':<20} {'rows':>12} {'MB':>10} {'seconds':>9} {'rows/s':>14}")
+
+    def report(label, run):
+        start = time.perf_counter()
+        size, rows = run()
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<20} {rows:>12,} {size / 1024 / 1024:>10.1f} {elapsed:>9.2f} {rows / elapsed if elapsed else 0:>14,.0f}")
+
+    rows = conn.execute(f"SELECT COUNT(*) FROM ({sql})").fetchone()[0]
+
+    # Streaming encoders first: peak RSS is a high-water mark, so the
+    # materializing baseline has to run last for the comparison to mean anything
+    for fmt, encode in ENCODERS.items():
+        report(f"stream {fmt}", lambda: (sum(len(chunk) for chunk in encode(conn, sql, batch_size, None)), rows))
+
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"  Peak RSS after streaming: {rss:,.1f} MB")
+
+    def materialized():
+        result = conn.execute(sql)
+        columns = [d[0] for d in result.description]
+        rows = result.fetchall()
+        body = json.dumps({"columns": columns, "rows": rows, "row_count": len(rows), "truncated": False},
+                          default=str)
+        return len(body), len(rows)
+    report("fetchall + json", materialized)
+
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"  Peak RSS after fetchall: {rss:,.1f} MB")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a query result as Arrow IPC, NDJSON or chunked JSON")
+    parser.add_argument("db", type=Path)
+    parser.add_argument("sql")
+    parser.add_argument("--format", choices=list(ENCODERS), default="arrow")
+    parser.add_argument("--out", type=Path, help="Output file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--max-rows", type=int)
+    parser.add_argument("--benchmark", action="store_true", help="Compare encoders against fetchall + json.dumps")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.db, args.sql, args.batch_size)
+    else:
+        conn = duckdb.connect(str(args.db), read_only=True)
+        out = open(args.out, "wb") if args.out else sys.stdout.buffer
+        try:
+            for chunk in stream_query(conn, args.sql, args.format, args.batch_size, args.max_rows):
+                out.write(chunk)
+        finally:
+            if args.out:
+                out.close()
+            conn.close()
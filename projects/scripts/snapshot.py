@@ -0,0 +1,205 @@
+"""
+Read-Only Snapshots
+===================
+Publishes immutable serving copies of a built database. The build files
+(cricket.duckdb, imdb.duckdb) are written in place by the pipelines; the
+served files only change when a new build is published, so they are
+exported once as:
+
+- compacted: COPY FROM DATABASE into a fresh file, so no free or
+  superseded blocks from incremental builds are carried over
+- checkpointed, with no WAL: the export is checkpointed and detached, and
+  publishing fails if a .wal file is left next to it
+- immutable: named <stem>-<build_version>.duckdb, chmod read-only, never
+  rewritten (exporting the same build again is a no-op)
+
+The manifest is copied alongside (with snapshot_of set to the source file
+name) and <stem>.current names the live snapshot. The pointer is replaced
+atomically, so a reader sees either the old or the new snapshot. The last
+few snapshots are kept for processes still reading them.
+
+open_snapshot() opens a snapshot for serving: read_only=True with a small
+buffer pool per process. DuckDB reads database blocks through the OS
+(pread, not mmap), so the shared cache tier is the OS page cache. Several
+worker processes opening the same immutable file share those pages instead
+of each filling a large private buffer pool.
+
+Usage:
+    python snapshot.py export cricket.duckdb --out /data/snapshots
+    python snapshot.py current /data/snapshots cricket
+    python snapshot.py verify /data/snapshots/cricket-1a2b3c4d5e6f.duckdb
+"""
+
+import json
+import stat
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+from catalog import load_manifest, manifest_path
+
+# Snapshots kept per database (the current one plus older ones still being read)
+KEEP_SNAPSHOTS = 3
+
+# Per-process serving settings: a small buffer pool leaves memory to the
+# shared OS page cache
+SERVING_CONFIG = {
+    "memory_limit": "512MB",
+    "threads": 4,
+    "enable_object_cache": True,
+}
+
+POINTER_SUFFIX = ".current"
+
+
+def snapshot_version(db_path: Path) -> str:
+    """Build version from the manifest, else a hash of the file contents"""
+    manifest = load_manifest(db_path)
+    if manifest and manifest.get("build_version"):
+        return manifest["build_version"]
+    digest = hashlib.sha256()
+    with open(db_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def export_snapshot(db_path: Path, out_dir: Path) -> Path:
+    """Write a compacted, checkpointed, read-only copy of db_path into out_dir"""
+    db_path, out_dir = Path(db_path), Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    target = out_dir / f"{db_path.stem}-{snapshot_version(db_path)}.duckdb"
+    if target.exists():
+        print(f"  [SNAPSHOT] {target.name} already exported")
+        return target
+
+    partial = target.with_name(target.name + ".part")
+    for leftover in (partial, partial.with_name(partial.name + ".wal")):
+        leftover.unlink(missing_ok=True)
+
+    start = time.perf_counter()
+    conn = duckdb.connect()
+    try:
+        conn.execute(f"ATTACH '{db_path.as_posix()}' AS src (READ_ONLY)")
+        conn.execute(f"ATTACH '{partial.as_posix()}' AS snap")
+        conn.execute("COPY FROM DATABASE src TO snap")
+        conn.execute("CHECKPOINT snap")
+        conn.execute("DETACH snap")
+    finally:
+        conn.close()
+
+    wal = partial.with_name(partial.name + ".wal")
+    if wal.exists():
+        raise RuntimeError(f"Snapshot left a WAL behind ({wal.name}); not publishing {target.name}")
+
+    partial.replace(target)
+    target.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+    manifest = load_manifest(db_path)
+    if manifest is not None:
+        manifest["snapshot_of"] = db_path.name
+        manifest_path(target).write_text(json.dumps(manifest, indent=2, default=str), encoding="utf-8")
+
+    print(f"  [SNAPSHOT] {target.name}: {target.stat().st_size / 1024 / 1024:,.1f} MB "
+          f"(source {db_path.stat().st_size / 1024 / 1024:,.1f} MB) in {time.perf_counter() - start:.1f}s")
+    return target
+
+
+def pointer_path(out_dir: Path, stem: str) -> Path:
+    return Path(out_dir) / f"{stem}{POINTER_SUFFIX}"
+
+
+def publish(snapshot: Path, keep: int = KEEP_SNAPSHOTS):
+    """Point <stem>.current at snapshot, then prune old snapshots beyond keep"""
+    snapshot = Path(snapshot)
+    stem = snapshot.stem.rsplit("-", 1)[0]
+    pointer = pointer_path(snapshot.parent, stem)
+    partial = pointer.with_name(pointer.name + ".part")
+    partial.write_text(snapshot.name + "\n", encoding="utf-8")
+    partial.replace(pointer)
+    print(f"  [SNAPSHOT] {pointer.name} -> {snapshot.name}")
+
+    others = sorted((p for p in snapshot.parent.glob(f"{stem}-*.duckdb") if p != snapshot),
+                    key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in others[max(keep - 1, 0):]:
+        old.chmod(stat.S_IRUSR | stat.S_IWUSR)
+        old.unlink()
+        manifest_path(old).unlink(missing_ok=True)
+        print(f"  [SNAPSHOT] pruned {old.name}")
+
+
+def current_snapshot(out_dir: Path, stem: str) -> Optional[Path]:
+    pointer = pointer_path(out_dir, stem)
+    if not pointer.exists():
+        return None
+    return Path(out_dir) / pointer.read_text(encoding="utf-8").strip()
+
+
+def served_name(db_path: Path) -> str:
+    """Name a database is served under: a snapshot keeps its source's name (cricket.duckdb)"""
+    manifest = load_manifest(db_path) or {}
+    return manifest.get("snapshot_of") or Path(db_path).name
+
+
+def open_snapshot(db_path: Path, config: Optional[dict] = None) -> duckdb.DuckDBPyConnection:
+    """Open a database read-only with the serving settings"""
+    return duckdb.connect(str(db_path), read_only=True, config={**SERVING_CONFIG, **(config or {})})
+
+
+def verify(snapshot: Path) -> bool:
+    """Check a snapshot is immutable on disk and matches its manifest row counts"""
+    snapshot = Path(snapshot)
+    problems = []
+    if snapshot.stat().st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH):
+        problems.append("file is writable")
+    if snapshot.with_name(snapshot.name + ".wal").exists():
+        problems.append("WAL present")
+
+    manifest = load_manifest(snapshot)
+    conn = open_snapshot(snapshot)
+    try:
+        for table, info in (manifest or {}).get("tables", {}).items():
+            if info["rows"] is None:
+                continue
+            rows = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            if rows != info["rows"]:
+                problems.append(f"{table}: {rows:,} rows, manifest says {info['rows']:,}")
+    finally:
+        conn.close()
+    if manifest is None:
+        problems.append("no manifest")
+
+    print(f"{snapshot.name}: {'OK' if not problems else '; '.join(problems)}")
+    return not problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export, publish and check read-only serving snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Export and publish a snapshot of a built database")
+    export.add_argument("db", type=Path)
+    export.add_argument("--out", type=Path, required=True, help="Snapshot directory")
+    export.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS)
+    export.add_argument("--no-publish", action="store_true", help="Export only; leave <stem>.current as is")
+
+    current = sub.add_parser("current", help="Print the live snapshot for a database")
+    current.add_argument("out", type=Path)
+    current.add_argument("stem", help="e.g. cricket")
+
+    check = sub.add_parser("verify", help="Check a snapshot is read-only and matches its manifest")
+    check.add_argument("snapshot", type=Path)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        snapshot = export_snapshot(args.db, args.out)
+        if not args.no_publish:
+            publish(snapshot, args.keep)
+    elif args.command == "current":
+        print(current_snapshot(args.out, args.stem) or f"No snapshot published for {args.stem}")
+    else:
+        raise SystemExit(0 if verify(args.snapshot) else 1)
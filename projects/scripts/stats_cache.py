@@ -0,0 +1,316 @@
+"""
+Player Stats Cache
+==================
+In-process NumPy cache behind the BattingStats / BowlingStats leaderboards.
+Both pages re-run a GROUP BY over ball_by_ball whenever a filter (format,
+year range, team, min matches) changes. The cache loads per (player,
+match_type, year, team) aggregates once into NumPy arrays; a leaderboard
+for any filter is then a mask, np.bincount per metric, the derived ratios
+(average, strike rate, economy, ...) and one sort, all vectorized.
+
+matches is additive over these groups (a match has one format, one year
+and one batting/bowling team per player), so filtered totals equal what the
+pages' COUNT(DISTINCT match_id) returns.
+
+The cache follows the database version: the manifest build_version written
+by the pipeline (catalog.py), or the file's mtime and size when there is no
+manifest. The version is re-checked at most every check_interval seconds,
+and the arrays are reloaded when it changes.
+
+Results use the QueryResponse shape ({columns, rows, row_count, truncated})
+with the pages' column order.
+
+Usage:
+    python stats_cache.py cricket.duckdb batting --match-type ODI --year-from 2010 --min-matches 20
+    python stats_cache.py cricket.duckdb bowling --benchmark
+"""
+
+import time
+import argparse
+import threading
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+import numpy as np
+
+from catalog import load_manifest
+from process_cricsheet import NON_BOWLER_WICKETS, NOT_OUT_WICKETS, sql_list
+from snapshot import open_snapshot
+
+# Rows per leaderboard, as in the pages' LIMIT
+LEADERBOARD_LIMIT = 500
+
+# Seconds between database version checks
+CHECK_INTERVAL = 5.0
+
+BATTING_SQL = f"""
+    SELECT
+        striker AS player, match_type, CAST(EXTRACT(YEAR FROM start_date) AS INTEGER) AS year,
+        batting_team AS team,
+        COUNT(DISTINCT match_id) AS matches,
+        SUM(runs_off_bat) AS runs,
+        COUNT(*) AS balls,
+        COUNT(*) FILTER (WHERE wicket_type IS NOT NULL AND player_dismissed = striker
+                         AND wicket_type NOT IN ({sql_list(NOT_OUT_WICKETS)})) AS dismissals,
+        COUNT(*) FILTER (WHERE runs_off_bat = 4) AS fours,
+        COUNT(*) FILTER (WHERE runs_off_bat = 6) AS sixes
+    FROM ball_by_ball
+    GROUP BY ALL
+"""
+
+BOWLING_SQL = f"""
+    SELECT
+        bowler AS player, match_type, CAST(EXTRACT(YEAR FROM start_date) AS INTEGER) AS year,
+        bowling_team AS team,
+        COUNT(DISTINCT match_id) AS matches,
+        COUNT(*) AS balls,
+        SUM(runs_off_bat + COALESCE(wides, 0) + COALESCE(noballs, 0)) AS runs,
+        COUNT(*) FILTER (WHERE wicket_type IS NOT NULL
+                         AND wicket_type NOT IN ({sql_list(NON_BOWLER_WICKETS)})) AS wickets,
+        COUNT(*) FILTER (WHERE runs_off_bat = 0 AND COALESCE(wides, 0) = 0 AND COALESCE(noballs, 0) = 0) AS dots,
+        COUNT(*) FILTER (WHERE runs_off_bat = 4) AS fours,
+        COUNT(*) FILTER (WHERE runs_off_bat = 6) AS sixes
+    FROM ball_by_ball
+    GROUP BY ALL
+"""
+
+KEYS = ["player", "match_type", "year", "team"]
+
+
+def database_version(db_path: Path) -> str:
+    """Manifest build_version, else the file's mtime and size"""
+    manifest = load_manifest(db_path)
+    if manifest and manifest.get("build_version"):
+        return manifest["build_version"]
+    stat = Path(db_path).stat()
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class SeasonArrays:
+    """One aggregate table as NumPy columns; string keys are dictionary-encoded."""
+
+    def __init__(self, columns: dict):
+        # fetchnumpy returns masked arrays where a column has NULLs
+        columns = {name: np.ma.filled(values, "" if values.dtype == object else 0)
+                   for name, values in columns.items()}
+        self.players, self.player = np.unique(columns["player"].astype(str), return_inverse=True)
+        self.match_types, self.match_type = np.unique(columns["match_type"].astype(str), return_inverse=True)
+        self.teams, self.team = np.unique(columns["team"].astype(str), return_inverse=True)
+        self.year = np.asarray(columns["year"], dtype=np.int32)
+        self.metrics = {name: np.asarray(values, dtype=np.int64)
+                        for name, values in columns.items() if name not in KEYS}
+
+    def __len__(self):
+        return len(self.year)
+
+    def totals(self, match_type: str = "All", year_from: Optional[int] = None, year_to: Optional[int] = None,
+               team: str = "All") -> dict:
+        """Per-player sums of every metric over the rows matching the filters (index = player code)"""
+        mask = np.ones(len(self), dtype=bool)
+        if year_from is not None:
+            mask &= self.year >= year_from
+        if year_to is not None:
+            mask &= self.year <= year_to
+        for value, names, codes in ((match_type, self.match_types, self.match_type), (team, self.teams, self.team)):
+            if value != "All":
+                index = np.searchsorted(names, value)
+                if index == len(names) or names[index] != value:
+                    mask[:] = False
+                else:
+                    mask &= codes == index
+
+        player = self.player[mask]
+        size = len(self.players)
+        return {name: np.bincount(player, weights=values[mask], minlength=size).astype(np.int64)
+                for name, values in self.metrics.items()}
+
+
+def _ratio(numerator, denominator, scale: float = 1.0, default=0.0):
+    out = np.full(len(numerator), default, dtype=np.float64)
+    np.divide(numerator * scale, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def batting_columns(t: dict) -> dict:
+    runs = t["runs"]
+    return {
+        "player": None,
+        "matches": t["matches"],
+        "innings": t["matches"],
+        "runs": runs,
+        "balls_faced": t["balls"],
+        "dismissals": t["dismissals"],
+        "not_outs": t["matches"] - t["dismissals"],
+        # No dismissals: the page shows total runs as the average
+        "average": np.round(np.where(t["dismissals"] > 0, _ratio(runs, t["dismissals"]), runs), 2),
+        "strike_rate": np.round(_ratio(runs, t["balls"], 100), 2),
+        "fours": t["fours"],
+        "sixes": t["sixes"],
+        "boundary_pct": np.round(_ratio(t["fours"] * 4 + t["sixes"] * 6, runs, 100), 1),
+    }
+
+
+def bowling_columns(t: dict) -> dict:
+    balls, runs, wickets = t["balls"], t["runs"], t["wickets"]
+    return {
+        "bowler": None,
+        "matches": t["matches"],
+        "balls": balls,
+        "overs": np.round(balls / 6.0, 1),
+        "runs": runs,
+        "wickets": wickets,
+        "economy": np.round(_ratio(runs, balls, 6), 2),
+        "average": np.round(_ratio(runs, wickets), 2),
+        "strike_rate": np.round(_ratio(balls, wickets), 1),
+        "dot_pct": np.round(_ratio(t["dots"], balls, 100), 1),
+        "fours": t["fours"],
+        "sixes": t["sixes"],
+    }
+
+
+BOARDS = {
+    # kind: (load SQL, column builder, default sort)
+    "batting": (BATTING_SQL, batting_columns, "runs"),
+    "bowling": (BOWLING_SQL, bowling_columns, "wickets"),
+}
+
+
+class StatsCache:
+    """Batting and bowling season arrays for one database, reloaded when its version changes."""
+
+    def __init__(self, db_path: Path, check_interval: float = CHECK_INTERVAL):
+        self.db_path = Path(db_path)
+        self.check_interval = check_interval
+        self.version = None
+        self.boards = {}
+        self.load_seconds = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        start = time.perf_counter()
+        version = database_version(self.db_path)
+        # Same settings as the gateway's connection: DuckDB refuses a second config for an open file
+        conn = open_snapshot(self.db_path)
+        try:
+            boards = {kind: SeasonArrays(conn.execute(sql).fetchnumpy()) for kind, (sql, _, _) in BOARDS.items()}
+        finally:
+            conn.close()
+        self.boards, self.version = boards, version
+        self.load_seconds = time.perf_counter() - start
+        print(f"  [STATS CACHE] {self.db_path.name} build {version}: "
+              + ", ".join(f"{kind} {len(arrays):,} rows" for kind, arrays in boards.items())
+              + f" in {self.load_seconds:.2f}s")
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if the database version changed (checked at most every check_interval). True if reloaded."""
+        now = time.monotonic()
+        if not force and self.boards and now - self._checked_at < self.check_interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            if force or not self.boards or database_version(self.db_path) != self.version:
+                self.load()
+                return True
+        return False
+
+    def leaderboard(self, kind: str = "batting", match_type: str = "All", year_from: Optional[int] = None,
+                    year_to: Optional[int] = None, team: str = "All", min_matches: int = 1,
+                    sort: Optional[str] = None, descending: bool = True,
+                    limit: int = LEADERBOARD_LIMIT) -> dict:
+        """Filtered, sorted leaderboard in the page's column order (QueryResponse shape)"""
+        if kind not in BOARDS:
+            raise ValueError(f"Unknown leaderboard '{kind}' (choose from: {', '.join(BOARDS)})")
+        year_from = int(year_from) if year_from is not None else None
+        year_to = int(year_to) if year_to is not None else None
+        min_matches, limit = int(min_matches), int(limit)
+
+        self.refresh()
+        arrays = self.boards[kind]
+        _, build_columns, default_sort = BOARDS[kind]
+
+        totals = arrays.totals(match_type, year_from, year_to, team)
+        columns = build_columns(totals)
+        name_column = next(iter(columns))
+        sort = sort or default_sort
+        if sort not in columns or sort == name_column:
+            raise ValueError(f"Cannot sort {kind} by '{sort}'")
+
+        keep = np.flatnonzero(totals["matches"] >= max(min_matches, 1))
+        key = columns[sort][keep]
+        # Ties broken by player name (codes are in name order)
+        order = keep[np.lexsort((keep, -key if descending else key))]
+        total = len(order)
+        order = order[:limit]
+
+        columns[name_column] = arrays.players
+        rows = np.column_stack([columns[c][order].astype(object) for c in columns]).tolist() if len(order) else []
+        return {"columns": list(columns), "rows": rows, "row_count": len(rows), "truncated": total > limit}
+
+
+# ============== Benchmark ==============
+
+def sql_leaderboard(conn: duckdb.DuckDBPyConnection, kind: str, match_type: str, year_from: int, year_to: int,
+                    team: str, min_matches: int) -> list:
+    """The same leaderboard via SQL over the aggregates (reference for the check)"""
+    sql, _, sort = BOARDS[kind]
+    conditions = [f"year BETWEEN {year_from} AND {year_to}"]
+    if match_type != "All":
+        conditions.append(f"match_type = '{match_type}'")
+    if team != "All":
+        conditions.append(f"team = '{team}'")
+    metric = "runs" if kind == "batting" else "wickets"
+    return conn.execute(f"""
+        SELECT player, SUM(matches) AS matches, SUM({metric}) AS value
+        FROM ({sql}) WHERE {' AND '.join(conditions)}
+        GROUP BY player HAVING SUM(matches) >= {min_matches}
+        ORDER BY value DESC, player LIMIT {LEADERBOARD_LIMIT}
+    """).fetchall()
+
+
+def benchmark(db_path: Path, kind: str, match_type: str, year_from: int, year_to: int, team: str,
+              min_matches: int, runs: int = 200):
+    cache = StatsCache(db_path)
+    cache.refresh()
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = cache.leaderboard(kind, match_type, year_from, year_to, team, min_matches)
+    cached = (time.perf_counter() - start) / runs
+
+    conn = duckdb.connect(str(db_path), read_only=True)
+    start = time.perf_counter()
+    expected = sql_leaderboard(conn, kind, match_type, year_from, year_to, team, min_matches)
+    direct = time.perf_counter() - start
+    conn.close()
+
+    metric = result["columns"].index("runs" if kind == "batting" else "wickets")
+    got = [(row[0], row[1], row[metric]) for row in result["rows"]]
+    print(f"  {kind}: {result['row_count']} rows, cache {cached * 1e6:,.0f} us/query, "
+          f"SQL {direct * 1000:,.1f} ms, cache load {cache.load_seconds:.2f}s, "
+          f"{'matches SQL' if got == [tuple(r) for r in expected] else 'MISMATCH vs SQL'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NumPy leaderboard cache over cricket.duckdb")
+    parser.add_argument("db", type=Path)
+    parser.add_argument("kind", choices=list(BOARDS))
+    parser.add_argument("--match-type", default="All")
+    parser.add_argument("--year-from", type=int, default=2002)
+    parser.add_argument("--year-to", type=int, default=2025)
+    parser.add_argument("--team", default="All")
+    parser.add_argument("--min-matches", type=int, default=10)
+    parser.add_argument("--sort", help="Column to sort by (default: runs / wickets)")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    parser.add_argument("--benchmark", action="store_true", help="Time cache vs SQL and check they agree")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.db, args.kind, args.match_type, args.year_from, args.year_to, args.team, args.min_matches)
+    else:
+        result = StatsCache(args.db).leaderboard(args.kind, args.match_type, args.year_from, args.year_to,
+                                                 args.team, args.min_matches, args.sort, limit=args.top)
+        print("  ".join(f"{c:>12}" for c in result["columns"]))
+        for row in result["rows"]:
+            print("  ".join(f"{v:>12}" for v in row))
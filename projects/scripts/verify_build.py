@@ -0,0 +1,365 @@
+"""
+Build Verification
+==================
+Differential check for pipeline changes. A faster ingest path (parallel
+load, streaming, native read_csv, the JSON archives) must produce the same
+cricket.duckdb / imdb.duckdb as the path it replaces. This script builds a
+dataset with two pipeline variants into scratch directories and compares
+the results table by table:
+
+- table set, row counts, column names and types
+- per column: non-null count and an order-independent checksum (SUM of
+  hash(value) over all rows)
+- per table: an order-independent row hash (SUM of hash(all columns))
+- reference aggregates: runs per player, wickets per bowler, matches and
+  wins per team, title counts per type and year, ...; these are keyed, so a
+  mismatch names the players or title types that differ
+
+Each table is summarized by one aggregate query per database, so a full
+comparison takes seconds rather than a row-by-row diff. DOUBLE columns are
+rounded to FLOAT_DIGITS decimals before hashing, so a different summation
+order (more threads) is not reported as a change.
+
+Variants (see VARIANTS):
+- cricket: csv, json (input format), small-vps (csv with 2 threads)
+- imdb: full, small-vps, lazy (akas/principals as Parquet views)
+Append @<git rev> to build a variant with the scripts as of that revision,
+e.g. csv@HEAD~1 against csv checks the latest change to the pipeline.
+
+Usage:
+    python verify_build.py build cricket --data-dir /tmp/synth csv json
+    python verify_build.py build cricket --data-dir /tmp/synth csv@HEAD~1 csv
+    python verify_build.py build imdb --data-dir /tmp/synth full small-vps
+    python verify_build.py compare old/cricket.duckdb new/cricket.duckdb
+
+Exits with status 1 when the databases differ.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+from catalog import INTERNAL_TABLES, load_manifest, quote_ident
+from process_cricsheet import NON_BOWLER_WICKETS, sql_list
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Decimals kept from DOUBLE/FLOAT values before hashing
+FLOAT_DIGITS = 9
+
+# Mismatching keys printed per reference aggregate
+SHOW_KEYS = 5
+
+# Bookkeeping tables that legitimately differ between builds
+SKIP_TABLES = INTERNAL_TABLES
+
+# Columns holding build paths or timestamps: only their non-null counts are compared
+VOLATILE_COLUMNS = {
+    "import_rejects": {"source_file"},
+    "lazy_tables": {"parquet_path", "registered_at", "materialized_at"},
+}
+
+DATASETS = {
+    "cricket": {
+        "script": "projects/scripts/process_cricsheet.py",
+        "inputs": ["*_csv2.zip", "*_json.zip"],
+        "db": "cricket.duckdb",
+    },
+    "imdb": {
+        "script": "projects/imdb-data/scripts/download_and_import.py",
+        "inputs": ["*.tsv.gz"],
+        "db": "imdb.duckdb",
+    },
+}
+
+# variant -> (extra script arguments, extra environment)
+VARIANTS = {
+    "cricket": {
+        "csv": (["--format", "csv"], {}),
+        "json": (["--format", "json"], {}),
+        "small-vps": (["--format", "csv"], {"BUILD_PROFILE": "small-vps"}),
+    },
+    "imdb": {
+        "full": ([], {}),
+        "small-vps": ([], {"BUILD_PROFILE": "small-vps"}),
+        "lazy": (["--lazy"], {}),
+    },
+}
+
+# Reference aggregates per pipeline: (name, SQL returning key, value); {db} is the attached database
+REFERENCE_AGGREGATES = {
+    "cricsheet": [
+        ("runs per player",
+         "SELECT striker AS key, SUM(runs_off_bat) AS value FROM {db}.ball_by_ball GROUP BY 1"),
+        ("wickets per bowler",
+         f"""SELECT bowler AS key, COUNT(*) AS value FROM {{db}}.ball_by_ball
+             WHERE wicket_type IS NOT NULL AND wicket_type NOT IN ({sql_list(NON_BOWLER_WICKETS)})
+             GROUP BY 1"""),
+        ("deliveries per match",
+         "SELECT match_id AS key, COUNT(*) AS value FROM {db}.ball_by_ball GROUP BY 1"),
+        ("matches per format",
+         "SELECT match_type AS key, COUNT(*) AS value FROM {db}.match_info GROUP BY 1"),
+        ("wins per team",
+         "SELECT winner AS key, COUNT(*) AS value FROM {db}.match_info WHERE winner IS NOT NULL GROUP BY 1"),
+    ],
+    "imdb": [
+        ("titles per type",
+         "SELECT titleType AS key, COUNT(*) AS value FROM {db}.title_basics GROUP BY 1"),
+        ("titles per year",
+         "SELECT startYear AS key, COUNT(*) AS value FROM {db}.title_basics GROUP BY 1"),
+        ("votes per type",
+         """SELECT b.titleType AS key, SUM(r.numVotes) AS value
+            FROM {db}.title_basics b JOIN {db}.title_ratings r USING (tconst) GROUP BY 1"""),
+        ("rated titles per genre",
+         "SELECT genre AS key, COUNT(*) AS value FROM {db}.titles_rated GROUP BY 1"),
+        ("people per birth decade",
+         "SELECT birthYear // 10 * 10 AS key, COUNT(*) AS value FROM {db}.name_basics GROUP BY 1"),
+    ],
+}
+
+
+# ============== Summaries ==============
+
+def list_tables(conn: duckdb.DuckDBPyConnection, db: str) -> dict:
+    """{table: {column: type}} for the tables and views of an attached database"""
+    rows = conn.execute("""
+        SELECT table_name, column_name, data_type
+        FROM information_schema.columns
+        WHERE table_catalog = ? AND table_schema = 'main'
+        ORDER BY table_name, ordinal_position
+    """, [db]).fetchall()
+    tables = {}
+    for table, column, col_type in rows:
+        if table not in SKIP_TABLES:
+            tables.setdefault(table, {})[column] = col_type
+    return tables
+
+
+def hash_expr(column: str, col_type: str, as_text: bool = False) -> str:
+    """Expression hashed for one column: text when the two sides disagree on type, floats rounded"""
+    expr = quote_ident(column)
+    if as_text:
+        return f"CAST({expr} AS VARCHAR)"
+    if col_type in ("DOUBLE", "FLOAT", "REAL"):
+        return f"ROUND({expr}, {FLOAT_DIGITS})"
+    return expr
+
+
+def summarize_table(conn: duckdb.DuckDBPyConnection, db: str, table: str,
+                    columns: dict, as_text: set) -> dict:
+    """Row count, row hash and per-column (non-null count, checksum) in one scan"""
+    volatile = VOLATILE_COLUMNS.get(table, set())
+    hashed = [c for c in sorted(columns) if c not in volatile]
+    exprs = {c: hash_expr(c, t, c in as_text) for c, t in columns.items()}
+
+    select = ["COUNT(*)"]
+    select.append(f"SUM(hash({', '.join(exprs[c] for c in hashed)}))" if hashed else "0")
+    for column in columns:
+        select.append(f"COUNT({quote_ident(column)})")
+        select.append("0" if column in volatile else f"SUM(hash({exprs[column]}))")
+
+    row = conn.execute(f"SELECT {', '.join(select)} FROM {db}.{quote_ident(table)}").fetchone()
+    values = iter(row[2:])
+    return {
+        "rows": row[0],
+        "row_hash": row[1] or 0,
+        "columns": {c: (next(values), next(values) or 0) for c in columns},
+    }
+
+
+def compare_table(conn: duckdb.DuckDBPyConnection, table: str, left: dict, right: dict) -> tuple:
+    """(left rows, right rows, differences) for a table present in both databases"""
+    problems = []
+    common = [c for c in left if c in right]
+    for column in left:
+        if column not in right:
+            problems.append(f"column {column} only in left")
+    for column in right:
+        if column not in left:
+            problems.append(f"column {column} only in right")
+
+    retyped = {c for c in common if left[c] != right[c]}
+    for column in sorted(retyped):
+        problems.append(f"column {column}: {left[column]} vs {right[column]}")
+
+    a = summarize_table(conn, "a", table, {c: left[c] for c in common}, retyped)
+    b = summarize_table(conn, "b", table, {c: right[c] for c in common}, retyped)
+    if a["rows"] != b["rows"]:
+        problems.append(f"rows {a['rows']:,} vs {b['rows']:,}")
+    for column in common:
+        (count_a, sum_a), (count_b, sum_b) = a["columns"][column], b["columns"][column]
+        if count_a != count_b:
+            problems.append(f"column {column}: {count_a:,} vs {count_b:,} non-null")
+        elif sum_a != sum_b:
+            problems.append(f"column {column}: checksum differs")
+    if not problems and a["row_hash"] != b["row_hash"]:
+        # Every column matches on its own, but values are paired differently across rows
+        problems.append("row hash differs (same column values, different rows)")
+    return a["rows"], b["rows"], problems
+
+
+def compare_aggregate(conn: duckdb.DuckDBPyConnection, sql: str) -> tuple:
+    """(mismatching key count, first SHOW_KEYS of (key, left, right)) for a keyed aggregate"""
+    diff = f"""
+        SELECT COALESCE(a.key, b.key) AS key, a.value AS left_value, b.value AS right_value
+        FROM ({sql.format(db='a')}) a
+        FULL OUTER JOIN ({sql.format(db='b')}) b ON a.key IS NOT DISTINCT FROM b.key
+        WHERE a.value IS DISTINCT FROM b.value
+    """
+    total = conn.execute(f"SELECT COUNT(*) FROM ({diff})").fetchone()[0]
+    sample = conn.execute(f"{diff} ORDER BY key LIMIT {SHOW_KEYS}").fetchall() if total else []
+    return total, sample
+
+
+# ============== Compare ==============
+
+def compare_databases(left: Path, right: Path, pipeline: Optional[str] = None) -> bool:
+    """Compare two built databases; print a report and return True when they match"""
+    start = time.perf_counter()
+    pipeline = pipeline or (load_manifest(left) or load_manifest(right) or {}).get("pipeline")
+
+    conn = duckdb.connect()
+    try:
+        conn.execute(f"ATTACH '{Path(left).as_posix()}' AS a (READ_ONLY)")
+        conn.execute(f"ATTACH '{Path(right).as_posix()}' AS b (READ_ONLY)")
+        tables_a, tables_b = list_tables(conn, "a"), list_tables(conn, "b")
+
+        print(f"\nLeft:  {left}\nRight: {right}")
+        print(f"\n{'Table':<24} {'Rows (left)':>14} {'Rows (right)':>14}  Result")
+        print("-" * 70)
+        failures = 0
+        for table in sorted(set(tables_a) | set(tables_b)):
+            if table not in tables_b or table not in tables_a:
+                side = "left" if table in tables_a else "right"
+                print(f"{table:<24} {'':>14} {'':>14}  [WARN] only in {side}")
+                continue
+            try:
+                rows_a, rows_b, problems = compare_table(conn, table, tables_a[table], tables_b[table])
+            except duckdb.Error as e:
+                rows_a = rows_b = None
+                problems = [f"summary failed: {str(e).splitlines()[0]}"]
+            rows = "".join(f" {n:>14,}" if n is not None else f" {'?':>14}" for n in (rows_a, rows_b))
+            print(f"{table:<24}{rows}  {'OK' if not problems else 'DIFF'}")
+            for problem in problems:
+                print(f"    - {problem}")
+            failures += bool(problems)
+
+        aggregates = REFERENCE_AGGREGATES.get(pipeline, [])
+        if aggregates:
+            print(f"\nReference aggregates ({pipeline}):")
+        for name, sql in aggregates:
+            try:
+                total, sample = compare_aggregate(conn, sql)
+            except duckdb.Error as e:
+                print(f"  {name:<28} [SKIP] {str(e).splitlines()[0]}")
+                continue
+            print(f"  {name:<28} {'OK' if not total else f'{total:,} keys differ'}")
+            for key, value_a, value_b in sample:
+                print(f"    - {key}: {value_a} vs {value_b}")
+            failures += bool(total)
+    finally:
+        conn.close()
+
+    print(f"\n{'MATCH' if not failures else f'{failures} difference(s)'} "
+          f"({time.perf_counter() - start:.1f}s)")
+    return not failures
+
+
+# ============== Build ==============
+
+def parse_variant(dataset: str, spec: str) -> tuple:
+    """'csv@HEAD~1' -> ('csv', 'HEAD~1'); the revision is None for the working tree"""
+    name, _, rev = spec.partition("@")
+    if name not in VARIANTS[dataset]:
+        raise SystemExit(f"Unknown {dataset} variant '{name}' (choose from: {', '.join(VARIANTS[dataset])})")
+    return name, rev or None
+
+
+def checkout_scripts(rev: str, target: Path) -> Path:
+    """Extract the pipeline scripts as of a git revision; returns the tree root"""
+    target.mkdir(parents=True, exist_ok=True)
+    paths = sorted({str(Path(info["script"]).parent) for info in DATASETS.values()})
+    archive = subprocess.run(["git", "-C", str(REPO_ROOT), "archive", rev, *paths],
+                             check=True, capture_output=True).stdout
+    subprocess.run(["tar", "-x", "-C", str(target)], input=archive, check=True)
+    return target
+
+
+def build_variant(dataset: str, spec: str, data_dir: Path, work_dir: Path) -> Path:
+    """Build dataset with one variant into its own directory (inputs are symlinked); returns the database"""
+    info = DATASETS[dataset]
+    name, rev = parse_variant(dataset, spec)
+    args, env = VARIANTS[dataset][name]
+
+    label = spec.replace("@", "_at_").replace("/", "_").replace("~", "-")
+    out_dir = work_dir / label / "data"
+    out_dir.mkdir(parents=True)
+    for pattern in info["inputs"]:
+        for source in Path(data_dir).glob(pattern):
+            (out_dir / source.name).symlink_to(source.resolve())
+
+    root = checkout_scripts(rev, work_dir / label / "src") if rev else REPO_ROOT
+    log = work_dir / label / "build.log"
+    command = [sys.executable, str(root / info["script"]), "--data-dir", str(out_dir), "--force", *args]
+
+    print(f"  [BUILD] {dataset} {spec} ...", end=" ", flush=True)
+    start = time.perf_counter()
+    with open(log, "w", encoding="utf-8") as f:
+        result = subprocess.run(command, stdout=f, stderr=subprocess.STDOUT, cwd=root / Path(info["script"]).parent,
+                                env={**os.environ, **env})
+    if result.returncode != 0:
+        print("FAILED")
+        print("".join(log.read_text(encoding="utf-8").splitlines(keepends=True)[-20:]))
+        raise SystemExit(f"Build of {dataset} {spec} failed (log: {log})")
+    print(f"{time.perf_counter() - start:.1f}s")
+    return out_dir / info["db"]
+
+
+def build_and_compare(dataset: str, data_dir: Path, left: str, right: str,
+                      work_dir: Optional[Path] = None, keep: bool = False) -> bool:
+    """Build both variants from the same inputs and compare the databases"""
+    parse_variant(dataset, left), parse_variant(dataset, right)
+    scratch = Path(tempfile.mkdtemp(prefix=f"verify-{dataset}-", dir=work_dir))
+    try:
+        db_left = build_variant(dataset, left, data_dir, scratch)
+        db_right = build_variant(dataset, right, data_dir, scratch)
+        return compare_databases(db_left, db_right)
+    finally:
+        if keep:
+            print(f"  [KEEP] builds left in {scratch}")
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build with two pipeline variants and compare the databases")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Build a dataset with two variants and compare them")
+    build.add_argument("dataset", choices=list(DATASETS))
+    build.add_argument("left", help="Variant, optionally @<git rev> (e.g. csv, csv@HEAD~1)")
+    build.add_argument("right", help="Variant to compare against left")
+    build.add_argument("--data-dir", type=Path, required=True, help="Directory with the input zips / TSV files")
+    build.add_argument("--work-dir", type=Path, help="Where the scratch builds go (default: system temp)")
+    build.add_argument("--keep", action="store_true", help="Keep the scratch builds")
+
+    compare = sub.add_parser("compare", help="Compare two existing databases")
+    compare.add_argument("left", type=Path)
+    compare.add_argument("right", type=Path)
+    compare.add_argument("--pipeline", choices=list(REFERENCE_AGGREGATES),
+                         help="Reference aggregates to run (default: from the manifest)")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        ok = build_and_compare(args.dataset, args.data_dir, args.left, args.right, args.work_dir, args.keep)
+    else:
+        ok = compare_databases(args.left, args.right, args.pipeline)
+    raise SystemExit(0 if ok else 1)